@@ -2,7 +2,8 @@
 
 from config.settings import get_settings, Settings
 from config.database import get_db, init_db, close_db, Base
-from config.redis import get_redis, close_redis, RedisCache
+from config.redis import get_redis, close_redis, RedisCache, local_cache, listen_for_invalidations
+from config.http import get_http_client, init_http_client, close_http_client
 
 __all__ = [
     "get_settings",
@@ -14,4 +15,9 @@ __all__ = [
     "get_redis",
     "close_redis",
     "RedisCache",
+    "local_cache",
+    "listen_for_invalidations",
+    "get_http_client",
+    "init_http_client",
+    "close_http_client",
 ]
@@ -0,0 +1,49 @@
+import httpx
+from typing import Optional
+from config.settings import get_settings
+
+settings = get_settings()
+
+# Shared HTTP client instance
+http_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the pooled HTTP client shared by the external API services"""
+    global http_client
+    
+    if http_client is None or http_client.is_closed:
+        http_client = httpx.AsyncClient(
+            http2=settings.HTTP_ENABLE_HTTP2 and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(10.0),
+        )
+    
+    return http_client
+
+
+async def init_http_client():
+    """Open the shared HTTP client"""
+    get_http_client()
+
+
+async def close_http_client():
+    """Close the shared HTTP client and its pooled connections"""
+    global http_client
+    
+    if http_client:
+        await http_client.aclose()
+        http_client = None
@@ -1,11 +1,27 @@
+import asyncio
+import logging
+import time
+import uuid
 import redis.asyncio as redis
-from typing import Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 from config.settings import get_settings
+from config.serializers import JsonSerializer
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
-# Redis client instance
+# Redis client instances (text and binary values)
 redis_client: Optional[redis.Redis] = None
+redis_binary_client: Optional[redis.Redis] = None
+
+# Identifies this process in invalidation messages
+INSTANCE_ID = uuid.uuid4().hex
+
+
+def _invalidation_message(keys: List[str]) -> str:
+    """One pub/sub message naming every key changed by a call"""
+    return f"{INSTANCE_ID}:" + "\n".join(keys)
 
 
 async def get_redis() -> redis.Redis:
@@ -24,36 +40,192 @@ async def get_redis() -> redis.Redis:
     return redis_client
 
 
+async def get_binary_redis() -> redis.Redis:
+    """Get Redis client instance that returns raw bytes (binary serializers)"""
+    global redis_binary_client
+    
+    if redis_binary_client is None:
+        redis_binary_client = await redis.from_url(
+            f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}",
+            password=settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
+            decode_responses=False,
+            max_connections=10,
+        )
+    
+    return redis_binary_client
+
+
 async def close_redis():
-    """Close Redis connection"""
-    global redis_client
+    """Close Redis connections"""
+    global redis_client, redis_binary_client
     
     if redis_client:
         await redis_client.close()
         redis_client = None
+    
+    if redis_binary_client:
+        await redis_binary_client.close()
+        redis_binary_client = None
+
+
+class LocalCache:
+    """Bounded in-process LRU cache with per-entry expiry"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a key
+        
+        Returns:
+            Tuple of (found, value)
+        """
+        entry = self._entries.get(key)
+        
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+    
+    def set(self, key: str, value: Any, ttl: float):
+        """Store a value, evicting the least recently used entries when full"""
+        if self.max_entries <= 0:
+            return
+        
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# In-process tier shared by every RedisCache
+local_cache = LocalCache(max_entries=settings.LOCAL_CACHE_MAX_ENTRIES)
+
+
+async def listen_for_invalidations():
+    """
+    Drop local entries that other workers changed
+    
+    RedisCache publishes the keys it sets or deletes, one message per call.
+    Run this as a background task for the lifetime of the application.
+    """
+    while True:
+        try:
+            client = await get_redis()
+            pubsub = client.pubsub()
+            await pubsub.subscribe(settings.LOCAL_CACHE_INVALIDATION_CHANNEL)
+            # Messages may have been missed while disconnected
+            local_cache.clear()
+            
+            try:
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    sender, _, keys = message["data"].partition(":")
+                    if sender != INSTANCE_ID:
+                        for key in keys.split("\n"):
+                            local_cache.delete(key)
+            finally:
+                await pubsub.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener error: {e}")
+            await asyncio.sleep(5)
 
 
 class RedisCache:
-    """Redis cache wrapper with TTL support"""
+    """
+    Redis cache wrapper with TTL support
+    
+    Structured values (*_json methods) are encoded by a pluggable serializer
+    (JSON by default, see config/serializers.py) and also kept, encoded, in
+    the in-process LRU tier for up to LOCAL_CACHE_TTL seconds. Every read
+    decodes a fresh copy, so callers may modify the values they get.
+    """
     
-    def __init__(self, ttl: int = None):
+    def __init__(self, ttl: int = None, use_local: bool = True, serializer=None):
         self.ttl = ttl or settings.REDIS_CACHE_TTL
+        self.use_local = use_local
+        self.serializer = serializer or JsonSerializer()
     
     async def get(self, key: str) -> Optional[str]:
         """Get value from cache"""
-        client = await get_redis()
+        client = await self._client()
         return await client.get(key)
     
     async def set(self, key: str, value: str, ttl: int = None) -> bool:
         """Set value in cache with TTL"""
-        client = await get_redis()
+        client = await self._client()
         expire_time = ttl or self.ttl
-        return await client.setex(key, expire_time, value)
+        local_cache.delete(key)
+        
+        if not settings.LOCAL_CACHE_PUBSUB:
+            return await client.setex(key, expire_time, value)
+        
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.setex(key, expire_time, value)
+            pipe.publish(settings.LOCAL_CACHE_INVALIDATION_CHANNEL, _invalidation_message([key]))
+            stored, _ = await pipe.execute()
+        return stored
     
     async def delete(self, key: str) -> bool:
         """Delete key from cache"""
+        return await self.delete_many([key]) > 0
+    
+    async def delete_many(self, keys: list) -> int:
+        """
+        Delete several keys in one round trip
+        
+        Returns:
+            Number of keys removed from Redis
+        """
+        if not keys:
+            return 0
+        
         client = await get_redis()
-        return await client.delete(key) > 0
+        for key in keys:
+            local_cache.delete(key)
+        
+        if not settings.LOCAL_CACHE_PUBSUB:
+            return await client.delete(*keys)
+        
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.delete(*keys)
+            pipe.publish(settings.LOCAL_CACHE_INVALIDATION_CHANNEL, _invalidation_message(keys))
+            results = await pipe.execute()
+        return results[0]
     
     async def exists(self, key: str) -> bool:
         """Check if key exists"""
@@ -61,12 +233,86 @@ class RedisCache:
         return await client.exists(key) > 0
     
     async def set_json(self, key: str, value: dict, ttl: int = None) -> bool:
-        """Set JSON value in cache"""
-        import json
-        return await self.set(key, json.dumps(value), ttl)
+        """Set structured value in cache"""
+        raw = self.serializer.dumps(value)
+        stored = await self.set(key, raw, ttl)
+        
+        if self.use_local:
+            local_cache.set(key, raw, self._local_ttl(ttl))
+        
+        return stored
     
     async def get_json(self, key: str) -> Optional[dict]:
-        """Get JSON value from cache"""
-        import json
-        value = await self.get(key)
-        return json.loads(value) if value else None
+        """Get structured value from cache"""
+        if self.use_local:
+            found, raw = local_cache.get(key)
+            if found:
+                return self.serializer.loads(raw)
+        
+        raw = await self.get(key)
+        value = self.serializer.loads(raw) if raw else None
+        
+        if self.use_local and value:
+            local_cache.set(key, raw, self._local_ttl())
+        
+        return value
+    
+    async def get_many_json(self, keys: List[str]) -> List[Optional[dict]]:
+        """
+        Get several structured values with a single MGET
+        
+        Returns:
+            Values in the order of keys (None for misses)
+        """
+        values: List[Optional[dict]] = [None] * len(keys)
+        remote = []
+        
+        for position, key in enumerate(keys):
+            if self.use_local:
+                found, raw = local_cache.get(key)
+                if found:
+                    values[position] = self.serializer.loads(raw)
+                    continue
+            remote.append(position)
+        
+        if remote:
+            client = await self._client()
+            raw_values = await client.mget([keys[position] for position in remote])
+            
+            for position, raw in zip(remote, raw_values):
+                if raw:
+                    values[position] = self.serializer.loads(raw)
+                    if self.use_local:
+                        local_cache.set(keys[position], raw, self._local_ttl())
+        
+        return values
+    
+    async def set_many_json(self, items: Dict[str, dict], ttl: int = None) -> bool:
+        """Set several structured values in one pipelined round trip"""
+        if not items:
+            return True
+        
+        client = await self._client()
+        expire_time = ttl or self.ttl
+        encoded = {key: self.serializer.dumps(value) for key, value in items.items()}
+        
+        async with client.pipeline(transaction=False) as pipe:
+            for key, raw in encoded.items():
+                pipe.setex(key, expire_time, raw)
+            if settings.LOCAL_CACHE_PUBSUB:
+                pipe.publish(settings.LOCAL_CACHE_INVALIDATION_CHANNEL, _invalidation_message(list(encoded)))
+            await pipe.execute()
+        
+        for key, raw in encoded.items():
+            if self.use_local:
+                local_cache.set(key, raw, self._local_ttl(ttl))
+            else:
+                local_cache.delete(key)
+        
+        return True
+    
+    async def _client(self) -> redis.Redis:
+        return await get_binary_redis() if self.serializer.binary else await get_redis()
+    
+    def _local_ttl(self, ttl: int = None) -> float:
+        return min(ttl or self.ttl, settings.LOCAL_CACHE_TTL)
@@ -0,0 +1,45 @@
+import json
+from typing import Any
+
+try:
+    import msgpack
+except ImportError:  # Optional dependency
+    msgpack = None
+
+
+class JsonSerializer:
+    """JSON text values (readable in redis-cli)"""
+    
+    name = "json"
+    binary = False
+    
+    def dumps(self, value: Any) -> str:
+        return json.dumps(value)
+    
+    def loads(self, raw: str) -> Any:
+        return json.loads(raw)
+
+
+class MsgpackSerializer:
+    """MessagePack binary values (smaller and faster to decode than JSON)"""
+    
+    name = "msgpack"
+    binary = True
+    
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+    
+    def loads(self, raw: bytes) -> Any:
+        return msgpack.unpackb(raw, raw=False)
+
+
+def get_serializer(name: str = "json"):
+    """
+    Get a cache serializer by name
+    
+    Falls back to JSON when msgpack is requested but not installed.
+    """
+    if name == "msgpack" and msgpack is not None:
+        return MsgpackSerializer()
+    
+    return JsonSerializer()
@@ -27,21 +27,63 @@ class Settings(BaseSettings):
     REDIS_DB: int = 0
     REDIS_PASSWORD: Optional[str] = None
     REDIS_CACHE_TTL: int = 3600
+    LOCAL_CACHE_MAX_ENTRIES: int = 10000
+    LOCAL_CACHE_TTL: int = 60
+    LOCAL_CACHE_PUBSUB: bool = True
+    LOCAL_CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+    CACHE_SERIALIZER: str = "msgpack"
     
     # Naver Maps API
     NAVER_MAP_CLIENT_ID: str
     NAVER_MAP_CLIENT_SECRET: str
     NAVER_MAP_GEOCODE_URL: str = "https://naveropenapi.apigw.ntruss.com/map-geocode/v2/geocode"
     NAVER_MAP_DIRECTIONS_URL: str = "https://naveropenapi.apigw.ntruss.com/map-direction/v1/driving"
+    NAVER_DIRECTIONS_RATE_PER_SECOND: float = 10.0
+    NAVER_DIRECTIONS_MAX_CONCURRENCY: int = 8
+    NAVER_DIRECTIONS_TIMEOUT_SECONDS: float = 15.0
+    NAVER_GEOCODE_RATE_PER_SECOND: float = 10.0
+    NAVER_GEOCODE_MAX_CONCURRENCY: int = 8
+    NAVER_GEOCODE_TIMEOUT_SECONDS: float = 10.0
     
     # Samsung UVIS API
     UVIS_API_URL: str = "https://api.s1.co.kr/uvis/v1"
     UVIS_API_KEY: str = "your_uvis_api_key_here"
     UVIS_POLL_INTERVAL: int = 30
+    UVIS_TIMEOUT_SECONDS: float = 10.0
+    UVIS_POLLER_ENABLED: bool = False
+    UVIS_POLL_INTERVAL_MOVING: int = 10
+    UVIS_POLL_INTERVAL_PARKED: int = 120
+    UVIS_POLL_JITTER: float = 0.2
+    UVIS_DEVICE_REFRESH_SECONDS: int = 300
+    UVIS_QUEUE_MAX_SIZE: int = 10000
+    GPS_INGEST_ENABLED: bool = False
+    GPS_INGEST_BATCH_SIZE: int = 1000
+    GPS_INGEST_FLUSH_SECONDS: float = 1.0
+    GPS_INGEST_RETRY_MAX_ROWS: int = 10000
+    GPS_INGEST_USE_COPY: bool = True
+    
+    # Shared HTTP client
+    HTTP_ENABLE_HTTP2: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
     
     # OR-Tools
     ORTOOLS_TIME_LIMIT_SECONDS: int = 300
     ORTOOLS_SOLUTION_LIMIT: int = 100
+    ORTOOLS_USE_TRANSIT_MATRICES: bool = True
+    ORTOOLS_REDISPATCH_TIME_LIMIT_SECONDS: int = 10
+    ORTOOLS_PARALLEL_WORKERS: int = 0
+    ORTOOLS_MAX_ORDERS_PER_CLUSTER: int = 120
+    ROUTE_MEMORY_DAYS: int = 7
+    SOLVE_CACHE_TTL: int = 3600
+    MATRIX_STORE_DIR: str = "./data/matrix_store"
+    ADDRESS_INDEX_PATH: str = "./data/address_index.sqlite3"
+    ADDRESS_MATCH_MIN_CONFIDENCE: float = 0.85
+    REVERSE_GEOCODE_GEOHASH_PRECISION: int = 7
+    TRAVEL_TIME_MODEL_PATH: str = "./data/travel_time_model.npz"
+    ROUTING_BACKEND: str = "naver"
+    ROAD_NETWORK_PATH: str = "./data/road_network.npz"
     
     # Business Rules
     DEFAULT_WORK_HOURS_START: str = "06:00"
@@ -3,10 +3,19 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import uvicorn
+import asyncio
 import logging
 
-from config import get_settings, init_db, close_db, close_redis
+from config import (
+    get_settings, init_db, close_db, close_redis, init_http_client, close_http_client,
+    local_cache, listen_for_invalidations,
+)
 from config.settings import Settings
+from config.database import AsyncSessionLocal
+from services.address_index import get_address_index
+from services.uvis_poller import get_uvis_poller
+from services.gps_ingestion import get_gps_ingestion
+from services.road_network import get_road_network
 
 # Configure logging
 logging.basicConfig(
@@ -37,6 +46,42 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Failed to initialize database: {e}")
     
+    try:
+        # Seed the address index with already geocoded clients
+        async with AsyncSessionLocal() as db:
+            added = await get_address_index().load_clients(db)
+        logger.info(f"✅ Address index ready ({added} client addresses added)")
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to seed address index: {e}")
+    
+    # Load (or convert) the road graph before the first matrix request needs it
+    if settings.ROUTING_BACKEND == "road_network":
+        try:
+            network = await asyncio.to_thread(get_road_network)
+            if network is not None:
+                logger.info(f"✅ Road network loaded ({network.n_nodes} nodes)")
+            else:
+                logger.warning(f"⚠️ Road network not found at {settings.ROAD_NETWORK_PATH}, using Naver Directions")
+        except Exception as e:
+            logger.error(f"❌ Failed to load road network: {e}")
+    
+    # Shared HTTP client (keep-alive pool for Naver and UVIS APIs)
+    await init_http_client()
+    logger.info("✅ HTTP client pool ready")
+    
+    # Keep the in-process cache tier coherent across workers
+    invalidation_task = None
+    if settings.LOCAL_CACHE_PUBSUB:
+        invalidation_task = asyncio.create_task(listen_for_invalidations())
+    
+    # Stream vehicle positions from UVIS into gps_logs
+    if settings.UVIS_POLLER_ENABLED:
+        await get_uvis_poller().start()
+        logger.info("✅ UVIS poller started")
+        if settings.GPS_INGEST_ENABLED:
+            await get_gps_ingestion(get_uvis_poller().queue).start()
+            logger.info("✅ GPS ingestion started")
+    
     logger.info(f"✅ AI Dispatch System started on http://{settings.HOST}:{settings.PORT}")
     logger.info(f"📖 API Documentation available at http://{settings.HOST}:{settings.PORT}/docs")
     
@@ -45,6 +90,19 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🛑 Shutting down AI Dispatch System...")
     
+    if invalidation_task:
+        invalidation_task.cancel()
+        try:
+            await invalidation_task
+        except asyncio.CancelledError:
+            pass
+    
+    # Stop producing first so ingestion can drain the queue
+    if settings.UVIS_POLLER_ENABLED:
+        await get_uvis_poller().stop()
+        if settings.GPS_INGEST_ENABLED:
+            await get_gps_ingestion(get_uvis_poller().queue).stop()
+    
     try:
         await close_db()
         logger.info("✅ Database connections closed")
@@ -57,6 +115,12 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Error closing Redis: {e}")
     
+    try:
+        await close_http_client()
+        logger.info("✅ HTTP client closed")
+    except Exception as e:
+        logger.error(f"❌ Error closing HTTP client: {e}")
+    
     logger.info("👋 AI Dispatch System shutdown complete")
 
 
@@ -122,6 +186,9 @@ async def health_check():
         "app": settings.APP_NAME,
         "version": settings.APP_VERSION,
         "environment": settings.ENVIRONMENT,
+        "local_cache": local_cache.stats(),
+        "uvis_poller": get_uvis_poller().stats(),
+        "gps_ingestion": get_gps_ingestion(get_uvis_poller().queue).stats(),
     }
 
 
@@ -0,0 +1,218 @@
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.settings import get_settings
+from models.client import Client
+from utils.address_normalizer import normalize_address, address_parts, decompose_hangul, name_similarity
+
+settings = get_settings()
+
+
+class AddressIndex:
+    """
+    Persistent normalized-address -> coordinate index (SQLite)
+    
+    Keeps every successful geocode, so addresses seen once never hit the
+    API again, unlike the 24h Redis cache. Near-duplicate spellings are
+    resolved by jamo edit-distance similarity of the road/dong name among
+    entries in the same 시/도 and 시/군/구 with the same building/lot numbers,
+    with a confidence score.
+    """
+    
+    def __init__(self, path: str = None):
+        self.path = Path(path or settings.ADDRESS_INDEX_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS addresses (
+                normalized TEXT PRIMARY KEY,
+                address TEXT NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                formatted_address TEXT,
+                address_type TEXT,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        
+        # Fuzzy index: address_parts key -> {normalized: decomposed name}, built on first use
+        self._buckets: Optional[Dict[Tuple[str, ...], Dict[str, str]]] = None
+    
+    def get_many(self, normalized: List[str]) -> Dict[str, Dict]:
+        """
+        Look up normalized addresses
+        
+        Returns:
+            Geocode results keyed by normalized address (hits only)
+        """
+        found = {}
+        keys = list(dict.fromkeys(normalized))
+        
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT normalized, latitude, longitude, formatted_address, address_type "
+                    f"FROM addresses WHERE normalized IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, latitude, longitude, formatted_address, address_type in rows:
+                    found[key] = {
+                        "status": "success",
+                        "latitude": latitude,
+                        "longitude": longitude,
+                        "formatted_address": formatted_address,
+                        "address_type": address_type,
+                    }
+        
+        return found
+    
+    def put_many(self, entries: Dict[str, Dict]):
+        """
+        Store successful geocode results
+        
+        Args:
+            entries: Geocode results keyed by normalized address; each needs
+                address, latitude and longitude
+        """
+        now = datetime.now().isoformat()
+        rows = [
+            (key, result["address"], result["latitude"], result["longitude"],
+             result.get("formatted_address"), result.get("address_type"), now)
+            for key, result in entries.items()
+        ]
+        if not rows:
+            return
+        
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO addresses "
+                "(normalized, address, latitude, longitude, formatted_address, address_type, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            
+            if self._buckets is not None:
+                for key in entries:
+                    self._add_to_buckets(key)
+    
+    def match_many(self, normalized: List[str], min_confidence: float = None) -> Dict[str, Dict]:
+        """
+        Resolve normalized addresses exactly or by fuzzy match
+        
+        A fuzzy candidate must have the same 시/도, 시/군/구 and building/lot
+        numbers; its confidence is the name_similarity of the two decomposed
+        road or dong names.
+        
+        Args:
+            normalized: Normalized addresses
+            min_confidence: Similarity a match must exceed
+                (default: settings.ADDRESS_MATCH_MIN_CONFIDENCE)
+        
+        Returns:
+            Geocode results keyed by normalized address (hits only), each
+            with confidence and matched_address
+        """
+        if min_confidence is None:
+            min_confidence = settings.ADDRESS_MATCH_MIN_CONFIDENCE
+        
+        exact = self.get_many(normalized)
+        found = {key: {**result, "confidence": 1.0, "matched_address": key} for key, result in exact.items()}
+        
+        best: Dict[str, Tuple[str, float]] = {}
+        with self._lock:
+            if self._buckets is None:
+                self._load_buckets()
+            for key in dict.fromkeys(normalized):
+                if key in found:
+                    continue
+                parts = address_parts(key)
+                if parts is None:
+                    continue
+                bucket_key, name = parts
+                jamo = decompose_hangul(name)
+                candidates = self._buckets.get(bucket_key, {})
+                scored = [(name_similarity(jamo, other), match) for match, other in candidates.items()]
+                if scored:
+                    confidence, match = max(scored)
+                    if confidence > min_confidence:
+                        best[key] = (match, confidence)
+        
+        matched = self.get_many([match for match, _ in best.values()])
+        for key, (match, confidence) in best.items():
+            if match in matched:
+                found[key] = {**matched[match], "confidence": round(confidence, 3), "matched_address": match}
+        
+        return found
+    
+    async def load_clients(self, db: AsyncSession) -> int:
+        """
+        Seed the index with geocoded client addresses
+        
+        Args:
+            db: Database session
+        
+        Returns:
+            Number of client addresses added
+        """
+        result = await db.execute(
+            select(Client.address, Client.latitude, Client.longitude)
+            .where(Client.latitude.isnot(None), Client.longitude.isnot(None))
+        )
+        entries = {
+            normalize_address(row.address): {
+                "address": row.address,
+                "latitude": row.latitude,
+                "longitude": row.longitude,
+            }
+            for row in result.all()
+        }
+        
+        known = self.get_many(list(entries))
+        new_entries = {key: entry for key, entry in entries.items() if key not in known}
+        self.put_many(new_entries)
+        
+        return len(new_entries)
+    
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM addresses").fetchone()[0]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    
+    def _load_buckets(self):
+        self._buckets = {}
+        for (key,) in self._conn.execute("SELECT normalized FROM addresses"):
+            self._add_to_buckets(key)
+    
+    def _add_to_buckets(self, key: str):
+        parts = address_parts(key)
+        if parts is not None:
+            bucket_key, name = parts
+            self._buckets.setdefault(bucket_key, {})[key] = decompose_hangul(name)
+
+
+_address_index: Optional[AddressIndex] = None
+
+
+def get_address_index() -> AddressIndex:
+    """Get the shared address index instance"""
+    global _address_index
+    
+    if _address_index is None:
+        _address_index = AddressIndex()
+    
+    return _address_index
@@ -1,85 +1,138 @@
 import httpx
 import asyncio
-from typing import Optional, Dict, Tuple
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Tuple, List
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from config.settings import get_settings
 from config.redis import RedisCache
+from config.http import get_http_client
+from models.gps_log import GPSLog
+from services.address_index import get_address_index
+from utils import geohash
+from utils.address_normalizer import normalize_address
+from utils.rate_limiter import AdaptiveRateLimiter
+from utils.single_flight import SingleFlight
 
 settings = get_settings()
 cache = RedisCache(ttl=86400)  # 24 hours cache
+geocode_flight = SingleFlight()
+logger = logging.getLogger(__name__)
+
+# Shared by every Geocoding request in the process
+geocode_limiter = AdaptiveRateLimiter(
+    rate_per_second=settings.NAVER_GEOCODE_RATE_PER_SECOND,
+    max_concurrency=settings.NAVER_GEOCODE_MAX_CONCURRENCY,
+)
 
 
 class GeocodingService:
     """Naver Maps Geocoding Service"""
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         self.client_id = settings.NAVER_MAP_CLIENT_ID
         self.client_secret = settings.NAVER_MAP_CLIENT_SECRET
         self.geocode_url = settings.NAVER_MAP_GEOCODE_URL
-        
-    async def geocode_address(self, address: str) -> Optional[Dict]:
+        self.timeout = settings.NAVER_GEOCODE_TIMEOUT_SECONDS
+        # Defaults to the application-wide pooled client
+        self.http_client = http_client
+    
+    async def geocode_address(self, address: str, use_cache: bool = True) -> Optional[Dict]:
         """
         Convert address to coordinates using Naver Maps Geocoding API
         
         Args:
             address: Address string to geocode
-            
+            use_cache: Check the geocode cache and address index first and
+                cache the result (bulk callers handle it themselves)
+        
         Returns:
             Dict with status, latitude, longitude, formatted_address
         """
-        # Check cache first
-        cache_key = f"geocode:{address}"
-        cached = await cache.get_json(cache_key)
-        if cached:
-            return cached
+        normalized = normalize_address(address)
+        cache_key = f"geocode:{normalized}"
+        
+        # Concurrent callers for the same address share one lookup/request
+        return await geocode_flight.do(
+            cache_key, lambda: self._geocode_address(cache_key, normalized, address, use_cache)
+        )
+    
+    async def _geocode_address(self, cache_key: str, normalized: str, address: str, use_cache: bool) -> Optional[Dict]:
+        if use_cache:
+            # Check cache first
+            cached = await cache.get_json(cache_key)
+            if cached:
+                return cached
+            
+            # Then the persistent address index (outlives the cache TTL), which
+            # also resolves near-duplicate spellings
+            indexed = get_address_index().match_many([normalized]).get(normalized)
+            if indexed:
+                await cache.set_json(cache_key, indexed)
+                return indexed
         
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "X-NCP-APIGW-API-KEY-ID": self.client_id,
-                    "X-NCP-APIGW-API-KEY": self.client_secret,
-                }
-                params = {"query": address}
-                
-                response = await client.get(
-                    self.geocode_url,
-                    headers=headers,
-                    params=params,
-                    timeout=10.0
-                )
+            client = self.http_client or get_http_client()
+            headers = {
+                "X-NCP-APIGW-API-KEY-ID": self.client_id,
+                "X-NCP-APIGW-API-KEY": self.client_secret,
+            }
+            params = {"query": address}
+            
+            async with geocode_limiter:
+                try:
+                    response = await client.get(
+                        self.geocode_url,
+                        headers=headers,
+                        params=params,
+                        timeout=self.timeout
+                    )
+                except httpx.TransportError:
+                    geocode_limiter.record(None)
+                    raise
+                geocode_limiter.record(response.status_code)
+            
+            if response.status_code == 200:
+                data = response.json()
                 
-                if response.status_code == 200:
-                    data = response.json()
+                if data.get("status") == "OK" and data.get("addresses"):
+                    address_data = data["addresses"][0]
+                    
+                    result = {
+                        "status": "success",
+                        "latitude": float(address_data["y"]),
+                        "longitude": float(address_data["x"]),
+                        "formatted_address": address_data.get("roadAddress") or address_data.get("jibunAddress"),
+                        "address_type": address_data.get("addressType"),
+                    }
                     
-                    if data.get("status") == "OK" and data.get("addresses"):
-                        address_data = data["addresses"][0]
-                        
-                        result = {
-                            "status": "success",
-                            "latitude": float(address_data["y"]),
-                            "longitude": float(address_data["x"]),
-                            "formatted_address": address_data.get("roadAddress") or address_data.get("jibunAddress"),
-                            "address_type": address_data.get("addressType"),
-                        }
-                        
-                        # Cache the result
+                    # Cache the result
+                    if use_cache:
                         await cache.set_json(cache_key, result)
-                        
-                        return result
-                    else:
-                        return {
-                            "status": "not_found",
-                            "error": "No addresses found for the given query",
-                            "latitude": None,
-                            "longitude": None,
-                        }
+                    # Index the road and jibun forms too, so either spelling hits next time
+                    aliases = [address, address_data.get("roadAddress"), address_data.get("jibunAddress")]
+                    get_address_index().put_many({
+                        normalize_address(alias): {**result, "address": alias} for alias in aliases if alias
+                    })
+                    
+                    return result
                 else:
                     return {
-                        "status": "error",
-                        "error": f"API returned status code {response.status_code}",
+                        "status": "not_found",
+                        "error": "No addresses found for the given query",
                         "latitude": None,
                         "longitude": None,
                     }
-                    
+            else:
+                return {
+                    "status": "error",
+                    "error": f"API returned status code {response.status_code}",
+                    "status_code": response.status_code,
+                    "latitude": None,
+                    "longitude": None,
+                }
+        
         except httpx.TimeoutException:
             return {
                 "status": "error",
@@ -95,103 +148,247 @@ class GeocodingService:
                 "longitude": None,
             }
     
-    async def reverse_geocode(self, latitude: float, longitude: float) -> Optional[Dict]:
+    async def reverse_geocode(self, latitude: float, longitude: float, precision: int = None) -> Optional[Dict]:
         """
         Convert coordinates to address using Naver Maps Reverse Geocoding
         
+        Results are cached per geohash cell, so every point in the cell
+        shares one lookup (made at the cell center).
+        
         Args:
             latitude: Latitude coordinate
             longitude: Longitude coordinate
-            
+            precision: Geohash precision (default: settings.REVERSE_GEOCODE_GEOHASH_PRECISION)
+        
+        Returns:
+            Dict with status, address information, geohash
+        """
+        cell = geohash.encode(latitude, longitude, precision or settings.REVERSE_GEOCODE_GEOHASH_PRECISION)
+        return await self._reverse_geocode_cell(cell)
+    
+    async def batch_reverse_geocode(
+        self,
+        points: List[Tuple[float, float]],
+        precision: int = None
+    ) -> List[Dict]:
+        """
+        Reverse geocode many points (e.g. a batch of GPS fixes)
+        
+        Points are grouped by geohash cell; cached cells are read with one
+        MGET and only the remaining cells go to the API, concurrently.
+        
+        Args:
+            points: List of coordinates [(lat, lon), ...]
+            precision: Geohash precision (default: settings.REVERSE_GEOCODE_GEOHASH_PRECISION)
+        
         Returns:
-            Dict with status, address information
+            List of reverse geocoding results (same order as points)
         """
-        # Check cache first
-        cache_key = f"reverse_geocode:{latitude}:{longitude}"
-        cached = await cache.get_json(cache_key)
-        if cached:
-            return cached
+        precision = precision or settings.REVERSE_GEOCODE_GEOHASH_PRECISION
+        cells = [geohash.encode(latitude, longitude, precision) for latitude, longitude in points]
+        unique_cells = list(dict.fromkeys(cells))
+        
+        cached = await cache.get_many_json([f"reverse_geocode:{cell}" for cell in unique_cells])
+        known = {cell: value for cell, value in zip(unique_cells, cached) if value}
+        
+        missing = [cell for cell in unique_cells if cell not in known]
+        fetched = await asyncio.gather(*[self._reverse_geocode_cell(cell, use_cache=False) for cell in missing])
+        known.update(zip(missing, fetched))
+        
+        # Write new results back in one round trip
+        await cache.set_many_json({
+            f"reverse_geocode:{cell}": result
+            for cell, result in zip(missing, fetched) if result.get("status") == "success"
+        })
+        
+        return [known[cell] for cell in cells]
+    
+    async def fill_gps_addresses(
+        self,
+        db: AsyncSession,
+        since: datetime,
+        until: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Fill in GPSLog.address for logs without one
+        
+        The address is the administrative area (시/도 ... 동/리) of the
+        log's geohash cell.
+        
+        Args:
+            db: Database session
+            since: Start of the time window (naive UTC, like GPSLog.timestamp)
+            until: End of the time window (default: now)
+        
+        Returns:
+            Dict with counts of logs, cells and updated rows
+        """
+        conditions = [GPSLog.address.is_(None), GPSLog.timestamp >= since]
+        if until is not None:
+            conditions.append(GPSLog.timestamp < until)
+        
+        result = await db.execute(select(GPSLog.id, GPSLog.latitude, GPSLog.longitude).where(*conditions))
+        rows = result.all()
+        if not rows:
+            return {"status": "success", "n_logs": 0, "n_cells": 0, "n_updated": 0}
+        
+        points = [(row.latitude, row.longitude) for row in rows]
+        results = await self.batch_reverse_geocode(points)
+        
+        updates = []
+        for row, reverse in zip(rows, results):
+            if reverse.get("status") != "success":
+                continue
+            areas = [reverse.get(f"area{level}") for level in range(1, 5)]
+            address = " ".join(area for area in areas if area)
+            if address:
+                updates.append({"id": row.id, "address": address})
+        
+        if updates:
+            await db.execute(update(GPSLog), updates)
+            await db.commit()
+        
+        return {
+            "status": "success",
+            "n_logs": len(rows),
+            "n_cells": len({geohash.encode(latitude, longitude, settings.REVERSE_GEOCODE_GEOHASH_PRECISION)
+                            for latitude, longitude in points}),
+            "n_updated": len(updates),
+        }
+    
+    async def _reverse_geocode_cell(self, cell: str, use_cache: bool = True) -> Dict:
+        cache_key = f"reverse_geocode:{cell}"
+        
+        # Concurrent callers for the same cell share one lookup/request
+        return await geocode_flight.do(cache_key, lambda: self._reverse_geocode(cache_key, cell, use_cache))
+    
+    async def _reverse_geocode(self, cache_key: str, cell: str, use_cache: bool) -> Dict:
+        if use_cache:
+            # Check cache first
+            cached = await cache.get_json(cache_key)
+            if cached:
+                return cached
+        
+        latitude, longitude = geohash.decode(cell)
         
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "X-NCP-APIGW-API-KEY-ID": self.client_id,
-                    "X-NCP-APIGW-API-KEY": self.client_secret,
-                }
-                params = {
-                    "coords": f"{longitude},{latitude}",  # Note: lon,lat order
-                    "output": "json",
-                    "orders": "roadaddr,addr"
-                }
-                
-                # Use reverse geocoding endpoint
-                url = "https://naveropenapi.apigw.ntruss.com/map-reversegeocode/v2/gc"
-                
-                response = await client.get(
-                    url,
-                    headers=headers,
-                    params=params,
-                    timeout=10.0
-                )
+            client = self.http_client or get_http_client()
+            headers = {
+                "X-NCP-APIGW-API-KEY-ID": self.client_id,
+                "X-NCP-APIGW-API-KEY": self.client_secret,
+            }
+            params = {
+                "coords": f"{longitude},{latitude}",  # Note: lon,lat order
+                "output": "json",
+                "orders": "roadaddr,addr"
+            }
+            
+            # Use reverse geocoding endpoint
+            url = "https://naveropenapi.apigw.ntruss.com/map-reversegeocode/v2/gc"
+            
+            # Same Naver Maps API key and quota as forward geocoding
+            async with geocode_limiter:
+                try:
+                    response = await client.get(
+                        url,
+                        headers=headers,
+                        params=params,
+                        timeout=self.timeout
+                    )
+                except httpx.TransportError:
+                    geocode_limiter.record(None)
+                    raise
+                geocode_limiter.record(response.status_code)
+            
+            if response.status_code == 200:
+                data = response.json()
                 
-                if response.status_code == 200:
-                    data = response.json()
+                if data.get("status", {}).get("code") == 0 and data.get("results"):
+                    result_data = data["results"][0]
+                    region = result_data.get("region", {})
+                    land = result_data.get("land", {})
                     
-                    if data.get("status", {}).get("code") == 0 and data.get("results"):
-                        result_data = data["results"][0]
-                        region = result_data.get("region", {})
-                        land = result_data.get("land", {})
-                        
-                        result = {
-                            "status": "success",
-                            "address": result_data.get("name", ""),
-                            "road_address": land.get("name", ""),
-                            "area1": region.get("area1", {}).get("name", ""),
-                            "area2": region.get("area2", {}).get("name", ""),
-                            "area3": region.get("area3", {}).get("name", ""),
-                            "area4": region.get("area4", {}).get("name", ""),
-                        }
-                        
-                        # Cache the result
+                    result = {
+                        "status": "success",
+                        "address": result_data.get("name", ""),
+                        "road_address": land.get("name", ""),
+                        "area1": region.get("area1", {}).get("name", ""),
+                        "area2": region.get("area2", {}).get("name", ""),
+                        "area3": region.get("area3", {}).get("name", ""),
+                        "area4": region.get("area4", {}).get("name", ""),
+                        "geohash": cell,
+                    }
+                    
+                    # Cache the result
+                    if use_cache:
                         await cache.set_json(cache_key, result)
-                        
-                        return result
-                    else:
-                        return {
-                            "status": "not_found",
-                            "error": "No address found for the given coordinates",
-                        }
+                    
+                    return result
                 else:
                     return {
-                        "status": "error",
-                        "error": f"API returned status code {response.status_code}",
+                        "status": "not_found",
+                        "error": "No address found for the given coordinates",
                     }
-                    
+            else:
+                return {
+                    "status": "error",
+                    "error": f"API returned status code {response.status_code}",
+                    "status_code": response.status_code,
+                }
+        
         except Exception as e:
             return {
                 "status": "error",
                 "error": str(e),
             }
     
-    async def batch_geocode(self, addresses: list[str], delay: float = 0.1) -> list[Dict]:
+    async def batch_geocode(self, addresses: list[str], delay: float = None) -> list[Dict]:
         """
-        Batch geocode multiple addresses with rate limiting
+        Batch geocode multiple addresses concurrently
+        
+        Addresses are normalized and deduplicated, then looked up in the
+        geocode cache (one MGET) and the persistent address index (exact or
+        high-confidence fuzzy match). Only the rest go to the API, bounded
+        and paced by the shared geocode rate limiter.
         
         Args:
             addresses: List of addresses to geocode
-            delay: Delay between requests in seconds
-            
+            delay: Ignored; kept for existing callers (pacing is done by the
+                shared rate limiter)
+        
         Returns:
-            List of geocoding results
+            List of geocoding results (same order as addresses)
         """
-        results = []
+        normalized = [normalize_address(address) for address in addresses]
+        unique_keys = list(dict.fromkeys(normalized))
         
-        for address in addresses:
-            result = await self.geocode_address(address)
-            results.append({"address": address, **result})
-            
-            # Rate limiting
-            if delay > 0:
-                await asyncio.sleep(delay)
+        try:
+            cached = await cache.get_many_json([f"geocode:{key}" for key in unique_keys])
+        except Exception:
+            cached = [None] * len(unique_keys)
+        known = {key: result for key, result in zip(unique_keys, cached) if result}
+        
+        indexed = get_address_index().match_many([key for key in unique_keys if key not in known])
+        known.update(indexed)
+        
+        # One lookup per distinct unresolved address
+        pending: Dict[str, str] = {}
+        for address, key in zip(addresses, normalized):
+            if key not in known:
+                pending.setdefault(key, address)
+        
+        fetched = await asyncio.gather(*[
+            self.geocode_address(address, use_cache=False) for address in pending.values()
+        ])
+        known.update(zip(pending, fetched))
+        
+        # Write index hits and new results back in one round trip
+        new_results = {**indexed, **{
+            key: result for key, result in zip(pending, fetched) if result.get("status") == "success"
+        }}
+        try:
+            await cache.set_many_json({f"geocode:{key}": result for key, result in new_results.items()})
+        except Exception as e:
+            logger.warning(f"Could not cache {len(new_results)} geocoding results: {e}")
         
-        return results
+        return [{"address": address, **known[key]} for address, key in zip(addresses, normalized)]
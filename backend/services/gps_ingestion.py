@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Any
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from config.settings import get_settings
+from config.database import engine as default_engine
+from models.gps_log import GPSLog
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Fix fields stored in the gps_logs column of the same name
+FIX_COLUMNS = [
+    "latitude", "longitude", "altitude", "speed_kmh", "heading",
+    "compartment1_temp", "compartment2_temp", "engine_on", "door_open",
+    "refrigerator_on", "odometer_km",
+]
+
+TRUE_STRINGS = {"true", "t", "yes", "y", "on", "1"}
+FALSE_STRINGS = {"false", "f", "no", "n", "off", "0"}
+
+
+class GPSIngestion:
+    """
+    Batched writer from a fix queue into gps_logs
+    
+    Fixes are collected until GPS_INGEST_BATCH_SIZE rows are buffered or
+    GPS_INGEST_FLUSH_SECONDS have passed, then written in one statement:
+    PostgreSQL COPY on asyncpg, a multi-row INSERT otherwise. The queue is
+    the bounded buffer; submit() waits while it is full. Rows of a failed
+    write are retried with the next batch, keeping at most
+    GPS_INGEST_RETRY_MAX_ROWS (the oldest are dropped first).
+    """
+    
+    def __init__(
+        self,
+        queue: Optional[asyncio.Queue] = None,
+        engine: Optional[AsyncEngine] = None,
+        batch_size: int = None,
+        flush_interval: float = None,
+        use_copy: bool = None,
+        max_retry_rows: int = None
+    ):
+        self.queue = queue or asyncio.Queue(maxsize=settings.UVIS_QUEUE_MAX_SIZE)
+        self.engine = engine or default_engine
+        self.batch_size = batch_size or settings.GPS_INGEST_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.GPS_INGEST_FLUSH_SECONDS
+        self.max_retry_rows = settings.GPS_INGEST_RETRY_MAX_ROWS if max_retry_rows is None else max_retry_rows
+        if use_copy is None:
+            use_copy = settings.GPS_INGEST_USE_COPY
+        self.use_copy = use_copy and self.engine.dialect.driver == "asyncpg"
+        
+        table = GPSLog.__table__
+        self.columns = ["vehicle_id", "uvis_device_id", "timestamp", *FIX_COLUMNS]
+        # Python-side defaults (temp_alarm, is_stopped, ...) are not applied by COPY
+        self.defaults = {
+            column.name: column.default.arg
+            for column in table.columns
+            if column.default is not None and column.default.is_scalar and column.name not in self.columns
+        }
+        self.columns += list(self.defaults)
+        # COPY needs exact Python types (UVIS may send numbers and flags as strings)
+        self.casts = [
+            self._boolean if table.columns[name].type.python_type is bool else table.columns[name].type.python_type
+            for name in FIX_COLUMNS
+        ]
+        
+        self._retry: List[tuple] = []  # Rows of failed writes, oldest first
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.inserted = 0
+        self.batches = 0
+        self.failed = 0
+        self.skipped = 0
+        self.last_flush_ms = 0.0
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    async def start(self):
+        """Start the batching loop"""
+        if not self.is_running:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Write out whatever is still queued, then stop the batching loop"""
+        if self._task:
+            self._stopping = True
+            await self._task
+            self._task = None
+    
+    async def submit(self, fix: Dict):
+        """
+        Queue a fix for ingestion, waiting while the buffer is full
+        
+        Args:
+            fix: Normalized fix (parse_gps_data / poller output) with vehicle_id
+        """
+        await self.queue.put(fix)
+    
+    async def flush(self, fixes: List[Dict]) -> int:
+        """
+        Write a batch of fixes to gps_logs, after any rows awaiting a retry
+        
+        Returns:
+            Number of rows written
+        """
+        new_rows = [row for row in map(self._to_row, fixes) if row is not None]
+        self.skipped += len(fixes) - len(new_rows)
+        rows = self._retry + new_rows
+        self._retry = []
+        if not rows:
+            return 0
+        
+        started = time.perf_counter()
+        try:
+            async with self.engine.begin() as conn:
+                if self.use_copy:
+                    raw = await conn.get_raw_connection()
+                    await raw.driver_connection.copy_records_to_table(
+                        GPSLog.__tablename__, records=rows, columns=self.columns
+                    )
+                else:
+                    await conn.execute(
+                        insert(GPSLog.__table__), [dict(zip(self.columns, row)) for row in rows]
+                    )
+        except Exception as e:
+            # Keep the newest rows for the next flush
+            self._retry = rows[-self.max_retry_rows:] if self.max_retry_rows > 0 else []
+            self.failed += len(rows) - len(self._retry)
+            logger.error(
+                f"GPS ingestion failed to write {len(rows)} rows, {len(self._retry)} kept for retry: {e}"
+            )
+            return 0
+        
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        self.inserted += len(rows)
+        self.batches += 1
+        return len(rows)
+    
+    def stats(self) -> Dict:
+        return {
+            "running": self.is_running,
+            "buffered": self.queue.qsize(),
+            "inserted": self.inserted,
+            "batches": self.batches,
+            "failed": self.failed,
+            "retrying": len(self._retry),
+            "skipped": self.skipped,
+            "last_flush_ms": round(self.last_flush_ms, 1),
+            "method": "copy" if self.use_copy else "insert",
+        }
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = []
+            deadline = loop.time() + self.flush_interval
+            
+            while len(batch) < self.batch_size:
+                # Take what is already queued without waiting
+                try:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                
+                timeout = deadline - loop.time()
+                if timeout <= 0 or self._stopping:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            await self.flush(batch)
+            
+            if self._stopping and self.queue.empty():
+                return
+    
+    def _to_row(self, fix: Dict) -> Optional[tuple]:
+        """Row tuple in self.columns order (None if the fix is unusable)"""
+        if fix.get("latitude") is None or fix.get("longitude") is None or not fix.get("vehicle_id"):
+            return None
+        
+        try:
+            values = [None if value is None else cast(value) for cast, value in zip(self.casts, map(fix.get, FIX_COLUMNS))]
+        except (TypeError, ValueError):
+            return None
+        
+        return (
+            fix["vehicle_id"],
+            fix.get("device_id") or fix.get("uvis_device_id"),
+            self._timestamp(fix.get("timestamp") or fix.get("received_at")),
+            *values,
+            *self.defaults.values(),
+        )
+    
+    @staticmethod
+    def _boolean(value: Any) -> Optional[bool]:
+        """bool() would turn "false" into True"""
+        if not isinstance(value, str):
+            return bool(value)
+        text = value.strip().lower()
+        if text in TRUE_STRINGS:
+            return True
+        if text in FALSE_STRINGS:
+            return False
+        if not text:
+            return None
+        raise ValueError(f"Not a boolean: {value!r}")
+    
+    @staticmethod
+    def _timestamp(value: Any) -> datetime:
+        """Naive UTC time for gps_logs.timestamp (naive input is taken as local time)"""
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                value = None
+        if not isinstance(value, datetime):
+            value = datetime.now()
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+_gps_ingestion: Optional[GPSIngestion] = None
+
+
+def get_gps_ingestion(queue: Optional[asyncio.Queue] = None) -> GPSIngestion:
+    """Get the shared GPS ingestion pipeline (reading from queue on first call)"""
+    global _gps_ingestion
+    
+    if _gps_ingestion is None:
+        _gps_ingestion = GPSIngestion(queue=queue)
+    
+    return _gps_ingestion
@@ -0,0 +1,336 @@
+import json
+import os
+import threading
+import numpy as np
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Tuple
+from config.settings import get_settings
+from services.distance_matrix import DistanceMatrixEngine
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; the store is then single-process only
+    fcntl = None
+
+settings = get_settings()
+
+MISSING = -1  # Marker for pairs that have not been measured yet
+COORDINATE_DECIMALS = 5  # ~1 m; a location moved further than this is re-measured
+
+
+class MatrixStore:
+    """
+    Persistent distance/duration matrix keyed by client location IDs
+    
+    Distances (int32 meters) and durations (float32 minutes) live in
+    memory-mapped .npy files, so a matrix for ~1,000 clients opens in
+    milliseconds and survives restarts. The last known coordinates of every
+    location are kept as well: when a location moves, its measured pairs are
+    dropped. Processes sharing a directory (e.g. uvicorn workers) serialize
+    every access through a lock file and reload the index, coordinates and
+    grown matrix files written by the others.
+    """
+    
+    def __init__(self, directory: str = None, initial_capacity: int = 256):
+        self.directory = Path(directory or settings.MATRIX_STORE_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / "index.json"
+        self.coordinates_path = self.directory / "coordinates.json"
+        self.distance_path = self.directory / "distance_m.npy"
+        self.duration_path = self.directory / "duration_min.npy"
+        
+        self.location_ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.coordinates: Dict[str, List[float]] = {}
+        self.distance = None
+        self.duration = None
+        # (inode, mtime, size) of each file as last read by this process
+        self._versions: Dict[Path, Tuple[int, int, int]] = {}
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_file = open(self.directory / "store.lock", "a+")
+        
+        with self._locked():
+            if self.distance is None:
+                self._allocate(max(initial_capacity, len(self.location_ids)))
+    
+    @property
+    def capacity(self) -> int:
+        return self.distance.shape[0]
+    
+    def register(self, location_ids: List[str], coordinates: List[Tuple[float, float]] = None) -> np.ndarray:
+        """
+        Make sure every location has a row/column, growing the files if needed
+        
+        Args:
+            location_ids: Location IDs
+            coordinates: Optional (lat, lon) per location; pairs measured for a
+                location that has since moved are invalidated
+        
+        Returns:
+            Store positions of the given locations
+        """
+        with self._locked():
+            new_ids = [
+                location_id for location_id in dict.fromkeys(location_ids) if location_id not in self.positions
+            ]
+            
+            if new_ids:
+                if len(self.location_ids) + len(new_ids) > self.capacity:
+                    self._grow(len(self.location_ids) + len(new_ids))
+                
+                for location_id in new_ids:
+                    self.positions[location_id] = len(self.location_ids)
+                    self.location_ids.append(location_id)
+                self._write_index()
+            
+            if coordinates is not None:
+                self._check_coordinates(location_ids, coordinates)
+            
+            return np.array([self.positions[location_id] for location_id in location_ids], dtype=np.int64)
+    
+    def submatrix(self, location_ids: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distance (meters) and duration (minutes) submatrices for the given locations
+        
+        A run of locations stored in consecutive rows is returned as a zero-copy
+        view of the memory map; any other selection gathers just the requested
+        cells. Unmeasured pairs hold MISSING.
+        """
+        with self._locked():
+            positions = self.register(location_ids)
+            
+            if len(positions) and np.array_equal(positions, np.arange(positions[0], positions[0] + len(positions))):
+                window = slice(int(positions[0]), int(positions[0]) + len(positions))
+                return self.distance[window, window], self.duration[window, window]
+            
+            selector = np.ix_(positions, positions)
+            return self.distance[selector], self.duration[selector]
+    
+    def lookup(
+        self,
+        origin_ids: List[str],
+        destination_ids: List[str],
+        origin_coordinates: List[Tuple[float, float]] = None,
+        destination_coordinates: List[Tuple[float, float]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Gather distance (meters) and duration (minutes) for origin x destination pairs"""
+        with self._locked():
+            selector = np.ix_(
+                self.register(origin_ids, origin_coordinates),
+                self.register(destination_ids, destination_coordinates)
+            )
+            return self.distance[selector], self.duration[selector]
+    
+    def solver_matrices(self, location_ids: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        int32 meter/minute matrices for VRPSolver.solve(distance_unit="m")
+        
+        Unmeasured pairs are estimated from the stored coordinates with the
+        DistanceMatrixEngine speed model, so the solver never sees them as free.
+        
+        Raises:
+            ValueError: If an unmeasured pair involves a location without coordinates
+        """
+        with self._locked():
+            distance, duration = self.submatrix(location_ids)
+            distance = distance.astype(np.int32)
+            duration = np.rint(duration).astype(np.int32)
+            coordinates = dict(self.coordinates)
+        
+        rows, columns = np.nonzero((distance < 0) | (duration < 0))
+        if len(rows):
+            involved = np.unique(np.concatenate([rows, columns]))
+            unknown = [location_ids[idx] for idx in involved if location_ids[idx] not in coordinates]
+            if unknown:
+                raise ValueError(f"No measurements or coordinates for locations: {', '.join(unknown)}")
+            
+            estimate = DistanceMatrixEngine().build([tuple(coordinates[location_ids[idx]]) for idx in involved])
+            local_rows, local_columns = np.searchsorted(involved, rows), np.searchsorted(involved, columns)
+            distance[rows, columns] = estimate["distance_matrix"][local_rows, local_columns]
+            duration[rows, columns] = estimate["time_matrix"][local_rows, local_columns]
+        
+        return distance, duration
+    
+    def update(
+        self,
+        origin_ids: List[str],
+        destination_ids: List[str],
+        distance_km: List[float],
+        duration_minutes: List[float]
+    ):
+        """
+        Record measured pairs (parallel lists, one entry per pair)
+        
+        Args:
+            origin_ids: Origin location ID per pair
+            destination_ids: Destination location ID per pair
+            distance_km: Distance per pair in kilometers
+            duration_minutes: Travel time per pair in minutes
+        """
+        if not origin_ids:
+            return
+        
+        with self._locked():
+            rows = self.register(origin_ids)
+            columns = self.register(destination_ids)
+            
+            self.distance[rows, columns] = np.rint(np.asarray(distance_km, dtype=np.float64) * 1000).astype(np.int32)
+            self.duration[rows, columns] = np.asarray(duration_minutes, dtype=np.float32)
+            self.flush()
+    
+    def invalidate(self, location_ids: List[str]):
+        """Forget every measured pair involving the given locations"""
+        with self._locked():
+            positions = [
+                self.positions[location_id] for location_id in location_ids if location_id in self.positions
+            ]
+            if not positions:
+                return
+            
+            for matrix in (self.distance, self.duration):
+                matrix[positions, :] = MISSING
+                matrix[:, positions] = MISSING
+                matrix[positions, positions] = 0
+            self.flush()
+    
+    def flush(self):
+        """Write pending changes to disk"""
+        self.distance.flush()
+        self.duration.flush()
+    
+    @contextmanager
+    def _locked(self):
+        """Hold the store lock (re-entrant), reloading files changed by other processes"""
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+                try:
+                    self._reload()
+                except BaseException:
+                    if fcntl is not None:
+                        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    raise
+            
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+    
+    def _reload(self):
+        """Re-read the index, coordinates and matrix files if another process replaced them"""
+        if self._changed(self.index_path):
+            self.location_ids = json.loads(self.index_path.read_text(encoding="utf-8"))
+            self.positions = {location_id: position for position, location_id in enumerate(self.location_ids)}
+        if self._changed(self.coordinates_path):
+            self.coordinates = json.loads(self.coordinates_path.read_text(encoding="utf-8"))
+        # Matrix cells are written in place and seen through the shared mapping;
+        # only a grow replaces the files
+        if self._changed(self.distance_path, inode_only=True) or self._changed(self.duration_path, inode_only=True):
+            self._open()
+    
+    def _changed(self, path: Path, inode_only: bool = False) -> bool:
+        """Whether a file differs from the version this process last read or wrote"""
+        if not path.exists():
+            return False
+        
+        version, known = self._file_version(path), self._versions.get(path)
+        if inode_only:
+            return known is None or version[0] != known[0]
+        return version != known
+    
+    def _remember_version(self, path: Path):
+        self._versions[path] = self._file_version(path)
+    
+    def _file_version(self, path: Path) -> Tuple[int, int, int]:
+        stat = path.stat()
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def _open(self):
+        self.distance = np.lib.format.open_memmap(self.distance_path, mode="r+")
+        self.duration = np.lib.format.open_memmap(self.duration_path, mode="r+")
+        self._remember_version(self.distance_path)
+        self._remember_version(self.duration_path)
+    
+    def _allocate(self, capacity: int):
+        """Create empty matrix files of the given capacity"""
+        for path, dtype in ((self.distance_path, np.int32), (self.duration_path, np.float32)):
+            matrix = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(capacity, capacity))
+            matrix[:] = MISSING
+            matrix[np.diag_indices(capacity)] = 0
+            matrix.flush()
+            del matrix
+        
+        self._open()
+    
+    def _grow(self, required: int):
+        """Double the capacity until `required` locations fit, keeping stored pairs"""
+        capacity = self.capacity
+        while capacity < required:
+            capacity *= 2
+        
+        used = len(self.location_ids)
+        for name, path in (("distance", self.distance_path), ("duration", self.duration_path)):
+            current = getattr(self, name)
+            tmp_path = path.with_suffix(".tmp.npy")
+            
+            grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=current.dtype, shape=(capacity, capacity))
+            grown[:] = MISSING
+            grown[np.diag_indices(capacity)] = 0
+            grown[:used, :used] = current[:used, :used]
+            grown.flush()
+            
+            del grown
+            setattr(self, name, None)
+            del current
+            os.replace(tmp_path, path)
+        
+        self._open()
+    
+    def _check_coordinates(self, location_ids: List[str], coordinates: List[Tuple[float, float]]):
+        """Record coordinates, invalidating locations that moved"""
+        moved = []
+        changed = False
+        seen = set()
+        for location_id, (latitude, longitude) in zip(location_ids, coordinates):
+            if location_id in seen:
+                continue
+            seen.add(location_id)
+            point = [round(latitude, COORDINATE_DECIMALS), round(longitude, COORDINATE_DECIMALS)]
+            previous = self.coordinates.get(location_id)
+            if previous == point:
+                continue
+            if previous is not None:
+                moved.append(location_id)
+            self.coordinates[location_id] = point
+            changed = True
+        
+        if moved:
+            self.invalidate(moved)
+        if changed:
+            tmp_path = self.coordinates_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self.coordinates, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self.coordinates_path)
+            self._remember_version(self.coordinates_path)
+    
+    def _write_index(self):
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.location_ids, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.index_path)
+        self._remember_version(self.index_path)
+
+
+_matrix_stores: Dict[str, MatrixStore] = {}
+
+
+def get_matrix_store(option: str = "trafast") -> MatrixStore:
+    """Get the shared matrix store for a Directions route option"""
+    if option not in _matrix_stores:
+        _matrix_stores[option] = MatrixStore(os.path.join(settings.MATRIX_STORE_DIR, option))
+    
+    return _matrix_stores[option]
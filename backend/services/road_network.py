@@ -0,0 +1,479 @@
+import heapq
+import logging
+import threading
+from collections import Counter
+import numpy as np
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+from config.settings import get_settings
+from services.distance_matrix import haversine_matrix
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+except ImportError:  # Optional dependency, pure-Python search is used instead
+    csr_matrix = None
+    csgraph_dijkstra = None
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Default truck speeds (km/h) by OSM highway type when maxspeed is missing
+HIGHWAY_SPEEDS_KMH = {
+    'motorway': 80,
+    'motorway_link': 50,
+    'trunk': 70,
+    'trunk_link': 40,
+    'primary': 50,
+    'primary_link': 40,
+    'secondary': 40,
+    'secondary_link': 35,
+    'tertiary': 35,
+    'tertiary_link': 30,
+    'unclassified': 30,
+    'residential': 25,
+    'living_street': 10,
+    'service': 15,
+}
+
+SNAP_CELL_DEG = 0.01  # Grid size of the nearest-node index
+SOURCE_CHUNK = 32  # Sources per batched scipy search (bounds memory)
+KM_PER_DEG_LAT = 111.0
+
+
+class RoadNetwork:
+    """
+    Local road graph for offline distance/duration matrices
+    
+    Arcs are stored in CSR form (indptr/indices plus per-arc length and
+    travel time), sorted by (tail, head) with parallel arcs reduced to the
+    fastest one. Searches minimize travel time, like the Directions
+    "trafast" option, and report the length of the fastest path.
+    """
+    
+    def __init__(
+        self,
+        node_lat: np.ndarray,
+        node_lon: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        length_m: np.ndarray,
+        time_min: np.ndarray
+    ):
+        self.node_lat = np.asarray(node_lat, dtype=np.float64)
+        self.node_lon = np.asarray(node_lon, dtype=np.float64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.length_m = np.asarray(length_m, dtype=np.float32)
+        self.time_min = np.asarray(time_min, dtype=np.float32)
+        
+        self._build_snap_index()
+    
+    @property
+    def n_nodes(self) -> int:
+        return len(self.node_lat)
+    
+    @property
+    def n_arcs(self) -> int:
+        return len(self.indices)
+    
+    @classmethod
+    def from_arcs(
+        cls,
+        node_lat: np.ndarray,
+        node_lon: np.ndarray,
+        tails: np.ndarray,
+        heads: np.ndarray,
+        length_m: np.ndarray,
+        time_min: np.ndarray
+    ) -> "RoadNetwork":
+        """Build the CSR arrays from an arc list"""
+        tails = np.asarray(tails, dtype=np.int64)
+        heads = np.asarray(heads, dtype=np.int64)
+        length_m = np.asarray(length_m, dtype=np.float64)
+        time_min = np.asarray(time_min, dtype=np.float64)
+        n_nodes = len(node_lat)
+        
+        # Sort by (tail, head, time) and keep the fastest of parallel arcs
+        order = np.lexsort((time_min, heads, tails))
+        tails, heads, length_m, time_min = tails[order], heads[order], length_m[order], time_min[order]
+        keep = np.ones(len(tails), dtype=bool)
+        keep[1:] = (tails[1:] != tails[:-1]) | (heads[1:] != heads[:-1])
+        keep &= tails != heads
+        tails, heads, length_m, time_min = tails[keep], heads[keep], length_m[keep], time_min[keep]
+        
+        indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tails, minlength=n_nodes), out=indptr[1:])
+        
+        return cls(node_lat, node_lon, indptr, heads, length_m, time_min)
+    
+    @classmethod
+    def from_osm_xml(cls, path: str) -> "RoadNetwork":
+        """
+        Parse an OSM XML extract (.osm) into a drivable road graph
+        
+        Uses highway ways only, honours oneway tags and takes speeds from
+        maxspeed or HIGHWAY_SPEEDS_KMH. Nodes are kept only at intersections
+        and way ends, which typically shrinks the graph several-fold. Convert
+        large extracts once and save() the result; loading the .npz is much
+        faster.
+        """
+        coordinates: Dict[int, Tuple[float, float]] = {}
+        ways: List[Tuple[List[int], float, int]] = []
+        
+        for _, element in ET.iterparse(path, events=("end",)):
+            if element.tag == "node":
+                coordinates[int(element.get("id"))] = (float(element.get("lat")), float(element.get("lon")))
+                element.clear()
+            elif element.tag == "way":
+                tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+                highway = tags.get("highway")
+                if highway in HIGHWAY_SPEEDS_KMH:
+                    refs = [int(nd.get("ref")) for nd in element.iter("nd")]
+                    ways.append((refs, cls._way_speed(tags, highway), cls._way_direction(tags, highway)))
+                element.clear()
+        
+        # Split ways only at intersections and way ends, so shape points
+        # along a road do not become graph nodes
+        use_count = Counter()
+        for refs, _, _ in ways:
+            use_count.update(ref for ref in refs if ref in coordinates)
+        
+        segment_a, segment_b, segment_arc = [], [], []
+        arc_tail, arc_head, arc_speed, arc_direction = [], [], [], []
+        for refs, speed, direction in ways:
+            refs = [ref for ref in refs if ref in coordinates]
+            if len(refs) < 2:
+                continue
+            start = refs[0]
+            for position, (a, b) in enumerate(zip(refs, refs[1:]), start=1):
+                segment_a.append(coordinates[a])
+                segment_b.append(coordinates[b])
+                segment_arc.append(len(arc_tail))
+                if position == len(refs) - 1 or use_count[b] > 1:
+                    arc_tail.append(start)
+                    arc_head.append(b)
+                    arc_speed.append(speed)
+                    arc_direction.append(direction)
+                    start = b
+        
+        node_ids: Dict[int, int] = {}
+        for osm_id in arc_tail + arc_head:
+            node_ids.setdefault(osm_id, len(node_ids))
+        points = np.array([coordinates[osm_id] for osm_id in node_ids], dtype=np.float64).reshape(-1, 2)
+        
+        segment_points = np.array(segment_a + segment_b, dtype=np.float64).reshape(-1, 2)
+        n_segments = len(segment_a)
+        segment_length = cls._arc_lengths_m(
+            segment_points, np.arange(n_segments), np.arange(n_segments, 2 * n_segments)
+        )
+        arc_length = np.bincount(segment_arc, weights=segment_length, minlength=len(arc_tail))
+        
+        tails = np.array([node_ids[osm_id] for osm_id in arc_tail], dtype=np.int64)
+        heads = np.array([node_ids[osm_id] for osm_id in arc_head], dtype=np.int64)
+        speeds = np.asarray(arc_speed, dtype=np.float64)
+        direction = np.asarray(arc_direction, dtype=np.int64)
+        forward = direction >= 0
+        backward = direction <= 0
+        
+        length_m = np.concatenate([arc_length[forward], arc_length[backward]])
+        time_min = length_m / 1000 / np.concatenate([speeds[forward], speeds[backward]]) * 60
+        
+        return cls.from_arcs(
+            points[:, 0],
+            points[:, 1],
+            np.concatenate([tails[forward], heads[backward]]),
+            np.concatenate([heads[forward], tails[backward]]),
+            length_m,
+            time_min,
+        )
+    
+    @classmethod
+    def load(cls, path: str) -> "RoadNetwork":
+        """Load a graph from a saved .npz file or an OSM XML extract"""
+        if not str(path).endswith(".npz"):
+            return cls.from_osm_xml(path)
+        
+        with np.load(path) as data:
+            return cls(
+                data["node_lat"], data["node_lon"], data["indptr"],
+                data["indices"], data["length_m"], data["time_min"],
+            )
+    
+    def save(self, path: str):
+        """Save the CSR arrays to an .npz file"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                node_lat=self.node_lat,
+                node_lon=self.node_lon,
+                indptr=self.indptr,
+                indices=self.indices,
+                length_m=self.length_m,
+                time_min=self.time_min,
+            )
+    
+    def nearest_nodes(self, locations: List[Tuple[float, float]]) -> np.ndarray:
+        """
+        Snap coordinates to the closest graph node
+        
+        Returns:
+            Node index of each location
+        """
+        points = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+        nodes = np.empty(len(points), dtype=np.int64)
+        
+        for idx, (lat, lon) in enumerate(points):
+            row, col = int(np.floor(lat / SNAP_CELL_DEG)), int(np.floor(lon / SNAP_CELL_DEG))
+            candidates = np.empty(0, dtype=np.int64)
+            ring = 1
+            while not len(candidates) and ring <= 64:
+                candidates = np.concatenate([
+                    self._snap_cells.get((row + dr, col + dc), np.empty(0, dtype=np.int64))
+                    for dr in range(-ring, ring + 1)
+                    for dc in range(-ring, ring + 1)
+                ])
+                ring *= 2
+            if not len(candidates):
+                candidates = np.arange(self.n_nodes)
+            
+            distance = haversine_matrix([(lat, lon)], np.column_stack([
+                self.node_lat[candidates], self.node_lon[candidates]
+            ]))[0]
+            nodes[idx] = candidates[np.argmin(distance)]
+        
+        return nodes
+    
+    def one_to_many(self, source: int, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fastest paths from one node to many nodes (pure-Python Dijkstra)
+        
+        The search stops once every target is settled.
+        
+        Returns:
+            Tuple of (length in meters, time in minutes) per target, inf if unreachable
+        """
+        targets = np.asarray(targets, dtype=np.int64)
+        remaining = set(targets.tolist())
+        best_time = {source: 0.0}
+        best_length = {source: 0.0}
+        settled = set()
+        heap = [(0.0, 0.0, source)]
+        
+        indptr, indices, arc_time, arc_length = self.indptr, self.indices, self.time_min, self.length_m
+        
+        while heap and remaining:
+            time_u, length_u, u = heapq.heappop(heap)
+            if u in settled:
+                continue
+            settled.add(u)
+            remaining.discard(u)
+            
+            for arc in range(indptr[u], indptr[u + 1]):
+                v = int(indices[arc])
+                time_v = time_u + float(arc_time[arc])
+                if time_v < best_time.get(v, np.inf):
+                    best_time[v] = time_v
+                    best_length[v] = length_u + float(arc_length[arc])
+                    heapq.heappush(heap, (time_v, best_length[v], v))
+        
+        return (
+            np.array([best_length.get(t, np.inf) if t in settled else np.inf for t in targets.tolist()]),
+            np.array([best_time.get(t, np.inf) if t in settled else np.inf for t in targets.tolist()]),
+        )
+    
+    def matrix(
+        self,
+        origins: List[Tuple[float, float]],
+        destinations: Optional[List[Tuple[float, float]]] = None,
+        margin_km: Optional[float] = 10.0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fastest-path length and time for every origin/destination pair
+        
+        Each search fills one full matrix row. With scipy installed, sources
+        are searched in batches in compiled code; otherwise the pure-Python
+        one_to_many search is used.
+        
+        Args:
+            origins: List of origin coordinates [(lat, lon), ...]
+            destinations: List of destination coordinates (defaults to origins)
+            margin_km: Search only the part of the graph inside the points'
+                bounding box grown by this margin (None searches the whole graph)
+        
+        Returns:
+            Tuple of (length in meters, time in minutes) arrays, inf where unreachable
+        """
+        if margin_km is not None:
+            points = np.asarray(origins + (destinations or []), dtype=np.float64).reshape(-1, 2)
+            network = self._crop(points, margin_km)
+            if network is not self:
+                return network.matrix(origins, destinations, margin_km=None)
+        
+        sources = self.nearest_nodes(origins)
+        targets = sources if destinations is None else self.nearest_nodes(destinations)
+        
+        if csgraph_dijkstra is None:
+            rows = [self.one_to_many(int(source), targets) for source in sources]
+            return np.array([row[0] for row in rows]), np.array([row[1] for row in rows])
+        
+        graph = self._csgraph()
+        unique_sources, source_inverse = np.unique(sources, return_inverse=True)
+        length = np.empty((len(unique_sources), len(targets)))
+        time = np.empty((len(unique_sources), len(targets)))
+        
+        for start in range(0, len(unique_sources), SOURCE_CHUNK):
+            chunk = unique_sources[start:start + SOURCE_CHUNK]
+            time_rows, predecessors = csgraph_dijkstra(graph, indices=chunk, return_predecessors=True)
+            for offset, (time_row, predecessor) in enumerate(zip(time_rows, predecessors)):
+                time[start + offset] = time_row[targets]
+                length[start + offset] = self._tree_lengths(predecessor, time_row)[targets]
+        
+        return length[source_inverse], time[source_inverse]
+    
+    def _crop(self, points: np.ndarray, margin_km: float) -> "RoadNetwork":
+        """Subgraph inside the bounding box of points plus a margin"""
+        margin_lat = margin_km / KM_PER_DEG_LAT
+        margin_lon = margin_km / (KM_PER_DEG_LAT * np.cos(np.radians(points[:, 0].mean())))
+        inside = (
+            (self.node_lat >= points[:, 0].min() - margin_lat) & (self.node_lat <= points[:, 0].max() + margin_lat) &
+            (self.node_lon >= points[:, 1].min() - margin_lon) & (self.node_lon <= points[:, 1].max() + margin_lon)
+        )
+        if inside.all() or not inside.any():
+            return self
+        
+        node_map = np.full(self.n_nodes, -1, dtype=np.int64)
+        node_map[inside] = np.arange(int(inside.sum()))
+        tails = np.repeat(np.arange(self.n_nodes, dtype=np.int64), np.diff(self.indptr))
+        keep = inside[tails] & inside[self.indices]
+        
+        return RoadNetwork.from_arcs(
+            self.node_lat[inside],
+            self.node_lon[inside],
+            node_map[tails[keep]],
+            node_map[self.indices[keep]],
+            self.length_m[keep],
+            self.time_min[keep],
+        )
+    
+    def _tree_lengths(self, predecessor: np.ndarray, time_row: np.ndarray) -> np.ndarray:
+        """
+        Path length from the root to every node of a shortest-path tree
+        
+        Uses pointer jumping, so the cost is O(n log depth) vectorized steps
+        instead of a Python walk per target.
+        """
+        parent = np.where(predecessor >= 0, predecessor, -1).astype(np.int64)
+        length = np.zeros(self.n_nodes)
+        
+        children = np.nonzero(parent >= 0)[0]
+        length[children] = self._arc_length_between(parent[children], children)
+        
+        active = children
+        while len(active):
+            ancestors = parent[active]
+            length[active] += length[ancestors]
+            parent[active] = parent[ancestors]
+            active = active[parent[active] >= 0]
+        
+        length[~np.isfinite(time_row)] = np.inf
+        return length
+    
+    def _arc_length_between(self, tails: np.ndarray, heads: np.ndarray) -> np.ndarray:
+        """Length of the (tail, head) arcs, found by binary search in the sorted CSR keys"""
+        positions = np.searchsorted(self._arc_keys(), tails.astype(np.int64) * self.n_nodes + heads)
+        return self.length_m[positions].astype(np.float64)
+    
+    def _arc_keys(self) -> np.ndarray:
+        if getattr(self, "_keys", None) is None:
+            tails = np.repeat(np.arange(self.n_nodes, dtype=np.int64), np.diff(self.indptr))
+            self._keys = tails * self.n_nodes + self.indices
+        return self._keys
+    
+    def _csgraph(self):
+        if getattr(self, "_graph", None) is None:
+            self._graph = csr_matrix(
+                (self.time_min.astype(np.float64), self.indices, self.indptr),
+                shape=(self.n_nodes, self.n_nodes),
+            )
+        return self._graph
+    
+    def _build_snap_index(self):
+        rows = np.floor(self.node_lat / SNAP_CELL_DEG).astype(np.int64)
+        cols = np.floor(self.node_lon / SNAP_CELL_DEG).astype(np.int64)
+        order = np.lexsort((cols, rows))
+        keys = np.stack([rows[order], cols[order]], axis=1)
+        
+        self._snap_cells: Dict[Tuple[int, int], np.ndarray] = {}
+        if not len(order):
+            return
+        boundaries = np.nonzero(np.any(keys[1:] != keys[:-1], axis=1))[0] + 1
+        for group in np.split(np.arange(len(order)), boundaries):
+            self._snap_cells[(int(keys[group[0], 0]), int(keys[group[0], 1]))] = order[group]
+    
+    @staticmethod
+    def _arc_lengths_m(points: np.ndarray, tails: np.ndarray, heads: np.ndarray) -> np.ndarray:
+        lat1, lon1 = np.radians(points[tails, 0]), np.radians(points[tails, 1])
+        lat2, lon2 = np.radians(points[heads, 0]), np.radians(points[heads, 1])
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 6371000.0 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    
+    @staticmethod
+    def _way_speed(tags: Dict[str, str], highway: str) -> float:
+        maxspeed = tags.get("maxspeed", "").split(" ")[0]
+        if maxspeed.isdigit() and int(maxspeed) > 0:
+            return min(float(maxspeed), HIGHWAY_SPEEDS_KMH['motorway'])
+        return float(HIGHWAY_SPEEDS_KMH[highway])
+    
+    @staticmethod
+    def _way_direction(tags: Dict[str, str], highway: str) -> int:
+        """1 forward only, -1 backward only, 0 both ways"""
+        oneway = tags.get("oneway", "")
+        if oneway in ("yes", "true", "1"):
+            return 1
+        if oneway == "-1":
+            return -1
+        if oneway == "" and (highway in ("motorway", "motorway_link") or tags.get("junction") == "roundabout"):
+            return 1
+        return 0
+
+
+_road_network: Optional[RoadNetwork] = None
+_road_network_lock = threading.Lock()
+
+
+def get_road_network() -> Optional[RoadNetwork]:
+    """
+    Get the shared graph loaded from ROAD_NETWORK_PATH, if configured
+    
+    Blocking (an OSM extract takes minutes to parse): call it from a worker
+    thread. An OSM XML path is converted once and the graph is saved next
+    to it as .npz, which later loads use while it is newer than the extract.
+    """
+    global _road_network
+    
+    with _road_network_lock:
+        if _road_network is None and settings.ROAD_NETWORK_PATH and Path(settings.ROAD_NETWORK_PATH).exists():
+            _road_network = _load_road_network(Path(settings.ROAD_NETWORK_PATH))
+    
+    return _road_network
+
+
+def _load_road_network(path: Path) -> RoadNetwork:
+    if path.suffix == ".npz":
+        return RoadNetwork.load(str(path))
+    
+    converted = path.with_suffix(".npz")
+    if converted.exists() and converted.stat().st_mtime >= path.stat().st_mtime:
+        return RoadNetwork.load(str(converted))
+    
+    network = RoadNetwork.from_osm_xml(str(path))
+    try:
+        network.save(str(converted))
+    except OSError as e:
+        logger.warning(f"Could not save converted road network to {converted}: {e}")
+    
+    return network
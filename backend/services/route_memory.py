@@ -0,0 +1,159 @@
+import asyncio
+from typing import List, Dict, Optional
+from datetime import date, timedelta
+from config.settings import get_settings
+from config.redis import RedisCache
+from services.vrp_solver import VRPSolver
+
+settings = get_settings()
+cache = RedisCache(ttl=settings.ROUTE_MEMORY_DAYS * 86400)
+
+
+class RouteMemory:
+    """Remembers solved route sequences by client pair to warm-start the solver"""
+    
+    def __init__(self, solver: VRPSolver = None):
+        self.solver = solver or VRPSolver()
+        self.lookback_days = settings.ROUTE_MEMORY_DAYS
+    
+    async def remember(self, service_date: date, result: Dict, orders: List[Dict]) -> bool:
+        """
+        Store the stop sequence of every route in a solve result
+        
+        Args:
+            service_date: Dispatch date the result belongs to
+            result: Result dict returned by VRPSolver.solve
+            orders: Order dicts the result was solved for
+        
+        Returns:
+            True if the memory was stored
+        """
+        if result.get("status") != "success":
+            return False
+        
+        orders_by_id = {order['order_id']: order for order in orders}
+        routes = []
+        
+        for route in result["routes"]:
+            sequence = []
+            seen = set()
+            for stop in route["stops"]:
+                order = orders_by_id.get(stop["order_id"])
+                if order is None or order['order_id'] in seen:
+                    continue
+                seen.add(order['order_id'])
+                sequence.append(self._client_pair(order))
+            
+            if sequence:
+                routes.append({"vehicle_id": route["vehicle_id"], "sequence": sequence})
+        
+        return await cache.set_json(self._cache_key(service_date), {
+            "service_date": service_date.isoformat(),
+            "routes": routes,
+        })
+    
+    async def recall(self, service_date: date) -> Optional[Dict]:
+        """Get the most recent stored routes before the given date"""
+        for days_back in range(1, self.lookback_days + 1):
+            memory = await cache.get_json(self._cache_key(service_date - timedelta(days=days_back)))
+            if memory:
+                return memory
+        
+        return None
+    
+    def build_initial_routes(
+        self,
+        memory: Dict,
+        vehicles: List[Dict],
+        orders: List[Dict]
+    ) -> List[List[int]]:
+        """
+        Map remembered sequences onto today's orders
+        
+        Each remembered (pickup, delivery) client pair claims one matching order,
+        in the remembered order, on the same vehicle. Orders that would break
+        temperature or pallet limits are left for the solver to insert.
+        
+        Args:
+            memory: Stored routes returned by recall()
+            vehicles: Today's vehicle dicts (solver order)
+            orders: Today's order dicts (solver order)
+        
+        Returns:
+            Per-vehicle lists of order indices for VRPSolver.solve(initial_routes=...)
+        """
+        unclaimed: Dict[str, List[int]] = {}
+        for order_idx, order in enumerate(orders):
+            unclaimed.setdefault(self._client_pair(order), []).append(order_idx)
+        
+        remembered = {route["vehicle_id"]: route["sequence"] for route in memory.get("routes", [])}
+        initial_routes = []
+        
+        for vehicle in vehicles:
+            route = []
+            load = 0
+            
+            for client_pair in remembered.get(vehicle['vehicle_id'], []):
+                candidates = unclaimed.get(client_pair)
+                if not candidates:
+                    continue
+                
+                order = orders[candidates[0]]
+                if not self.solver._is_temperature_compatible(order['temperature_type'], vehicle['vehicle_type']):
+                    continue
+                if load + order.get('required_pallets', 0) > vehicle['max_pallets']:
+                    continue
+                
+                route.append(candidates.pop(0))
+                load += order.get('required_pallets', 0)
+            
+            initial_routes.append(route)
+        
+        return initial_routes
+    
+    async def solve(
+        self,
+        service_date: date,
+        vehicles: List[Dict],
+        orders: List[Dict],
+        distance_matrix: List[List[float]],
+        time_matrix: List[List[float]],
+        **solve_kwargs
+    ) -> Optional[Dict]:
+        """
+        Solve a day's orders warm-started from the most recent remembered routes
+        
+        The search runs in a worker thread and the result is remembered for
+        the following days.
+        
+        Returns:
+            VRPSolver.solve result with "warm_start" details
+        """
+        memory = await self.recall(service_date)
+        initial_routes = self.build_initial_routes(memory, vehicles, orders) if memory else None
+        
+        result = await asyncio.to_thread(
+            self.solver.solve,
+            vehicles,
+            orders,
+            distance_matrix,
+            time_matrix,
+            initial_routes=initial_routes,
+            **solve_kwargs
+        )
+        
+        result["warm_start"] = {
+            "memory_date": memory["service_date"] if memory else None,
+            "seeded_orders": sum(len(route) for route in initial_routes) if initial_routes else 0,
+        }
+        
+        await self.remember(service_date, result, orders)
+        
+        return result
+    
+    def _client_pair(self, order: Dict) -> str:
+        """Recurring-route key for an order"""
+        return f"{order['pickup_client_id']}>{order['delivery_client_id']}"
+    
+    def _cache_key(self, service_date: date) -> str:
+        return f"route_memory:{service_date.isoformat()}"
@@ -1,21 +1,62 @@
 import httpx
 import asyncio
+import numpy as np
+from datetime import datetime
 from typing import Optional, Dict, List, Tuple
 from config.settings import get_settings
 from config.redis import RedisCache
+from config.serializers import get_serializer
+from config.http import get_http_client
+from services.distance_matrix import haversine_matrix, DEFAULT_AVERAGE_SPEED_KMH
+from services.matrix_store import get_matrix_store
+from services.travel_time_model import TravelTimeModel, get_travel_time_model
+from services.road_network import get_road_network
+from utils.rate_limiter import AdaptiveRateLimiter, is_throttled
+from utils.single_flight import SingleFlight
 
 settings = get_settings()
-cache = RedisCache(ttl=3600)  # 1 hour cache
+cache = RedisCache(ttl=3600, serializer=get_serializer(settings.CACHE_SERIALIZER))  # 1 hour cache
+
+PATH_SCALE = 1e6  # Packed path coordinates are stored as int32 microdegrees
+
+
+def pack_path(path: List[List[float]]) -> bytes:
+    """Pack a [[lon, lat], ...] polyline into int32 microdegrees (8 bytes per point)"""
+    return np.rint(np.asarray(path, dtype=np.float64).reshape(-1, 2) * PATH_SCALE).astype("<i4").tobytes()
+
+
+def unpack_path(data: bytes) -> List[List[float]]:
+    """Inverse of pack_path"""
+    return (np.frombuffer(data, dtype="<i4").reshape(-1, 2) / PATH_SCALE).tolist()
+
+# Shared by every Directions request in the process
+directions_limiter = AdaptiveRateLimiter(
+    rate_per_second=settings.NAVER_DIRECTIONS_RATE_PER_SECOND,
+    max_concurrency=settings.NAVER_DIRECTIONS_MAX_CONCURRENCY,
+)
+route_flight = SingleFlight()
 
 
 class RoutingService:
     """Naver Maps Directions API Service"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        travel_time_model: Optional[TravelTimeModel] = None,
+        backend: Optional[str] = None
+    ):
         self.client_id = settings.NAVER_MAP_CLIENT_ID
         self.client_secret = settings.NAVER_MAP_CLIENT_SECRET
         self.directions_url = settings.NAVER_MAP_DIRECTIONS_URL
-        
+        self.timeout = settings.NAVER_DIRECTIONS_TIMEOUT_SECONDS
+        # Defaults to the application-wide pooled client
+        self.http_client = http_client
+        # Defaults to the model saved at TRAVEL_TIME_MODEL_PATH
+        self.travel_time_model = travel_time_model
+        # Matrix backend: "naver" (Directions API) or "road_network" (local graph)
+        self.backend = backend or settings.ROUTING_BACKEND
+    
     async def get_route(
         self,
         start_lat: float,
@@ -23,7 +64,8 @@ class RoutingService:
         end_lat: float,
         end_lon: float,
         waypoints: Optional[List[Tuple[float, float]]] = None,
-        option: str = "trafast"  # trafast, tracomfort, traoptimal
+        option: str = "trafast",  # trafast, tracomfort, traoptimal
+        use_cache: bool = True
     ) -> Optional[Dict]:
         """
         Get route information between two points
@@ -35,84 +77,106 @@ class RoutingService:
             end_lon: Ending longitude
             waypoints: Optional list of waypoint coordinates [(lat, lon), ...]
             option: Route optimization option (trafast=fastest, tracomfort=comfortable, traoptimal=optimal)
-            
+            use_cache: Read and write the route cache (bulk callers handle it themselves)
+        
         Returns:
             Dict with distance_km, duration_minutes, path, toll_fee, etc.
         """
-        # Create cache key
-        waypoint_str = ""
-        if waypoints:
-            waypoint_str = "|".join([f"{lon},{lat}" for lat, lon in waypoints])
-        cache_key = f"route:{start_lon},{start_lat}:{end_lon},{end_lat}:{waypoint_str}:{option}"
+        cache_key = self._route_cache_key(start_lat, start_lon, end_lat, end_lon, waypoints, option)
         
-        # Check cache
-        cached = await cache.get_json(cache_key)
-        if cached:
-            return cached
+        # Concurrent callers for the same route share one lookup/request
+        return await route_flight.do(cache_key, lambda: self._get_route(
+            cache_key, start_lat, start_lon, end_lat, end_lon, waypoints, option, use_cache
+        ))
+    
+    async def _get_route(
+        self,
+        cache_key: str,
+        start_lat: float,
+        start_lon: float,
+        end_lat: float,
+        end_lon: float,
+        waypoints: Optional[List[Tuple[float, float]]],
+        option: str,
+        use_cache: bool
+    ) -> Optional[Dict]:
+        # Check cache (summary and path are stored under separate keys)
+        if use_cache:
+            summary, path_entry = await cache.get_many_json([cache_key, self._route_path_key(cache_key)])
+            if summary and path_entry:
+                return {**summary, "path": self._decode_path(path_entry["path"])}
         
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "X-NCP-APIGW-API-KEY-ID": self.client_id,
-                    "X-NCP-APIGW-API-KEY": self.client_secret,
-                }
-                
-                # Naver API uses lon,lat order
-                params = {
-                    "start": f"{start_lon},{start_lat}",
-                    "goal": f"{end_lon},{end_lat}",
-                    "option": option,
-                }
-                
-                # Add waypoints if provided
-                if waypoints:
-                    params["waypoints"] = "|".join([f"{lon},{lat}" for lat, lon in waypoints])
-                
-                response = await client.get(
-                    self.directions_url,
-                    headers=headers,
-                    params=params,
-                    timeout=15.0
-                )
+            client = self.http_client or get_http_client()
+            headers = {
+                "X-NCP-APIGW-API-KEY-ID": self.client_id,
+                "X-NCP-APIGW-API-KEY": self.client_secret,
+            }
+            
+            # Naver API uses lon,lat order
+            params = {
+                "start": f"{start_lon},{start_lat}",
+                "goal": f"{end_lon},{end_lat}",
+                "option": option,
+            }
+            
+            # Add waypoints if provided
+            if waypoints:
+                params["waypoints"] = "|".join([f"{lon},{lat}" for lat, lon in waypoints])
+            
+            async with directions_limiter:
+                try:
+                    response = await client.get(
+                        self.directions_url,
+                        headers=headers,
+                        params=params,
+                        timeout=self.timeout
+                    )
+                except httpx.TransportError:
+                    directions_limiter.record(None)
+                    raise
+                directions_limiter.record(response.status_code)
+            
+            if response.status_code == 200:
+                data = response.json()
                 
-                if response.status_code == 200:
-                    data = response.json()
+                if data.get("code") == 0 and data.get("route"):
+                    route_data = data["route"][option][0]
+                    summary = route_data["summary"]
+                    
+                    result = {
+                        "status": "success",
+                        "distance_km": summary["distance"] / 1000,  # Convert to km
+                        "duration_minutes": summary["duration"] / 60000,  # Convert to minutes
+                        "duration_seconds": summary["duration"] / 1000,
+                        "toll_fee": summary.get("tollFare", 0),
+                        "taxi_fare": summary.get("taxiFare", 0),
+                        "fuel_price": summary.get("fuelPrice", 0),
+                        "path": route_data.get("path", []),  # List of [lon, lat] coordinates
+                        "bbox": summary.get("bbox", []),  # Bounding box
+                    }
+                    
+                    # Cache the result
+                    if use_cache:
+                        await cache.set_many_json(self._route_cache_entries(cache_key, result), ttl=3600)
                     
-                    if data.get("code") == 0 and data.get("route"):
-                        route_data = data["route"][option][0]
-                        summary = route_data["summary"]
-                        
-                        result = {
-                            "status": "success",
-                            "distance_km": summary["distance"] / 1000,  # Convert to km
-                            "duration_minutes": summary["duration"] / 60000,  # Convert to minutes
-                            "duration_seconds": summary["duration"] / 1000,
-                            "toll_fee": summary.get("tollFare", 0),
-                            "taxi_fare": summary.get("taxiFare", 0),
-                            "fuel_price": summary.get("fuelPrice", 0),
-                            "path": route_data.get("path", []),  # List of [lon, lat] coordinates
-                            "bbox": summary.get("bbox", []),  # Bounding box
-                        }
-                        
-                        # Cache the result
-                        await cache.set_json(cache_key, result, ttl=3600)
-                        
-                        return result
-                    else:
-                        return {
-                            "status": "error",
-                            "error": f"Route not found: {data.get('message', 'Unknown error')}",
-                            "distance_km": None,
-                            "duration_minutes": None,
-                        }
+                    return result
                 else:
                     return {
                         "status": "error",
-                        "error": f"API returned status code {response.status_code}",
+                        "error": f"Route not found: {data.get('message', 'Unknown error')}",
                         "distance_km": None,
                         "duration_minutes": None,
                     }
-                    
+            else:
+                return {
+                    "status": "error",
+                    "error": f"API returned status code {response.status_code}",
+                    "status_code": response.status_code,
+                    "distance_km": None,
+                    "duration_minutes": None,
+                }
+        
         except httpx.TimeoutException:
             return {
                 "status": "error",
@@ -132,68 +196,246 @@ class RoutingService:
         self,
         origins: List[Tuple[float, float]],
         destinations: List[Tuple[float, float]],
-        option: str = "trafast"
+        option: str = "trafast",
+        origin_ids: Optional[List[str]] = None,
+        destination_ids: Optional[List[str]] = None,
+        assume_symmetric: bool = False,
+        max_retries: int = 2,
+        departure_time: Optional[datetime] = None
     ) -> Dict:
         """
         Calculate distance matrix between multiple origins and destinations
         
+        Coincident coordinates are queried once and expanded back to the full
+        matrix, and pairs at the same location are zero.
+        
         Args:
             origins: List of origin coordinates [(lat, lon), ...]
             destinations: List of destination coordinates [(lat, lon), ...]
             option: Route optimization option
-            
+            origin_ids: Optional location IDs (e.g. client_id) of the origins;
+                enables the persistent matrix store, so only unmeasured pairs
+                are requested from the API
+            destination_ids: Location IDs of the destinations; may be omitted
+                only when destinations are the origins (otherwise the store is
+                not used)
+            assume_symmetric: Query only one direction of each location pair
+                and use it for both (road distances are close to symmetric)
+            max_retries: Retries per pair after a 429/5xx response
+            departure_time: Departure time for the learned travel-time fallback
+                (default: now)
+        
         Returns:
             Dict with distance and duration matrices
         """
         n_origins = len(origins)
         n_destinations = len(destinations)
         
-        distance_matrix = [[0.0] * n_destinations for _ in range(n_origins)]
-        duration_matrix = [[0.0] * n_destinations for _ in range(n_origins)]
+        if self.backend == "road_network":
+            # Graph loading and the shortest-path searches are CPU-bound
+            network = await asyncio.to_thread(get_road_network)
+            if network is not None:
+                return await asyncio.to_thread(self._road_network_matrix, network, origins, destinations)
         
-        # Calculate routes for all origin-destination pairs
-        tasks = []
-        for i, (o_lat, o_lon) in enumerate(origins):
-            for j, (d_lat, d_lon) in enumerate(destinations):
-                if i == j and origins == destinations:
+        # Query each distinct location once
+        origin_points, origin_inverse = self._unique_locations(origins)
+        destination_points, destination_inverse = self._unique_locations(destinations)
+        
+        distance_compact = np.zeros((len(origin_points), len(destination_points)))
+        duration_compact = np.zeros((len(origin_points), len(destination_points)))
+        
+        # Straight-line fallback for every pair, computed in one vectorized pass
+        fallback_km = haversine_matrix(origin_points, destination_points)
+        model = self.travel_time_model or get_travel_time_model()
+        if model is not None and model.is_fitted:
+            # Learned speed profile for the departure hour
+            fallback_km = fallback_km * model.detour_factor
+            fallback_minutes = model.duration_matrix(
+                origin_points, destination_points, departure_time, distance_km=fallback_km
+            )
+        else:
+            # Estimate duration: 40 km/h average
+            fallback_minutes = fallback_km / DEFAULT_AVERAGE_SPEED_KMH * 60
+        
+        # Pairs already measured in the persistent store
+        store = None
+        if destination_ids is None and (destinations is origins or destinations == origins):
+            destination_ids = origin_ids
+        if origin_ids is not None and destination_ids is not None:
+            store = get_matrix_store(option)
+            origin_point_ids = self._first_ids(origin_ids, origin_inverse, len(origin_points))
+            destination_point_ids = self._first_ids(destination_ids, destination_inverse, len(destination_points))
+            # Moved locations lose their measured pairs before the lookup
+            stored_distance, stored_duration = store.lookup(
+                origin_point_ids, destination_point_ids, origin_points, destination_points
+            )
+        
+        # Group the cells each API request answers
+        pending: Dict[Tuple, List[Tuple[int, int]]] = {}
+        for i, origin in enumerate(origin_points):
+            for j, destination in enumerate(destination_points):
+                if origin == destination:
                     # Same location, zero distance
                     continue
-                tasks.append((i, j, o_lat, o_lon, d_lat, d_lon))
+                if store is not None and stored_distance[i, j] >= 0:
+                    distance_compact[i, j] = stored_distance[i, j] / 1000
+                    duration_compact[i, j] = stored_duration[i, j]
+                    continue
+                pair = (min(origin, destination), max(origin, destination)) if assume_symmetric else (origin, destination)
+                pending.setdefault(pair, []).append((i, j))
         
-        # Process in batches to avoid rate limits
-        batch_size = 10
-        for batch_start in range(0, len(tasks), batch_size):
-            batch = tasks[batch_start:batch_start + batch_size]
-            
-            batch_results = await asyncio.gather(*[
-                self.get_route(o_lat, o_lon, d_lat, d_lon, option=option)
-                for i, j, o_lat, o_lon, d_lat, d_lon in batch
-            ])
-            
-            for (i, j, _, _, _, _), result in zip(batch, batch_results):
+        # The first cell of each group sets the queried direction
+        groups = list(pending.values())
+        measured = []
+        
+        # Look up every cached route summary in one round trip
+        cache_keys = [
+            self._route_cache_key(*origin_points[cells[0][0]], *destination_points[cells[0][1]], None, option)
+            for cells in groups
+        ]
+        try:
+            results = await cache.get_many_json(cache_keys)
+        except Exception:
+            results = [None] * len(groups)
+        tasks = [position for position, result in enumerate(results) if not result]
+        
+        async def measure(i: int, j: int) -> Optional[Dict]:
+            # Throttled requests are retried once the shared limiter has backed off
+            for _ in range(max_retries + 1):
+                result = await self.get_route(*origin_points[i], *destination_points[j], option=option, use_cache=False)
+                if not (result and is_throttled(result.get("status_code"))):
+                    break
+            return result
+        
+        # Requests run continuously, paced by the shared rate limiter
+        fetched = await asyncio.gather(*[measure(*groups[position][0]) for position in tasks])
+        
+        new_routes = {}
+        for position, result in zip(tasks, fetched):
+            results[position] = result
+            if result and result.get("status") == "success":
+                new_routes.update(self._route_cache_entries(cache_keys[position], result))
+        try:
+            await cache.set_many_json(new_routes, ttl=3600)
+        except Exception:
+            pass
+        
+        for cells, result in zip(groups, results):
+            for i, j in cells:
                 if result and result.get("status") == "success":
-                    distance_matrix[i][j] = result["distance_km"]
-                    duration_matrix[i][j] = result["duration_minutes"]
+                    distance_compact[i, j] = result["distance_km"]
+                    duration_compact[i, j] = result["duration_minutes"]
                 else:
                     # Use straight-line distance as fallback
-                    distance_matrix[i][j] = self._haversine_distance(
-                        origins[i][0], origins[i][1],
-                        destinations[j][0], destinations[j][1]
-                    )
-                    # Estimate duration: 40 km/h average
-                    duration_matrix[i][j] = (distance_matrix[i][j] / 40) * 60
+                    distance_compact[i, j] = fallback_km[i, j]
+                    duration_compact[i, j] = fallback_minutes[i, j]
             
-            # Rate limiting between batches
-            await asyncio.sleep(0.5)
+            if result and result.get("status") == "success":
+                measured.append(cells[0])
+        
+        # Keep API measurements (not fallbacks or mirrored pairs) for later builds
+        if store is not None and measured:
+            store.update(
+                [origin_point_ids[i] for i, _ in measured],
+                [destination_point_ids[j] for _, j in measured],
+                [distance_compact[i, j] for i, j in measured],
+                [duration_compact[i, j] for i, j in measured],
+            )
+        
+        # Expand back to the full origin x destination matrix
+        selector = np.ix_(origin_inverse, destination_inverse)
         
         return {
             "status": "success",
-            "distance_matrix": distance_matrix,
-            "duration_matrix": duration_matrix,
+            "distance_matrix": distance_compact[selector].tolist(),
+            "duration_matrix": duration_compact[selector].tolist(),
             "n_origins": n_origins,
             "n_destinations": n_destinations,
+            "n_requests": len(tasks),
+            "n_cached": len(groups) - len(tasks),
         }
     
+    def _road_network_matrix(
+        self,
+        network,
+        origins: List[Tuple[float, float]],
+        destinations: List[Tuple[float, float]]
+    ) -> Dict:
+        """Matrices from the local road graph (straight-line fallback where unreachable)"""
+        length_m, time_minutes = network.matrix(origins, destinations)
+        fallback_km = haversine_matrix(origins, destinations)
+        reachable = np.isfinite(time_minutes)
+        
+        return {
+            "status": "success",
+            "distance_matrix": np.where(reachable, length_m / 1000, fallback_km).tolist(),
+            "duration_matrix": np.where(
+                reachable, time_minutes, fallback_km / DEFAULT_AVERAGE_SPEED_KMH * 60
+            ).tolist(),
+            "n_origins": len(origins),
+            "n_destinations": len(destinations),
+            "n_requests": 0,
+            "backend": "road_network",
+        }
+    
+    def _route_cache_key(
+        self,
+        start_lat: float,
+        start_lon: float,
+        end_lat: float,
+        end_lon: float,
+        waypoints: Optional[List[Tuple[float, float]]],
+        option: str
+    ) -> str:
+        # Coordinates at ~0.1 m precision, matching the matrix deduplication
+        waypoint_str = ""
+        if waypoints:
+            waypoint_str = "|".join([f"{lon:.6f},{lat:.6f}" for lat, lon in waypoints])
+        return f"route:{start_lon:.6f},{start_lat:.6f}:{end_lon:.6f},{end_lat:.6f}:{waypoint_str}:{option}"
+    
+    def _route_path_key(self, cache_key: str) -> str:
+        return "route_path:" + cache_key[len("route:"):]
+    
+    def _route_cache_entries(self, cache_key: str, result: Dict) -> Dict[str, Dict]:
+        """Split a route into its summary and path cache entries"""
+        summary = {key: value for key, value in result.items() if key != "path"}
+        path = result.get("path", [])
+        
+        return {
+            cache_key: summary,
+            self._route_path_key(cache_key): {
+                "path": pack_path(path) if cache.serializer.binary else path,
+            },
+        }
+    
+    def _decode_path(self, path) -> List[List[float]]:
+        return unpack_path(path) if isinstance(path, bytes) else path
+    
+    def _unique_locations(self, points: List[Tuple[float, float]]) -> Tuple[List[Tuple[float, float]], np.ndarray]:
+        """
+        Deduplicate coordinates (rounded to ~0.1 m)
+        
+        Returns:
+            Tuple of (distinct points, index of each input point in them)
+        """
+        positions: Dict[Tuple[float, float], int] = {}
+        inverse = np.empty(len(points), dtype=np.int64)
+        
+        for idx, (lat, lon) in enumerate(points):
+            key = (round(lat, 6), round(lon, 6))
+            inverse[idx] = positions.setdefault(key, len(positions))
+        
+        return list(positions), inverse
+    
+    def _first_ids(self, location_ids: List[str], inverse: np.ndarray, n_points: int) -> List[str]:
+        """Location ID representing each distinct point (first occurrence)"""
+        point_ids = [None] * n_points
+        for location_id, position in zip(location_ids, inverse):
+            if point_ids[position] is None:
+                point_ids[position] = location_id
+        
+        return point_ids
+    
     def _haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
         Calculate straight-line distance between two points using Haversine formula
@@ -234,7 +476,7 @@ class RoutingService:
             dest_lat: Destination latitude
             dest_lon: Destination longitude
             speed_factor: Speed adjustment factor (default from settings)
-            
+        
         Returns:
             Dict with ETA information
         """
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import List, Dict, Optional, Tuple
+from config.settings import get_settings
+from config.redis import RedisCache
+from services.vrp_solver import VRPSolver
+
+settings = get_settings()
+cache = RedisCache(ttl=settings.SOLVE_CACHE_TTL)
+logger = logging.getLogger(__name__)
+
+# Order fields that change the optimization problem
+ORDER_FINGERPRINT_FIELDS = [
+    'order_id',
+    'pickup_client_id',
+    'delivery_client_id',
+    'temperature_type',
+    'required_pallets',
+    'weight_kg',
+    'pickup_time_start',
+    'pickup_time_end',
+    'delivery_time_start',
+    'delivery_time_end',
+    'status',
+]
+
+# solve() keyword arguments that change the search
+SEARCH_FINGERPRINT_FIELDS = [
+    'initial_routes',
+    'time_limit_seconds',
+    'first_solution_strategy',
+    'local_search_metaheuristic',
+]
+
+
+class SolveCache:
+    """Cache of VRPSolver results keyed by a canonical problem fingerprint"""
+    
+    def __init__(self, solver: VRPSolver = None, ttl: int = None, max_local_entries: int = 128):
+        self.solver = solver or VRPSolver()
+        self.ttl = ttl or settings.SOLVE_CACHE_TTL
+        self.max_local_entries = max_local_entries
+        # Local fallback store used when Redis is unreachable
+        self._local: Dict[str, Tuple[float, Dict]] = {}
+    
+    def fingerprint(
+        self,
+        vehicles: List[Dict],
+        orders: List[Dict],
+        distance_matrix: List[List[float]],
+        time_matrix: List[List[float]],
+        **solve_kwargs
+    ) -> str:
+        """
+        Hash a canonical form of a solve() call
+        
+        Matrices are hashed in the solver's integer units (meters/minutes), so
+        float noise below those units does not change the fingerprint.
+        
+        Returns:
+            Hex SHA-256 digest
+        """
+        canonical = {
+            "vehicles": [
+                [vehicle['vehicle_id'], vehicle['max_pallets'], vehicle['vehicle_type']]
+                for vehicle in vehicles
+            ],
+            "orders": [
+                [order.get(field) for field in ORDER_FINGERPRINT_FIELDS]
+                for order in orders
+            ],
+            "search": {
+                field: solve_kwargs.get(field) for field in SEARCH_FINGERPRINT_FIELDS
+            },
+            "settings": [
+                settings.ORTOOLS_TIME_LIMIT_SECONDS,
+                settings.ORTOOLS_SOLUTION_LIMIT,
+                settings.MAX_DRIVING_HOURS_PER_DAY,
+            ],
+        }
+        distance_m, time_min = self.solver._prepare_matrices(
+            distance_matrix, time_matrix, solve_kwargs.get("distance_unit", "km")
+        )
+        
+        digest = hashlib.sha256()
+        digest.update(json.dumps(canonical, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(str(distance_m.shape).encode("utf-8"))
+        digest.update(distance_m.tobytes())
+        digest.update(time_min.tobytes())
+        
+        return digest.hexdigest()
+    
+    async def solve(
+        self,
+        vehicles: List[Dict],
+        orders: List[Dict],
+        distance_matrix: List[List[float]],
+        time_matrix: List[List[float]],
+        **solve_kwargs
+    ) -> Optional[Dict]:
+        """
+        Return the cached result for this problem or solve and store it
+        
+        The search runs in a worker thread. Only successful results are cached.
+        
+        Returns:
+            VRPSolver.solve result with a "cache" entry (hit, fingerprint)
+        """
+        fingerprint = self.fingerprint(vehicles, orders, distance_matrix, time_matrix, **solve_kwargs)
+        
+        cached = await self.get(fingerprint)
+        if cached:
+            return {**cached, "cache": {"hit": True, "fingerprint": fingerprint}}
+        
+        result = await asyncio.to_thread(
+            self.solver.solve, vehicles, orders, distance_matrix, time_matrix, **solve_kwargs
+        )
+        
+        if result.get("status") == "success":
+            await self.set(fingerprint, result)
+        
+        result["cache"] = {"hit": False, "fingerprint": fingerprint}
+        return result
+    
+    async def get(self, fingerprint: str) -> Optional[Dict]:
+        """Get a stored result by fingerprint"""
+        try:
+            return await cache.get_json(self._cache_key(fingerprint))
+        except Exception:
+            entry = self._local.get(fingerprint)
+            if entry and entry[0] > time.monotonic():
+                return json.loads(json.dumps(entry[1]))
+            return None
+    
+    async def set(self, fingerprint: str, result: Dict) -> bool:
+        """
+        Store a result
+        
+        Edited orders change the fingerprint, so stored results never need
+        to be invalidated per order; they simply expire.
+        """
+        try:
+            await cache.set_json(self._cache_key(fingerprint), result, ttl=self.ttl)
+        except Exception:
+            self._set_local(fingerprint, result)
+        
+        return True
+    
+    async def invalidate(self, fingerprint: str) -> bool:
+        """Drop one stored result"""
+        self._local.pop(fingerprint, None)
+        try:
+            return await cache.delete(self._cache_key(fingerprint))
+        except Exception as e:
+            logger.warning(f"Solve cache invalidation failed for {fingerprint}: {e}")
+            return False
+    
+    def _set_local(self, fingerprint: str, result: Dict):
+        """Store a result in the bounded local fallback store"""
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._local.items() if expires_at <= now]:
+            del self._local[key]
+        while len(self._local) >= self.max_local_entries:
+            del self._local[next(iter(self._local))]
+        
+        self._local[fingerprint] = (now + self.ttl, json.loads(json.dumps(result)))
+    
+    def _cache_key(self, fingerprint: str) -> str:
+        return f"solve_cache:{fingerprint}"
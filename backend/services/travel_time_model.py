@@ -0,0 +1,312 @@
+import numpy as np
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Tuple, Union
+from sqlalchemy import select, func, extract, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.settings import get_settings
+from models.gps_log import GPSLog
+from services.distance_matrix import haversine_matrix, DEFAULT_AVERAGE_SPEED_KMH
+
+settings = get_settings()
+
+HOURS_PER_DAY = 24
+MIN_MOVING_SPEED_KMH = 5.0  # Slower samples are stops/queues, not driving speed
+MAX_SPEED_KMH = 130.0  # Faster samples are GPS glitches
+
+
+class TravelTimeModel:
+    """
+    Time-dependent travel-time model learned from GPS logs
+    
+    Keeps a 24-hour driving-speed profile per region (a lat/lon grid cell)
+    and a fleet-wide profile per hour. Region profiles are shrunk toward the
+    hourly profile when they have few samples. Durations are road distance
+    divided by the mean of the origin and destination region speeds at the
+    departure hour.
+    """
+    
+    def __init__(
+        self,
+        region_cell_deg: float = 0.05,
+        min_samples: int = 20,
+        detour_factor: float = 1.3,
+        default_speed_kmh: float = DEFAULT_AVERAGE_SPEED_KMH
+    ):
+        self.region_cell_deg = region_cell_deg
+        self.min_samples = min_samples
+        self.detour_factor = detour_factor
+        self.default_speed_kmh = default_speed_kmh
+        
+        self.hourly_speed = np.full(HOURS_PER_DAY, default_speed_kmh)
+        self.region_index: Dict[Tuple[int, int], int] = {}
+        self.region_speed = np.empty((0, HOURS_PER_DAY))
+        self.n_samples = 0
+    
+    @property
+    def is_fitted(self) -> bool:
+        return self.n_samples > 0
+    
+    def fit(
+        self,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        hours: np.ndarray,
+        speeds_kmh: np.ndarray
+    ) -> "TravelTimeModel":
+        """
+        Learn speed profiles from GPS samples
+        
+        Speeds are averaged harmonically (the time-weighted mean), so slow
+        stretches count as much as they cost in travel time.
+        
+        Args:
+            latitudes: Sample latitudes
+            longitudes: Sample longitudes
+            hours: Hour of day (0-23) of each sample
+            speeds_kmh: Reported speed of each sample
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        hours = np.asarray(hours, dtype=np.int64) % HOURS_PER_DAY
+        speeds_kmh = np.asarray(speeds_kmh, dtype=np.float64)
+        
+        moving = (speeds_kmh >= MIN_MOVING_SPEED_KMH) & (speeds_kmh <= MAX_SPEED_KMH)
+        
+        return self.fit_aggregated(
+            self._cells(latitudes[moving], longitudes[moving]),
+            hours[moving],
+            np.ones(int(moving.sum())),
+            1.0 / speeds_kmh[moving],  # hours per km
+        )
+    
+    def fit_aggregated(
+        self,
+        cells: np.ndarray,
+        hours: np.ndarray,
+        counts: np.ndarray,
+        pace_sums: np.ndarray
+    ) -> "TravelTimeModel":
+        """
+        Learn speed profiles from moving samples totalled per (region, hour)
+        
+        Args:
+            cells: Grid cell (row, col) of each group (see _cells)
+            hours: Hour of day (0-23) of each group
+            counts: Number of samples in each group
+            pace_sums: Sum of 1 / speed_kmh over the samples of each group
+        """
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        hours = np.asarray(hours, dtype=np.int64) % HOURS_PER_DAY
+        counts = np.asarray(counts, dtype=np.float64)
+        pace_sums = np.asarray(pace_sums, dtype=np.float64)
+        
+        self.n_samples = int(counts.sum())
+        if not self.n_samples:
+            return self
+        
+        # Fleet-wide profile per hour
+        hour_count = np.bincount(hours, weights=counts, minlength=HOURS_PER_DAY)
+        hour_pace = np.bincount(hours, weights=pace_sums, minlength=HOURS_PER_DAY)
+        overall_speed = counts.sum() / pace_sums.sum()
+        self.hourly_speed = np.where(
+            hour_count > 0, hour_count / np.maximum(hour_pace, 1e-12), overall_speed
+        )
+        
+        # Per-region profile, shrunk toward the hourly profile
+        unique_cells, region = np.unique(cells, axis=0, return_inverse=True)
+        region = region.reshape(-1)
+        self.region_index = {(int(row), int(col)): idx for idx, (row, col) in enumerate(unique_cells)}
+        
+        count = np.zeros((len(unique_cells), HOURS_PER_DAY))
+        pace_sum = np.zeros((len(unique_cells), HOURS_PER_DAY))
+        np.add.at(count, (region, hours), counts)
+        np.add.at(pace_sum, (region, hours), pace_sums)
+        
+        prior_pace = 1.0 / self.hourly_speed
+        blended_pace = (pace_sum + self.min_samples * prior_pace) / (count + self.min_samples)
+        self.region_speed = 1.0 / blended_pace
+        
+        return self
+    
+    async def load_from_db(self, db: AsyncSession, days: int = 28) -> "TravelTimeModel":
+        """
+        Fit the model on the last `days` of GPS logs
+        
+        Samples are totalled per (region, hour) in the database, so only a
+        few thousand groups are transferred instead of every log row.
+        
+        Args:
+            db: Database session
+            days: History window in days
+        """
+        # gps_logs.timestamp is naive UTC; profiles are by local hour of day
+        since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+        utc_offset_hours = round(datetime.now().astimezone().utcoffset().total_seconds() / 3600)
+        result = await db.execute(
+            select(
+                func.floor(GPSLog.latitude / self.region_cell_deg).label("cell_row"),
+                func.floor(GPSLog.longitude / self.region_cell_deg).label("cell_col"),
+                extract("hour", GPSLog.timestamp).label("hour_of_day"),
+                func.count().label("samples"),
+                func.sum(1.0 / GPSLog.speed_kmh).label("pace_sum"),
+            )
+            .where(
+                GPSLog.timestamp >= since,
+                GPSLog.speed_kmh.between(MIN_MOVING_SPEED_KMH, MAX_SPEED_KMH),
+            )
+            .group_by(literal_column("cell_row"), literal_column("cell_col"), literal_column("hour_of_day"))
+        )
+        groups = result.all()
+        
+        if not groups:
+            return self
+        
+        return self.fit_aggregated(
+            [(int(group.cell_row), int(group.cell_col)) for group in groups],
+            [int(group.hour_of_day) + utc_offset_hours for group in groups],
+            [group.samples for group in groups],
+            [float(group.pace_sum) for group in groups],
+        )
+    
+    def speed_kmh(
+        self,
+        locations: List[Tuple[float, float]],
+        departure: Union[datetime, int, None] = None
+    ) -> np.ndarray:
+        """Expected driving speed around each location at the departure hour"""
+        hour = self._hour(departure)
+        points = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+        speeds = np.full(len(points), self.hourly_speed[hour])
+        
+        if self.region_index:
+            for idx, (row, col) in enumerate(self._cells(points[:, 0], points[:, 1])):
+                region = self.region_index.get((int(row), int(col)))
+                if region is not None:
+                    speeds[idx] = self.region_speed[region, hour]
+        
+        return speeds
+    
+    def duration_matrix(
+        self,
+        origins: List[Tuple[float, float]],
+        destinations: Optional[List[Tuple[float, float]]] = None,
+        departure: Union[datetime, int, None] = None,
+        distance_km: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Travel-time matrix without any API calls
+        
+        Args:
+            origins: List of origin coordinates [(lat, lon), ...]
+            destinations: List of destination coordinates (defaults to origins)
+            departure: Departure time or hour of day (default: now)
+            distance_km: Road distances; straight-line distance times
+                detour_factor when omitted
+        
+        Returns:
+            float64 array (n_origins, n_destinations) in minutes
+        """
+        if distance_km is None:
+            distance_km = haversine_matrix(origins, destinations) * self.detour_factor
+        
+        origin_speed = self.speed_kmh(origins, departure)
+        destination_speed = origin_speed if destinations is None else self.speed_kmh(destinations, departure)
+        speed = (origin_speed[:, np.newaxis] + destination_speed[np.newaxis, :]) / 2
+        
+        return np.asarray(distance_km, dtype=np.float64) / speed * 60
+    
+    def build(
+        self,
+        origins: List[Tuple[float, float]],
+        destinations: Optional[List[Tuple[float, float]]] = None,
+        departure: Union[datetime, int, None] = None
+    ) -> Dict:
+        """
+        Build solver-ready matrices for a departure time
+        
+        Returns:
+            Dict with int32 distance_matrix (meters) and time_matrix (minutes),
+            in the same format as DistanceMatrixEngine.build
+        """
+        distance_km = haversine_matrix(origins, destinations) * self.detour_factor
+        duration_minutes = self.duration_matrix(origins, destinations, departure, distance_km)
+        
+        return {
+            "status": "success",
+            "distance_matrix": np.rint(distance_km * 1000).astype(np.int32),
+            "time_matrix": np.rint(duration_minutes).astype(np.int32),
+            "distance_unit": "m",
+            "n_origins": distance_km.shape[0],
+            "n_destinations": distance_km.shape[1],
+            "departure_hour": self._hour(departure),
+        }
+    
+    def save(self, path: str):
+        """Persist the fitted profiles to an .npz file"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        cells = np.array(list(self.region_index), dtype=np.int64).reshape(-1, 2)
+        
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                params=np.array([self.region_cell_deg, self.min_samples, self.detour_factor,
+                                 self.default_speed_kmh, self.n_samples]),
+                hourly_speed=self.hourly_speed,
+                region_cells=cells,
+                region_speed=self.region_speed,
+            )
+    
+    @classmethod
+    def load_file(cls, path: str) -> "TravelTimeModel":
+        """Load profiles written by save()"""
+        with np.load(path) as data:
+            region_cell_deg, min_samples, detour_factor, default_speed_kmh, n_samples = data["params"]
+            model = cls(float(region_cell_deg), int(min_samples), float(detour_factor), float(default_speed_kmh))
+            model.n_samples = int(n_samples)
+            model.hourly_speed = data["hourly_speed"]
+            model.region_speed = data["region_speed"]
+            model.region_index = {
+                (int(row), int(col)): idx for idx, (row, col) in enumerate(data["region_cells"])
+            }
+        
+        return model
+    
+    def _cells(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        """Grid cell (row, col) of each point"""
+        return np.stack([
+            np.floor(np.asarray(latitudes) / self.region_cell_deg),
+            np.floor(np.asarray(longitudes) / self.region_cell_deg),
+        ], axis=1).astype(np.int64)
+    
+    def _hour(self, departure: Union[datetime, int, None]) -> int:
+        if departure is None:
+            departure = datetime.now()
+        if isinstance(departure, datetime):
+            return departure.hour
+        return int(departure) % HOURS_PER_DAY
+
+
+_travel_time_model: Optional[TravelTimeModel] = None
+
+
+def get_travel_time_model() -> Optional[TravelTimeModel]:
+    """Get the fitted model saved at TRAVEL_TIME_MODEL_PATH, if any"""
+    global _travel_time_model
+    
+    if _travel_time_model is None and Path(settings.TRAVEL_TIME_MODEL_PATH).exists():
+        _travel_time_model = TravelTimeModel.load_file(settings.TRAVEL_TIME_MODEL_PATH)
+    
+    return _travel_time_model
+
+
+async def train_travel_time_model(db: AsyncSession, days: int = 28) -> TravelTimeModel:
+    """Refit the model from recent GPS logs, save it and make it the shared model"""
+    global _travel_time_model
+    
+    model = await TravelTimeModel().load_from_db(db, days=days)
+    if model.is_fitted:
+        model.save(settings.TRAVEL_TIME_MODEL_PATH)
+        _travel_time_model = model
+    
+    return model
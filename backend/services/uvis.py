@@ -1,85 +1,107 @@
 import httpx
 import asyncio
+import logging
 from typing import List, Dict, Optional
 from datetime import datetime
 from config.settings import get_settings
 from config.redis import RedisCache
+from config.serializers import get_serializer
+from config.http import get_http_client
+from utils.single_flight import SingleFlight
 
 settings = get_settings()
-cache = RedisCache(ttl=settings.UVIS_POLL_INTERVAL)
+cache = RedisCache(ttl=settings.UVIS_POLL_INTERVAL, serializer=get_serializer(settings.CACHE_SERIALIZER))
+location_flight = SingleFlight()
+logger = logging.getLogger(__name__)
 
 
 class UVISService:
     """Samsung UVIS GPS Tracking Service"""
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         self.api_url = settings.UVIS_API_URL
         self.api_key = settings.UVIS_API_KEY
         self.poll_interval = settings.UVIS_POLL_INTERVAL
-        
-    async def get_vehicle_location(self, device_id: str) -> Optional[Dict]:
+        self.timeout = settings.UVIS_TIMEOUT_SECONDS
+        # Defaults to the application-wide pooled client
+        self.http_client = http_client
+    
+    async def get_vehicle_location(self, device_id: str, use_cache: bool = True) -> Optional[Dict]:
         """
         Get current location of a vehicle by UVIS device ID
         
         Args:
             device_id: UVIS device identifier
-            
+            use_cache: Serve a cached location if fresh; False always asks
+                UVIS (the result is cached either way)
+        
         Returns:
             Dict with GPS data (latitude, longitude, speed, temperature, etc.)
         """
-        # Check cache first
         cache_key = f"uvis:location:{device_id}"
-        cached = await cache.get_json(cache_key)
-        if cached:
-            return cached
+        
+        # Concurrent callers for the same device share one lookup/request
+        return await location_flight.do(
+            cache_key, lambda: self._get_vehicle_location(cache_key, device_id, use_cache)
+        )
+    
+    async def _get_vehicle_location(self, cache_key: str, device_id: str, use_cache: bool) -> Optional[Dict]:
+        if use_cache:
+            # Check cache first
+            cached = await cache.get_json(cache_key)
+            if cached:
+                return cached
         
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                }
-                
-                # NOTE: This is a placeholder URL structure
-                # Actual UVIS API endpoint should be verified
-                url = f"{self.api_url}/vehicles/{device_id}/location"
+            client = self.http_client or get_http_client()
+            headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            }
+            
+            # NOTE: This is a placeholder URL structure
+            # Actual UVIS API endpoint should be verified
+            url = f"{self.api_url}/vehicles/{device_id}/location"
+            
+            response = await client.get(
+                url,
+                headers=headers,
+                timeout=self.timeout
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
                 
-                response = await client.get(
-                    url,
-                    headers=headers,
-                    timeout=10.0
-                )
+                result = {
+                    "status": "success",
+                    "device_id": device_id,
+                    "timestamp": data.get("timestamp"),
+                    "latitude": data.get("latitude"),
+                    "longitude": data.get("longitude"),
+                    "altitude": data.get("altitude"),
+                    "speed_kmh": data.get("speed"),
+                    "heading": data.get("heading"),
+                    "compartment1_temp": data.get("temperature1"),
+                    "compartment2_temp": data.get("temperature2"),
+                    "engine_on": data.get("engineOn"),
+                    "door_open": data.get("doorOpen"),
+                    "refrigerator_on": data.get("refrigeratorOn"),
+                    "odometer_km": data.get("odometer"),
+                }
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    result = {
-                        "status": "success",
-                        "device_id": device_id,
-                        "timestamp": data.get("timestamp"),
-                        "latitude": data.get("latitude"),
-                        "longitude": data.get("longitude"),
-                        "altitude": data.get("altitude"),
-                        "speed_kmh": data.get("speed"),
-                        "heading": data.get("heading"),
-                        "compartment1_temp": data.get("temperature1"),
-                        "compartment2_temp": data.get("temperature2"),
-                        "engine_on": data.get("engineOn"),
-                        "door_open": data.get("doorOpen"),
-                        "refrigerator_on": data.get("refrigeratorOn"),
-                        "odometer_km": data.get("odometer"),
-                    }
-                    
-                    # Cache the result
+                # Cache the result; a Redis outage must not fail the poll
+                try:
                     await cache.set_json(cache_key, result, ttl=self.poll_interval)
-                    
-                    return result
-                else:
-                    return {
-                        "status": "error",
-                        "error": f"UVIS API returned status code {response.status_code}",
-                    }
-                    
+                except Exception as e:
+                    logger.warning(f"Could not cache UVIS location for {device_id}: {e}")
+                
+                return result
+            else:
+                return {
+                    "status": "error",
+                    "error": f"UVIS API returned status code {response.status_code}",
+                }
+        
         except httpx.TimeoutException:
             return {
                 "status": "error",
@@ -97,7 +119,7 @@ class UVISService:
         
         Args:
             device_ids: List of UVIS device identifiers
-            
+        
         Returns:
             List of GPS data for each vehicle
         """
@@ -121,7 +143,7 @@ class UVISService:
             device_id: UVIS device identifier
             target_temp: Target temperature in Celsius
             tolerance: Acceptable temperature deviation
-            
+        
         Returns:
             True if temperature alarm should be triggered
         """
@@ -141,7 +163,7 @@ class UVISService:
         
         Args:
             raw_data: Raw GPS data from UVIS API
-            
+        
         Returns:
             Normalized GPS data dict
         """
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import random
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import select
+from config.settings import get_settings
+from config.database import AsyncSessionLocal
+from models.vehicle import Vehicle
+from services.uvis import UVISService
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class UVISPoller:
+    """
+    Background poller streaming UVIS positions to an asyncio queue
+    
+    Every device runs on its own timer, started at a random offset and
+    re-armed with jitter, so requests are spread out instead of bursting
+    every UVIS_POLL_INTERVAL. Moving vehicles are polled more often than
+    parked ones.
+    """
+    
+    def __init__(
+        self,
+        uvis_service: Optional[UVISService] = None,
+        queue: Optional[asyncio.Queue] = None,
+        moving_interval: float = None,
+        idle_interval: float = None,
+        parked_interval: float = None,
+        jitter: float = None
+    ):
+        self.uvis = uvis_service or UVISService()
+        self.queue = queue or asyncio.Queue(maxsize=settings.UVIS_QUEUE_MAX_SIZE)
+        self.moving_interval = moving_interval or settings.UVIS_POLL_INTERVAL_MOVING
+        self.idle_interval = idle_interval or settings.UVIS_POLL_INTERVAL
+        self.parked_interval = parked_interval or settings.UVIS_POLL_INTERVAL_PARKED
+        self.jitter = settings.UVIS_POLL_JITTER if jitter is None else jitter
+        
+        self._tasks: Dict[str, asyncio.Task] = {}  # device_id -> polling task
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._last_timestamp: Dict[str, str] = {}
+        self.polls = 0
+        self.errors = 0
+        self.published = 0
+        self.dropped = 0
+    
+    @property
+    def is_running(self) -> bool:
+        return self._refresh_task is not None and not self._refresh_task.done()
+    
+    async def start(self):
+        """Start polling active vehicles, refreshing the device list periodically"""
+        if not self.is_running:
+            self._refresh_task = asyncio.create_task(self._refresh_devices())
+    
+    async def stop(self):
+        """Cancel the refresh loop and every device timer"""
+        tasks = list(self._tasks.values())
+        if self._refresh_task:
+            tasks.append(self._refresh_task)
+        
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        self._tasks.clear()
+        self._refresh_task = None
+    
+    def set_devices(self, devices: Dict[str, str]):
+        """
+        Poll exactly the given devices
+        
+        Args:
+            devices: Mapping of uvis_device_id -> vehicle_id
+        """
+        for device_id in list(self._tasks):
+            if device_id not in devices:
+                self._tasks.pop(device_id).cancel()
+                self._last_timestamp.pop(device_id, None)
+        
+        for device_id, vehicle_id in devices.items():
+            if device_id not in self._tasks:
+                self._tasks[device_id] = asyncio.create_task(self._poll_device(device_id, vehicle_id))
+    
+    def next_interval(self, fix: Dict) -> float:
+        """
+        Base polling interval after a fix
+        
+        Moving (speed > 0): UVIS_POLL_INTERVAL_MOVING; engine off:
+        UVIS_POLL_INTERVAL_PARKED; stopped with engine on or unknown:
+        UVIS_POLL_INTERVAL.
+        """
+        if fix.get("status") != "success":
+            return self.idle_interval
+        if fix.get("engine_on") is False:
+            return self.parked_interval
+        if (fix.get("speed_kmh") or 0) > 0:
+            return self.moving_interval
+        return self.idle_interval
+    
+    def stats(self) -> Dict:
+        return {
+            "running": self.is_running,
+            "devices": len(self._tasks),
+            "polls": self.polls,
+            "errors": self.errors,
+            "published": self.published,
+            "dropped": self.dropped,
+            "queue_size": self.queue.qsize(),
+        }
+    
+    async def _refresh_devices(self):
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    result = await db.execute(
+                        select(Vehicle.uvis_device_id, Vehicle.vehicle_id)
+                        .where(Vehicle.is_active.is_(True), Vehicle.uvis_device_id.isnot(None))
+                    )
+                    self.set_devices({row.uvis_device_id: row.vehicle_id for row in result.all()})
+            except Exception as e:
+                logger.warning(f"UVIS poller could not load vehicles: {e}")
+            
+            await asyncio.sleep(settings.UVIS_DEVICE_REFRESH_SECONDS)
+    
+    async def _poll_device(self, device_id: str, vehicle_id: str):
+        # Random start offset spreads the fleet over one interval
+        await asyncio.sleep(random.uniform(0, self.idle_interval))
+        failures = 0
+        
+        while True:
+            fix = await self.uvis.get_vehicle_location(device_id, use_cache=False)
+            self.polls += 1
+            
+            if fix.get("status") == "success":
+                failures = 0
+                self._publish(vehicle_id, fix)
+                interval = self.next_interval(fix)
+            else:
+                # Back off on a failing device, up to the parked interval
+                self.errors += 1
+                failures += 1
+                interval = min(self.idle_interval * 2 ** (failures - 1), self.parked_interval)
+            
+            await asyncio.sleep(interval * random.uniform(1 - self.jitter, 1 + self.jitter))
+    
+    def _publish(self, vehicle_id: str, fix: Dict):
+        device_id = fix["device_id"]
+        timestamp = fix.get("timestamp")
+        
+        # The device has not reported since the last poll
+        if timestamp is not None and self._last_timestamp.get(device_id) == timestamp:
+            return
+        self._last_timestamp[device_id] = timestamp
+        
+        event = {**fix, "vehicle_id": vehicle_id, "received_at": datetime.now().isoformat()}
+        
+        # Keep the newest fixes when consumers fall behind
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+        self.published += 1
+
+
+_uvis_poller: Optional[UVISPoller] = None
+
+
+def get_uvis_poller() -> UVISPoller:
+    """Get the shared UVIS poller instance"""
+    global _uvis_poller
+    
+    if _uvis_poller is None:
+        _uvis_poller = UVISPoller()
+    
+    return _uvis_poller
@@ -1,26 +1,61 @@
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Callable, AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+import asyncio
 import math
+import os
+import threading
+import time
+import numpy as np
 from config.settings import get_settings
+from services.distance_matrix import DistanceMatrixEngine
 
 settings = get_settings()
 
+TEMPERATURE_ZONES = ['frozen', 'chilled', 'ambient']
+
+DISTANCE_UNIT_METERS = {'km': 1000, 'm': 1}
+
+# (first solution strategy, local search metaheuristic) pairs raced by solve_portfolio
+PORTFOLIO_CONFIGURATIONS = [
+    ("PATH_CHEAPEST_ARC", "GUIDED_LOCAL_SEARCH"),
+    ("SAVINGS", "GUIDED_LOCAL_SEARCH"),
+    ("PARALLEL_CHEAPEST_INSERTION", "GUIDED_LOCAL_SEARCH"),
+    ("PATH_CHEAPEST_ARC", "SIMULATED_ANNEALING"),
+    ("SAVINGS", "TABU_SEARCH"),
+    ("PARALLEL_CHEAPEST_INSERTION", "TABU_SEARCH"),
+]
+
 
 class VRPSolver:
     """Vehicle Routing Problem Solver using Google OR-Tools"""
     
-    def __init__(self):
+    def __init__(self, use_transit_matrices: bool = None, capacity_headroom: float = 1.2):
         self.settings = settings
-        
+        # Register integer tables with OR-Tools instead of Python callbacks
+        if use_transit_matrices is None:
+            use_transit_matrices = settings.ORTOOLS_USE_TRANSIT_MATRICES
+        self.use_transit_matrices = use_transit_matrices
+        # Spare pallet capacity targeted per sub-problem when splitting the fleet
+        self.capacity_headroom = capacity_headroom
+    
     def solve(
         self,
         vehicles: List[Dict],
         orders: List[Dict],
         distance_matrix: List[List[float]],
         time_matrix: List[List[float]],
-        depot_location: Tuple[float, float] = None
+        depot_location: Tuple[float, float] = None,
+        initial_routes: Optional[List[List[int]]] = None,
+        time_limit_seconds: int = None,
+        first_solution_strategy: str = None,
+        local_search_metaheuristic: str = None,
+        on_solution: Callable[[Dict], None] = None,
+        stop_event: threading.Event = None,
+        paired: bool = False,
+        distance_unit: str = "km"
     ) -> Optional[Dict]:
         """
         Solve VRP problem with multiple constraints
@@ -28,17 +63,46 @@ class VRPSolver:
         Args:
             vehicles: List of vehicle dicts with capacity and constraints
             orders: List of order dicts with pickup/delivery requirements
-            distance_matrix: Matrix of distances between all locations (km)
+            distance_matrix: Matrix of distances between all locations, in
+                distance_unit. 1 + N rows (pickups only), or 1 + 2N rows when paired
             time_matrix: Matrix of travel times between all locations (minutes)
             depot_location: Starting depot coordinates (optional)
-            
+            initial_routes: Optional per-vehicle lists of order indices used as
+                the starting solution; unlisted orders are inserted by the
+                first solution strategy. With paired nodes an order's second
+                occurrence is its delivery (default: right after the pickup)
+            time_limit_seconds: Search time limit (default ORTOOLS_TIME_LIMIT_SECONDS)
+            first_solution_strategy: FirstSolutionStrategy name (default PATH_CHEAPEST_ARC)
+            local_search_metaheuristic: LocalSearchMetaheuristic name (default GUIDED_LOCAL_SEARCH)
+            on_solution: Called with each improving solution (objective_value,
+                elapsed_seconds, solution) while the search runs
+            stop_event: When set, the search stops and returns the best plan so far
+            paired: Matrices follow the node_locations layout with a separate
+                delivery node per order, visited after its pickup by the same vehicle
+            distance_unit: "km" or "m" (DistanceMatrixEngine and MatrixStore
+                matrices are in meters)
+        
         Returns:
             Dict with optimized routes for each vehicle
         """
         
+        distance_m, time_min = self._prepare_matrices(distance_matrix, time_matrix, distance_unit)
+        distance_km = distance_m / 1000
+        time_minutes = np.asarray(time_matrix, dtype=np.float64)
+        
+        # Nested lists keep per-call indexing cheap inside the callbacks
+        distance_table = distance_m.tolist()
+        time_table = time_min.tolist()
+        
         # Create routing index manager
         num_vehicles = len(vehicles)
-        num_locations = len(distance_matrix)
+        num_locations = len(distance_m)
+        n_orders = len(orders)
+        pickup_and_delivery = paired
+        if paired and num_locations != 1 + 2 * n_orders:
+            raise ValueError(
+                f"Paired layout needs {1 + 2 * n_orders} locations for {n_orders} orders, got {num_locations}"
+            )
         
         # Create depot index (0 = depot)
         depot_index = 0
@@ -52,25 +116,31 @@ class VRPSolver:
         # Create routing model
         routing = pywrapcp.RoutingModel(manager)
         
-        # Create distance callback
-        def distance_callback(from_index, to_index):
-            """Returns the distance between the two nodes."""
-            from_node = manager.IndexToNode(from_index)
-            to_node = manager.IndexToNode(to_index)
-            return int(distance_matrix[from_node][to_node] * 1000)  # Convert to meters
+        if self.use_transit_matrices:
+            # Pre-scaled integer tables evaluated natively, no Python per arc
+            transit_callback_index = routing.RegisterTransitMatrix(distance_table)
+            time_callback_index = routing.RegisterTransitMatrix(time_table)
+        else:
+            # Create distance callback
+            def distance_callback(from_index, to_index):
+                """Returns the distance between the two nodes."""
+                from_node = manager.IndexToNode(from_index)
+                to_node = manager.IndexToNode(to_index)
+                return distance_table[from_node][to_node]  # Meters
+            
+            transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+            
+            # Create time callback
+            def time_callback(from_index, to_index):
+                """Returns the travel time between the two nodes."""
+                from_node = manager.IndexToNode(from_index)
+                to_node = manager.IndexToNode(to_index)
+                return time_table[from_node][to_node]  # Minutes
+            
+            time_callback_index = routing.RegisterTransitCallback(time_callback)
         
-        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
         routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
         
-        # Create time callback
-        def time_callback(from_index, to_index):
-            """Returns the travel time between the two nodes."""
-            from_node = manager.IndexToNode(from_index)
-            to_node = manager.IndexToNode(to_index)
-            return int(time_matrix[from_node][to_node])  # Minutes
-        
-        time_callback_index = routing.RegisterTransitCallback(time_callback)
-        
         # Add time dimension (for time windows)
         time_dimension_name = 'Time'
         routing.AddDimension(
@@ -84,28 +154,37 @@ class VRPSolver:
         
         # Add time windows for orders
         for order_idx, order in enumerate(orders):
-            # Node index in routing (skip depot at index 0)
-            node_index = order_idx + 1
-            index = manager.NodeToIndex(node_index)
+            # Node indices in routing (skip depot at index 0)
+            pickup_node, delivery_node = self._order_nodes(order_idx, n_orders)
+            index = manager.NodeToIndex(pickup_node)
             
             # Parse time windows
             pickup_start = self._parse_time(order.get('pickup_time_start', '06:00'))
             pickup_end = self._parse_time(order.get('pickup_time_end', '20:00'))
             
             time_dimension.CumulVar(index).SetRange(pickup_start, pickup_end)
+            
+            if pickup_and_delivery:
+                delivery_start = self._parse_time(order.get('delivery_time_start', '06:00'))
+                delivery_end = self._parse_time(order.get('delivery_time_end', '20:00'))
+                
+                time_dimension.CumulVar(manager.NodeToIndex(delivery_node)).SetRange(delivery_start, delivery_end)
         
         # Add capacity dimension (pallets)
-        def demand_callback(from_index):
-            """Returns the demand of the node."""
-            from_node = manager.IndexToNode(from_index)
-            if from_node == 0:  # Depot
-                return 0
-            order_idx = from_node - 1
-            if order_idx < len(orders):
-                return orders[order_idx].get('required_pallets', 0)
-            return 0
+        pallets = [order.get('required_pallets', 0) for order in orders]
+        demands = [0] + pallets  # Depot first
+        if pickup_and_delivery:
+            demands += [-pallet_count for pallet_count in pallets]  # Unloaded at delivery
+        demands += [0] * (num_locations - len(demands))
         
-        demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
+        if self.use_transit_matrices:
+            demand_callback_index = routing.RegisterUnaryTransitVector(demands)
+        else:
+            def demand_callback(from_index):
+                """Returns the demand of the node."""
+                return demands[manager.IndexToNode(from_index)]
+            
+            demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
         
         routing.AddDimensionWithVehicleCapacity(
             demand_callback_index,
@@ -115,54 +194,840 @@ class VRPSolver:
             'Capacity'
         )
         
-        # Add temperature constraints
-        def temperature_callback(from_index):
-            """Returns temperature type of the node."""
-            from_node = manager.IndexToNode(from_index)
-            if from_node == 0:  # Depot
-                return 0  # Neutral
-            order_idx = from_node - 1
-            if order_idx < len(orders):
-                temp_type = orders[order_idx].get('temperature_type', 'frozen')
-                return self._temperature_to_int(temp_type)
-            return 0
+        # Pair pickups with deliveries: same vehicle, pickup first
+        if pickup_and_delivery:
+            for order_idx in range(n_orders):
+                pickup_index, delivery_index = (
+                    manager.NodeToIndex(node) for node in self._order_nodes(order_idx, n_orders)
+                )
+                routing.AddPickupAndDelivery(pickup_index, delivery_index)
+                routing.solver().Add(
+                    routing.VehicleVar(pickup_index) == routing.VehicleVar(delivery_index)
+                )
+                routing.solver().Add(
+                    time_dimension.CumulVar(pickup_index) <= time_dimension.CumulVar(delivery_index)
+                )
         
         # Add vehicle-order compatibility constraints
         for vehicle_idx, vehicle in enumerate(vehicles):
             vehicle_temp_type = vehicle['vehicle_type']
             
             for order_idx, order in enumerate(orders):
-                node_index = order_idx + 1
-                index = manager.NodeToIndex(node_index)
-                
                 # Check temperature compatibility
                 if not self._is_temperature_compatible(order['temperature_type'], vehicle_temp_type):
                     # Disallow this vehicle for this order
-                    routing.VehicleVar(index).RemoveValue(vehicle_idx)
+                    for node_index in self._stop_nodes(order_idx, n_orders, pickup_and_delivery):
+                        routing.VehicleVar(manager.NodeToIndex(node_index)).RemoveValue(vehicle_idx)
+        
+        self._prune_arcs(manager, routing, vehicles, orders, pickup_and_delivery)
         
         # Set search parameters
-        search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-        search_parameters.first_solution_strategy = (
-            routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
-        )
-        search_parameters.local_search_metaheuristic = (
-            routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+        if pickup_and_delivery and not first_solution_strategy:
+            # Insertion heuristics handle pickup/delivery pairs far better than arc-based ones
+            first_solution_strategy = "PARALLEL_CHEAPEST_INSERTION"
+        search_parameters = self._search_parameters(
+            time_limit_seconds, first_solution_strategy, local_search_metaheuristic
         )
-        search_parameters.time_limit.seconds = settings.ORTOOLS_TIME_LIMIT_SECONDS
-        search_parameters.solution_limit = settings.ORTOOLS_SOLUTION_LIMIT
         
-        # Solve the problem
-        solution = routing.SolveWithParameters(search_parameters)
+        if on_solution or stop_event:
+            self._add_solution_monitor(
+                manager, routing, vehicles, orders, distance_km, time_minutes,
+                on_solution, stop_event
+            )
+        
+        # Solve the problem, warm-started from the given routes if any
+        if initial_routes:
+            solution = self._solve_from_routes(
+                manager, routing, initial_routes, search_parameters, n_orders, pickup_and_delivery
+            )
+        else:
+            solution = routing.SolveWithParameters(search_parameters)
         
         if solution:
-            return self._extract_solution(
-                manager, routing, solution, vehicles, orders, distance_matrix, time_matrix
+            result = self._extract_solution(
+                manager, routing, solution, vehicles, orders, distance_km, time_minutes
             )
         else:
-            return {
+            result = {
                 "status": "failed",
                 "error": "No solution found within time limit",
             }
+        
+        result["search_stats"] = self._search_stats(routing)
+        return result
+    
+    async def solve_stream(
+        self,
+        vehicles: List[Dict],
+        orders: List[Dict],
+        distance_matrix: List[List[float]],
+        time_matrix: List[List[float]],
+        **solve_kwargs
+    ) -> AsyncIterator[Dict]:
+        """
+        Run solve() in a worker thread and stream improving solutions
+        
+        Yields {"event": "improvement", "objective_value", "elapsed_seconds",
+        "solution"} for every better plan found, then {"event": "final",
+        "result"}. Closing the generator early (client disconnect, dispatcher
+        accepting a plan) stops the search.
+        
+        Args:
+            vehicles: List of vehicle dicts with capacity and constraints
+            orders: List of order dicts with pickup/delivery requirements
+            distance_matrix: Matrix of distances between all locations
+            time_matrix: Matrix of travel times between all locations (minutes)
+            **solve_kwargs: Extra keyword arguments passed to solve()
+        """
+        loop = asyncio.get_running_loop()
+        updates: asyncio.Queue = asyncio.Queue()
+        stop_event = threading.Event()
+        
+        def on_solution(update: Dict):
+            loop.call_soon_threadsafe(updates.put_nowait, {"event": "improvement", **update})
+        
+        search = loop.run_in_executor(
+            None,
+            lambda: self.solve(
+                vehicles, orders, distance_matrix, time_matrix,
+                on_solution=on_solution, stop_event=stop_event, **solve_kwargs
+            )
+        )
+        search.add_done_callback(lambda _: updates.put_nowait(None))
+        
+        try:
+            while True:
+                update = await updates.get()
+                if update is None:
+                    break
+                yield update
+            
+            yield {"event": "final", "result": await search}
+        finally:
+            stop_event.set()
+            # The worker thread stops promptly once signalled; do not let it outlive the stream
+            if not search.done():
+                await asyncio.wait([search])
+    
+    def resolve(
+        self,
+        previous_result: Dict,
+        vehicles: List[Dict],
+        orders: List[Dict],
+        distance_matrix: List[List[float]],
+        time_matrix: List[List[float]],
+        time_limit_seconds: int = None,
+        paired: bool = False,
+        distance_unit: str = "km"
+    ) -> Optional[Dict]:
+        """
+        Incrementally re-dispatch after orders were added or cancelled
+        
+        The routes of the previous solution seed the search: cancelled orders
+        are dropped from them, new orders are inserted into the existing plan
+        and the result is re-optimized under a short time limit.
+        
+        Args:
+            previous_result: Result dict returned by an earlier solve()
+            vehicles: List of vehicle dicts with capacity and constraints
+            orders: Current order list (orders with status "cancelled" are removed)
+            distance_matrix: Distance matrix aligned with `orders` (depot at 0)
+            time_matrix: Travel time matrix aligned with `orders` (depot at 0)
+            time_limit_seconds: Search time limit (default ORTOOLS_REDISPATCH_TIME_LIMIT_SECONDS)
+            paired: Matrices hold separate delivery nodes (see solve)
+            distance_unit: Unit of distance_matrix, "km" or "m"
+        
+        Returns:
+            Dict with optimized routes and a "redispatch" change summary
+        """
+        active = [
+            order_idx for order_idx, order in enumerate(orders)
+            if order.get('status') != 'cancelled'
+        ]
+        active_orders = [orders[order_idx] for order_idx in active]
+        node_indices = self._order_node_indices(active, len(orders), paired)
+        distance_sub, time_sub = self._slice_matrices(distance_matrix, time_matrix, node_indices)
+        
+        # Map previous stops onto the new order positions
+        order_positions = {order['order_id']: pos for pos, order in enumerate(active_orders)}
+        previous_routes = {route['vehicle_id']: route for route in previous_result.get('routes', [])}
+        
+        initial_routes = []
+        for vehicle in vehicles:
+            route = previous_routes.get(vehicle['vehicle_id'])
+            stops = route['stops'] if route else []
+            initial_routes.append([
+                order_positions[stop['order_id']]
+                for stop in stops
+                if stop['order_id'] in order_positions
+            ])
+        
+        seeded = {pos for route in initial_routes for pos in route}
+        previous_order_ids = {
+            stop['order_id']
+            for route in previous_result.get('routes', [])
+            for stop in route['stops']
+        }
+        
+        result = self.solve(
+            vehicles,
+            active_orders,
+            distance_sub,
+            time_sub,
+            initial_routes=initial_routes,
+            time_limit_seconds=time_limit_seconds or settings.ORTOOLS_REDISPATCH_TIME_LIMIT_SECONDS,
+            paired=paired,
+            distance_unit=distance_unit,
+        )
+        
+        result["redispatch"] = {
+            "kept_orders": len(seeded),
+            "inserted_orders": [
+                order['order_id'] for pos, order in enumerate(active_orders) if pos not in seeded
+            ],
+            "removed_orders": sorted(previous_order_ids - set(order_positions)),
+        }
+        
+        return result
+    
+    def solve_decomposed(
+        self,
+        vehicles: List[Dict],
+        orders: List[Dict],
+        distance_matrix: List[List[float]],
+        time_matrix: List[List[float]],
+        time_limit_seconds: int = None,
+        max_workers: int = None,
+        paired: bool = False,
+        distance_unit: str = "km"
+    ) -> Optional[Dict]:
+        """
+        Solve temperature zones as independent sub-problems in parallel
+        
+        Orders are split into frozen/chilled/ambient zones. Dedicated vehicles
+        stay in their zone, while frozen trucks (which can carry chilled cargo)
+        and multi-chamber trucks form shared pools that are lent to the zones
+        short on pallet capacity. Each zone is solved in its own process and
+        the routes are merged.
+        
+        Args:
+            vehicles: List of vehicle dicts with capacity and constraints
+            orders: List of order dicts with pickup/delivery requirements
+            distance_matrix: Distance matrix aligned with `orders` (depot at 0)
+            time_matrix: Travel time matrix aligned with `orders` (depot at 0)
+            time_limit_seconds: Search time limit per zone
+            max_workers: Process pool size (default ORTOOLS_PARALLEL_WORKERS)
+            paired: Matrices hold separate delivery nodes (see solve)
+            distance_unit: Unit of distance_matrix, "km" or "m"
+        
+        Returns:
+            Dict with merged routes and per-zone "subproblems" details
+        """
+        partitions = self._partition_by_temperature(vehicles, orders)
+        
+        return self._solve_partitions(
+            partitions, vehicles, orders, distance_matrix, time_matrix,
+            time_limit_seconds, max_workers, paired, distance_unit
+        )
+    
+    def solve_portfolio(
+        self,
+        vehicles: List[Dict],
+        orders: List[Dict],
+        distance_matrix: List[List[float]],
+        time_matrix: List[List[float]],
+        configurations: List[Tuple[str, str]] = None,
+        time_limit_seconds: int = None,
+        max_workers: int = None,
+        paired: bool = False,
+        distance_unit: str = "km"
+    ) -> Optional[Dict]:
+        """
+        Race several search configurations across CPU cores and keep the best
+        
+        Each (first solution strategy, metaheuristic) pair runs in its own
+        process. The time budget is split into as many rounds as needed to run
+        every configuration on the available workers.
+        
+        Args:
+            vehicles: List of vehicle dicts with capacity and constraints
+            orders: List of order dicts with pickup/delivery requirements
+            distance_matrix: Matrix of distances between all locations
+            time_matrix: Matrix of travel times between all locations (minutes)
+            configurations: Strategy/metaheuristic name pairs (default PORTFOLIO_CONFIGURATIONS)
+            time_limit_seconds: Total time budget (default ORTOOLS_TIME_LIMIT_SECONDS)
+            max_workers: Process pool size (default ORTOOLS_PARALLEL_WORKERS)
+            paired: Matrices hold separate delivery nodes (see solve)
+            distance_unit: Unit of distance_matrix, "km" or "m"
+        
+        Returns:
+            Best result, with a "portfolio" entry naming the winning configuration
+        """
+        configurations = configurations or PORTFOLIO_CONFIGURATIONS
+        workers = min(
+            max_workers or settings.ORTOOLS_PARALLEL_WORKERS or os.cpu_count() or 1,
+            len(configurations)
+        )
+        rounds = math.ceil(len(configurations) / workers)
+        run_time_limit = max(1, (time_limit_seconds or settings.ORTOOLS_TIME_LIMIT_SECONDS) // rounds)
+        
+        payloads = [
+            {
+                "use_transit_matrices": self.use_transit_matrices,
+                "vehicles": vehicles,
+                "orders": orders,
+                "distance_matrix": distance_matrix,
+                "time_matrix": time_matrix,
+                "time_limit_seconds": run_time_limit,
+                "paired": paired,
+                "distance_unit": distance_unit,
+                "first_solution_strategy": first_solution_strategy,
+                "local_search_metaheuristic": local_search_metaheuristic,
+            }
+            for first_solution_strategy, local_search_metaheuristic in configurations
+        ]
+        results = self._run_subproblems(payloads, workers)
+        
+        runs = [
+            {
+                "first_solution_strategy": payload['first_solution_strategy'],
+                "local_search_metaheuristic": payload['local_search_metaheuristic'],
+                "time_limit_seconds": run_time_limit,
+                "status": result['status'],
+                "objective_value": result.get('objective_value'),
+            }
+            for payload, result in zip(payloads, results)
+        ]
+        successful = [idx for idx, result in enumerate(results) if result['status'] == 'success']
+        
+        if not successful:
+            return {
+                "status": "failed",
+                "error": "No configuration found a solution within time limit",
+                "portfolio": {"winner": None, "runs": runs},
+            }
+        
+        best_idx = min(successful, key=lambda idx: results[idx]['objective_value'])
+        best = results[best_idx]
+        best["portfolio"] = {
+            "winner": {
+                "first_solution_strategy": runs[best_idx]['first_solution_strategy'],
+                "local_search_metaheuristic": runs[best_idx]['local_search_metaheuristic'],
+            },
+            "runs": runs,
+        }
+        
+        return best
+    
+    def solve_clustered(
+        self,
+        vehicles: List[Dict],
+        orders: List[Dict],
+        distance_matrix: List[List[float]] = None,
+        time_matrix: List[List[float]] = None,
+        depot_location: Tuple[float, float] = None,
+        n_clusters: int = None,
+        method: str = "sweep",
+        time_limit_seconds: int = None,
+        max_workers: int = None,
+        paired: bool = False,
+        distance_unit: str = "km"
+    ) -> Optional[Dict]:
+        """
+        Cluster-first, route-second solving for large order sets
+        
+        Orders are grouped by pickup location (and time window for k-means),
+        each cluster gets a temperature-compatible subset of the fleet, and the
+        clusters are solved in parallel. Orders need pickup_latitude and
+        pickup_longitude; without matrices, per-cluster haversine matrices are
+        built so the full N x N matrix is never required (with delivery nodes
+        from delivery_latitude/delivery_longitude when paired).
+        
+        Args:
+            vehicles: List of vehicle dicts with capacity and constraints
+            orders: List of order dicts with pickup coordinates
+            distance_matrix: Optional full distance matrix (depot at 0)
+            time_matrix: Optional full travel time matrix (depot at 0)
+            depot_location: Depot coordinates (default: centroid of pickups)
+            n_clusters: Number of clusters (default from ORTOOLS_MAX_ORDERS_PER_CLUSTER)
+            method: "sweep" (polar angle around depot) or "kmeans"
+            time_limit_seconds: Search time limit per cluster
+            max_workers: Process pool size (default ORTOOLS_PARALLEL_WORKERS)
+            paired: Matrices (given or built) hold separate delivery nodes (see solve)
+            distance_unit: Unit of a given distance_matrix, "km" or "m"
+        
+        Returns:
+            Dict with merged routes and per-cluster "subproblems" details;
+            orders no vehicle of their cluster can carry are listed in
+            "unassigned_orders"
+        """
+        if not orders:
+            return {**self._merge_results([], vehicles), "subproblems": [], "unassigned_orders": []}
+        
+        coordinates = np.array(
+            [[order['pickup_latitude'], order['pickup_longitude']] for order in orders],
+            dtype=np.float64
+        ).reshape(-1, 2)
+        if depot_location is None:
+            depot_location = tuple(coordinates.mean(axis=0)) if len(orders) else (0.0, 0.0)
+        if n_clusters is None:
+            n_clusters = math.ceil(len(orders) / settings.ORTOOLS_MAX_ORDERS_PER_CLUSTER)
+        n_clusters = max(1, min(n_clusters, len(orders), len(vehicles)))
+        
+        if method == "kmeans":
+            labels = self._kmeans_clusters(orders, coordinates, n_clusters)
+        elif method == "sweep":
+            labels = self._sweep_clusters(orders, coordinates, depot_location, n_clusters)
+        else:
+            raise ValueError(f"Unknown clustering method: {method}")
+        
+        clusters = [np.flatnonzero(labels == label).tolist() for label in range(n_clusters)]
+        clusters = [order_indices for order_indices in clusters if order_indices]
+        vehicle_allocation = self._allocate_vehicles(vehicles, orders, clusters)
+        
+        partitions = []
+        incompatible = []
+        for cluster_idx, (order_indices, vehicle_indices) in enumerate(zip(clusters, vehicle_allocation)):
+            # Orders no vehicle of the cluster can carry would make the whole cluster infeasible
+            vehicle_types = {vehicles[vehicle_idx]['vehicle_type'] for vehicle_idx in vehicle_indices}
+            servable = []
+            for order_idx in order_indices:
+                if any(self._is_temperature_compatible(orders[order_idx]['temperature_type'], vehicle_type)
+                       for vehicle_type in vehicle_types):
+                    servable.append(order_idx)
+                else:
+                    incompatible.append(order_idx)
+            if not servable:
+                continue
+            order_indices = servable
+            
+            partition = {
+                "label": f"cluster-{cluster_idx + 1}",
+                "vehicle_indices": vehicle_indices,
+                "order_indices": order_indices,
+            }
+            if distance_matrix is None:
+                matrices = DistanceMatrixEngine().build(self.node_locations(
+                    [orders[order_idx] for order_idx in order_indices],
+                    depot_location,
+                    pickup_and_delivery=paired,
+                ))
+                partition["distance_matrix"] = matrices["distance_matrix"]
+                partition["time_matrix"] = matrices["time_matrix"]
+                partition["distance_unit"] = matrices["distance_unit"]
+            partitions.append(partition)
+        
+        result = self._solve_partitions(
+            partitions, vehicles, orders, distance_matrix, time_matrix,
+            time_limit_seconds, max_workers, paired, distance_unit
+        )
+        
+        if incompatible:
+            result["unassigned_orders"] += [orders[order_idx]['order_id'] for order_idx in incompatible]
+            if result['status'] == 'success':
+                result['status'] = "partial" if result['routes'] else "failed"
+            error = f"{len(incompatible)} orders have no temperature-compatible vehicle"
+            result["error"] = f"{result['error']}; {error}" if result.get('error') else error
+        
+        return result
+    
+    def _sweep_clusters(
+        self,
+        orders: List[Dict],
+        coordinates: np.ndarray,
+        depot_location: Tuple[float, float],
+        n_clusters: int
+    ) -> np.ndarray:
+        """Sweep orders by polar angle around the depot into pallet-balanced sectors"""
+        angles = np.arctan2(
+            coordinates[:, 0] - depot_location[0],
+            (coordinates[:, 1] - depot_location[1]) * math.cos(math.radians(depot_location[0]))
+        )
+        order_by_angle = np.argsort(angles, kind="stable")
+        
+        # Start the sweep after the widest angular gap so no sector straddles it
+        sorted_angles = angles[order_by_angle]
+        gaps = np.diff(np.append(sorted_angles, sorted_angles[0] + 2 * math.pi))
+        order_by_angle = np.roll(order_by_angle, -((int(np.argmax(gaps)) + 1) % len(gaps)))
+        
+        pallets = np.array([order.get('required_pallets', 0) for order in orders], dtype=np.float64)
+        cumulative = np.cumsum(np.maximum(pallets[order_by_angle], 1))
+        sector = np.minimum((cumulative - 1) * n_clusters // cumulative[-1], n_clusters - 1)
+        
+        labels = np.empty(len(orders), dtype=np.int64)
+        labels[order_by_angle] = sector.astype(np.int64)
+        return labels
+    
+    def _kmeans_clusters(
+        self,
+        orders: List[Dict],
+        coordinates: np.ndarray,
+        n_clusters: int,
+        iterations: int = 50,
+        seed: int = 0
+    ) -> np.ndarray:
+        """Lloyd's k-means over pickup position (km) and pickup time window midpoint"""
+        lat0 = math.radians(coordinates[:, 0].mean())
+        window_mid = np.array([
+            (self._parse_time(order.get('pickup_time_start', '06:00')) +
+             self._parse_time(order.get('pickup_time_end', '20:00'))) / 2
+            for order in orders
+        ], dtype=np.float64)
+        
+        # Kilometres on both axes; an hour of time-window offset weighs like 10 km
+        features = np.column_stack([
+            coordinates[:, 0] * 111.0,
+            coordinates[:, 1] * 111.0 * math.cos(lat0),
+            window_mid / 6.0,
+        ])
+        
+        # k-means++ seeding
+        rng = np.random.default_rng(seed)
+        centers = [features[rng.integers(len(features))]]
+        for _ in range(1, n_clusters):
+            dist_sq = ((features[:, np.newaxis, :] - np.array(centers)[np.newaxis, :, :]) ** 2).sum(axis=2).min(axis=1)
+            probabilities = dist_sq / dist_sq.sum() if dist_sq.sum() > 0 else None
+            centers.append(features[rng.choice(len(features), p=probabilities)])
+        centers = np.array(centers)
+        
+        labels = np.zeros(len(features), dtype=np.int64)
+        for iteration in range(iterations):
+            dist_sq = ((features[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2).sum(axis=2)
+            new_labels = dist_sq.argmin(axis=1)
+            if iteration and np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+            for label in range(n_clusters):
+                members = features[labels == label]
+                if len(members):
+                    centers[label] = members.mean(axis=0)
+        
+        return labels
+    
+    def _allocate_vehicles(
+        self,
+        vehicles: List[Dict],
+        orders: List[Dict],
+        clusters: List[List[int]]
+    ) -> List[List[int]]:
+        """
+        Give each cluster a temperature-compatible share of the fleet
+        
+        Every (cluster, temperature zone) pair is a bucket with a pallet
+        requirement. Vehicles serving the fewest zones are placed first, each
+        into the compatible bucket with the largest remaining shortfall.
+        """
+        shortfall = {}
+        for cluster_idx, order_indices in enumerate(clusters):
+            for order_idx in order_indices:
+                bucket = (cluster_idx, orders[order_idx]['temperature_type'])
+                shortfall[bucket] = shortfall.get(bucket, 0) + (
+                    orders[order_idx].get('required_pallets', 0) * self.capacity_headroom
+                )
+        
+        def compatible_buckets(vehicle: Dict) -> List[Tuple[int, str]]:
+            return [
+                bucket for bucket in shortfall
+                if self._is_temperature_compatible(bucket[1], vehicle['vehicle_type'])
+            ]
+        
+        allocation = [[] for _ in clusters]
+        placement_order = sorted(
+            range(len(vehicles)),
+            key=lambda idx: (len(compatible_buckets(vehicles[idx])), -vehicles[idx]['max_pallets'])
+        )
+        for vehicle_idx in placement_order:
+            buckets = compatible_buckets(vehicles[vehicle_idx])
+            if not buckets:
+                continue
+            bucket = max(buckets, key=lambda key: shortfall[key])
+            shortfall[bucket] -= vehicles[vehicle_idx]['max_pallets']
+            allocation[bucket[0]].append(vehicle_idx)
+        
+        return [sorted(vehicle_indices) for vehicle_indices in allocation]
+    
+    def _partition_by_temperature(self, vehicles: List[Dict], orders: List[Dict]) -> List[Dict]:
+        """Split orders by temperature zone and allocate vehicles to each zone"""
+        zone_orders = {zone: [] for zone in TEMPERATURE_ZONES}
+        for order_idx, order in enumerate(orders):
+            zone_orders.setdefault(order['temperature_type'], []).append(order_idx)
+        
+        required = {
+            zone: sum(orders[idx].get('required_pallets', 0) for idx in order_indices) * self.capacity_headroom
+            for zone, order_indices in zone_orders.items()
+        }
+        
+        # Dedicated vehicles start in their own zone, multi-chamber ones are pooled
+        zone_vehicles = {zone: [] for zone in zone_orders}
+        shared_pool = []
+        for vehicle_idx, vehicle in enumerate(vehicles):
+            if vehicle['vehicle_type'] in zone_vehicles:
+                zone_vehicles[vehicle['vehicle_type']].append(vehicle_idx)
+            else:
+                shared_pool.append(vehicle_idx)
+        
+        def shortfall(zone: str) -> float:
+            return required[zone] - sum(vehicles[idx]['max_pallets'] for idx in zone_vehicles[zone])
+        
+        # Frozen trucks can carry chilled cargo: lend surplus ones to the chilled zone
+        for vehicle_idx in sorted(zone_vehicles['frozen'], key=lambda idx: vehicles[idx]['max_pallets']):
+            if shortfall('chilled') <= 0:
+                break
+            if shortfall('frozen') + vehicles[vehicle_idx]['max_pallets'] <= 0:
+                zone_vehicles['frozen'].remove(vehicle_idx)
+                zone_vehicles['chilled'].append(vehicle_idx)
+        
+        # Multi-chamber trucks go to whichever compatible zone is shortest on capacity
+        for vehicle_idx in sorted(shared_pool, key=lambda idx: -vehicles[idx]['max_pallets']):
+            candidates = [
+                zone for zone, order_indices in zone_orders.items()
+                if order_indices and self._is_temperature_compatible(zone, vehicles[vehicle_idx]['vehicle_type'])
+            ]
+            if candidates:
+                zone_vehicles[max(candidates, key=shortfall)].append(vehicle_idx)
+        
+        return [
+            {
+                "label": zone,
+                "vehicle_indices": sorted(zone_vehicles[zone]),
+                "order_indices": order_indices,
+            }
+            for zone, order_indices in zone_orders.items()
+            if order_indices
+        ]
+    
+    def _solve_partitions(
+        self,
+        partitions: List[Dict],
+        vehicles: List[Dict],
+        orders: List[Dict],
+        distance_matrix,
+        time_matrix,
+        time_limit_seconds: int = None,
+        max_workers: int = None,
+        paired: bool = False,
+        distance_unit: str = "km"
+    ) -> Dict:
+        """
+        Solve each partition as its own VRP (in parallel) and merge the results
+        
+        Partitions are sliced out of the full matrices unless they carry their
+        own distance_matrix/time_matrix.
+        """
+        tasks = []
+        results = [None] * len(partitions)
+        
+        for partition_idx, partition in enumerate(partitions):
+            if not partition['vehicle_indices']:
+                results[partition_idx] = {
+                    "status": "failed",
+                    "error": "No compatible vehicles available",
+                }
+                continue
+            
+            if 'distance_matrix' in partition:
+                distance_sub, time_sub = partition['distance_matrix'], partition['time_matrix']
+            else:
+                node_indices = self._order_node_indices(
+                    partition['order_indices'], len(orders), paired
+                )
+                distance_sub, time_sub = self._slice_matrices(distance_matrix, time_matrix, node_indices)
+            
+            tasks.append((partition_idx, {
+                "use_transit_matrices": self.use_transit_matrices,
+                "vehicles": [vehicles[idx] for idx in partition['vehicle_indices']],
+                "orders": [orders[idx] for idx in partition['order_indices']],
+                "distance_matrix": distance_sub,
+                "time_matrix": time_sub,
+                "time_limit_seconds": time_limit_seconds,
+                "paired": paired,
+                "distance_unit": partition.get('distance_unit', distance_unit),
+            }))
+        
+        task_results = self._run_subproblems([payload for _, payload in tasks], max_workers)
+        for (partition_idx, _), result in zip(tasks, task_results):
+            results[partition_idx] = result
+        
+        merged = self._merge_results(results, vehicles)
+        merged["subproblems"] = [
+            {
+                "label": partition['label'],
+                "vehicles": len(partition['vehicle_indices']),
+                "orders": len(partition['order_indices']),
+                "status": result['status'],
+                "error": result.get('error'),
+                "search_stats": result.get('search_stats'),
+            }
+            for partition, result in zip(partitions, results)
+        ]
+        merged["unassigned_orders"] = [
+            orders[order_idx]['order_id']
+            for partition, result in zip(partitions, results)
+            if result['status'] != 'success'
+            for order_idx in partition['order_indices']
+        ]
+        
+        return merged
+    
+    def _run_subproblems(self, payloads: List[Dict], max_workers: int = None) -> List[Dict]:
+        """Run independent solve() calls across a process pool"""
+        if len(payloads) <= 1:
+            return [_solve_subproblem(payload) for payload in payloads]
+        
+        workers = max_workers or settings.ORTOOLS_PARALLEL_WORKERS or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=min(workers, len(payloads))) as executor:
+            return list(executor.map(_solve_subproblem, payloads))
+    
+    def _merge_results(self, results: List[Dict], vehicles: List[Dict]) -> Dict:
+        """Combine sub-problem results into a single solve() style result"""
+        max_pallets = {vehicle['vehicle_id']: vehicle['max_pallets'] for vehicle in vehicles}
+        routes = [
+            route
+            for result in results if result['status'] == 'success'
+            for route in result['routes']
+        ]
+        failed = [result for result in results if result['status'] != 'success']
+        
+        if not failed:
+            status = "success"
+        elif routes:
+            status = "partial"
+        else:
+            status = "failed"
+        
+        total_distance = sum(route['total_distance_km'] for route in routes)
+        total_time = sum(route['total_time_minutes'] for route in routes)
+        
+        merged = {
+            "status": status,
+            "routes": routes,
+            "summary": {
+                "total_distance_km": round(total_distance, 2),
+                "total_time_hours": round(total_time / 60, 2),
+                "total_pallets": sum(route['total_pallets'] for route in routes),
+                "vehicles_used": len(routes),
+                "orders_assigned": sum(
+                    1 for route in routes for stop in route['stops'] if stop['stop_type'] == 'pickup'
+                ),
+                "avg_utilization": round(
+                    sum(route['peak_pallets'] / max_pallets[route['vehicle_id']]
+                        for route in routes) / len(routes) * 100, 2
+                ) if routes else 0,
+            },
+            "objective_value": sum(result.get('objective_value', 0) for result in results),
+        }
+        if failed:
+            merged["error"] = "; ".join(result.get('error', 'Unknown error') for result in failed)
+        
+        return merged
+    
+    def _search_parameters(
+        self,
+        time_limit_seconds: int = None,
+        first_solution_strategy: str = None,
+        local_search_metaheuristic: str = None
+    ):
+        """Build OR-Tools search parameters"""
+        search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+        search_parameters.first_solution_strategy = getattr(
+            routing_enums_pb2.FirstSolutionStrategy,
+            first_solution_strategy or "PATH_CHEAPEST_ARC"
+        )
+        search_parameters.local_search_metaheuristic = getattr(
+            routing_enums_pb2.LocalSearchMetaheuristic,
+            local_search_metaheuristic or "GUIDED_LOCAL_SEARCH"
+        )
+        search_parameters.time_limit.seconds = time_limit_seconds or settings.ORTOOLS_TIME_LIMIT_SECONDS
+        search_parameters.solution_limit = settings.ORTOOLS_SOLUTION_LIMIT
+        
+        return search_parameters
+    
+    def _solve_from_routes(
+        self,
+        manager,
+        routing,
+        initial_routes: List[List[int]],
+        search_parameters,
+        n_orders: int,
+        pickup_and_delivery: bool
+    ):
+        """
+        Solve starting from partial routes given as order indices per vehicle
+        
+        ReadAssignmentFromRoutes only accepts complete routes, so the routes are
+        loaded with RoutesToAssignment without closing them; the first solution
+        strategy then inserts the remaining orders.
+        """
+        routing.CloseModelWithParameters(search_parameters)
+        
+        index_routes = []
+        for route in initial_routes:
+            nodes = []
+            visits = {}
+            for order_idx in route:
+                pickup_node, delivery_node = self._order_nodes(order_idx, n_orders)
+                visits[order_idx] = visits.get(order_idx, 0) + 1
+                if visits[order_idx] == 1:
+                    nodes.append(pickup_node)
+                elif visits[order_idx] == 2 and pickup_and_delivery:
+                    nodes.append(delivery_node)
+            
+            if pickup_and_delivery:
+                # Deliveries not given explicitly follow their pickup directly
+                for order_idx, count in visits.items():
+                    if count == 1:
+                        pickup_node, delivery_node = self._order_nodes(order_idx, n_orders)
+                        nodes.insert(nodes.index(pickup_node) + 1, delivery_node)
+            
+            index_routes.append([manager.NodeToIndex(node) for node in nodes])
+        
+        initial_assignment = routing.solver().Assignment()
+        
+        if not routing.RoutesToAssignment(index_routes, True, False, initial_assignment):
+            # Previous routes violate the current constraints, start cold
+            return routing.SolveWithParameters(search_parameters)
+        
+        solution = routing.SolveFromAssignmentWithParameters(initial_assignment, search_parameters)
+        if solution is None:
+            # Seed could not be completed (capacity/time windows), start cold
+            solution = routing.SolveWithParameters(search_parameters)
+        
+        return solution
+    
+    def _add_solution_monitor(
+        self,
+        manager,
+        routing,
+        vehicles: List[Dict],
+        orders: List[Dict],
+        distance_matrix: np.ndarray,
+        time_matrix: np.ndarray,
+        on_solution: Optional[Callable[[Dict], None]],
+        stop_event: Optional[threading.Event]
+    ):
+        """Report improving solutions and honour stop requests during the search"""
+        started = time.monotonic()
+        snapshot = _SearchSnapshot(routing)
+        best_objective = [None]
+        
+        def solution_callback():
+            objective = routing.CostVar().Value()
+            
+            if on_solution and (best_objective[0] is None or objective < best_objective[0]):
+                best_objective[0] = objective
+                on_solution({
+                    "objective_value": objective,
+                    "elapsed_seconds": round(time.monotonic() - started, 3),
+                    "solution": self._extract_solution(
+                        manager, routing, snapshot, vehicles, orders, distance_matrix, time_matrix
+                    ),
+                })
+        
+        routing.AddAtSolutionCallback(solution_callback)
+        
+        # Checked throughout the search, not only when a new solution is found
+        if stop_event:
+            routing.AddSearchMonitor(routing.solver().CustomLimit(stop_event.is_set))
     
     def _extract_solution(
         self,
@@ -171,8 +1036,8 @@ class VRPSolver:
         solution,
         vehicles: List[Dict],
         orders: List[Dict],
-        distance_matrix: List[List[float]],
-        time_matrix: List[List[float]]
+        distance_matrix: np.ndarray,
+        time_matrix: np.ndarray
     ) -> Dict:
         """Extract solution from OR-Tools solver"""
         
@@ -189,6 +1054,7 @@ class VRPSolver:
                 "total_distance_km": 0,
                 "total_time_minutes": 0,
                 "total_pallets": 0,
+                "peak_pallets": 0,
                 "total_weight_kg": 0,
             }
             
@@ -196,26 +1062,33 @@ class VRPSolver:
             route_distance = 0
             route_time = 0
             route_load = 0
+            on_board = 0
+            peak_load = 0
             
             while not routing.IsEnd(index):
                 node_index = manager.IndexToNode(index)
                 
                 # Skip depot
                 if node_index > 0:
-                    order_idx = node_index - 1
+                    order_idx, stop_type = self._node_order(node_index, len(orders))
                     order = orders[order_idx]
                     
                     route['stops'].append({
                         "order_id": order['order_id'],
-                        "stop_type": "pickup",  # Simplified for now
-                        "client_id": order['pickup_client_id'],
+                        "stop_type": stop_type,
+                        "client_id": order['pickup_client_id'] if stop_type == 'pickup' else order['delivery_client_id'],
                         "pallets": order['required_pallets'],
                         "weight_kg": order['weight_kg'],
                         "temperature_type": order['temperature_type'],
                         "sequence": len(route['stops']) + 1,
                     })
                     
-                    route_load += order['required_pallets']
+                    if stop_type == 'pickup':
+                        route_load += order['required_pallets']
+                        on_board += order['required_pallets']
+                        peak_load = max(peak_load, on_board)
+                    else:
+                        on_board -= order['required_pallets']
                 
                 # Get next index
                 previous_index = index
@@ -225,12 +1098,13 @@ class VRPSolver:
                 if previous_index != index:
                     from_node = manager.IndexToNode(previous_index)
                     to_node = manager.IndexToNode(index)
-                    route_distance += distance_matrix[from_node][to_node]
-                    route_time += time_matrix[from_node][to_node]
+                    route_distance += float(distance_matrix[from_node, to_node])
+                    route_time += float(time_matrix[from_node, to_node])
             
             route['total_distance_km'] = round(route_distance, 2)
             route['total_time_minutes'] = round(route_time, 2)
             route['total_pallets'] = route_load
+            route['peak_pallets'] = peak_load
             
             # Only include routes with stops
             if route['stops']:
@@ -247,15 +1121,142 @@ class VRPSolver:
                 "total_time_hours": round(total_time / 60, 2),
                 "total_pallets": total_load,
                 "vehicles_used": len(routes),
-                "orders_assigned": sum(len(r['stops']) for r in routes),
+                "orders_assigned": sum(
+                    1 for r in routes for stop in r['stops'] if stop['stop_type'] == 'pickup'
+                ),
                 "avg_utilization": round(
-                    sum(r['total_pallets'] / vehicles[idx]['max_pallets'] 
+                    sum(r['peak_pallets'] / vehicles[idx]['max_pallets'] 
                         for idx, r in enumerate(routes)) / len(routes) * 100, 2
                 ) if routes else 0,
             },
             "objective_value": solution.ObjectiveValue(),
         }
     
+    def _search_stats(self, routing) -> Dict:
+        """Collect search throughput counters from the underlying CP solver"""
+        solver = routing.solver()
+        wall_time_seconds = solver.WallTime() / 1000
+        
+        return {
+            "transit_mode": "matrix" if self.use_transit_matrices else "callback",
+            "wall_time_seconds": round(wall_time_seconds, 3),
+            "branches": solver.Branches(),
+            "accepted_neighbors": solver.AcceptedNeighbors(),
+            "neighbors_per_second": round(
+                solver.AcceptedNeighbors() / wall_time_seconds, 2
+            ) if wall_time_seconds > 0 else 0,
+        }
+    
+    def node_locations(
+        self,
+        orders: List[Dict],
+        depot_location: Tuple[float, float],
+        pickup_and_delivery: bool = True
+    ) -> List[Tuple[float, float]]:
+        """
+        Coordinates in solver node order, for building matrices
+        
+        Layout: depot, then every order's pickup, then (when paired) every
+        order's delivery in the same order.
+        """
+        locations = [tuple(depot_location)]
+        locations += [(order['pickup_latitude'], order['pickup_longitude']) for order in orders]
+        if pickup_and_delivery:
+            locations += [(order['delivery_latitude'], order['delivery_longitude']) for order in orders]
+        
+        return locations
+    
+    def _order_nodes(self, order_idx: int, n_orders: int) -> Tuple[int, int]:
+        """Pickup and delivery node of an order"""
+        return order_idx + 1, n_orders + order_idx + 1
+    
+    def _stop_nodes(self, order_idx: int, n_orders: int, pickup_and_delivery: bool) -> List[int]:
+        """Nodes visited for an order in the current layout"""
+        pickup_node, delivery_node = self._order_nodes(order_idx, n_orders)
+        return [pickup_node, delivery_node] if pickup_and_delivery else [pickup_node]
+    
+    def _node_order(self, node_index: int, n_orders: int) -> Tuple[int, str]:
+        """Order index and stop type of a (non-depot) node"""
+        if node_index <= n_orders:
+            return node_index - 1, 'pickup'
+        return node_index - n_orders - 1, 'delivery'
+    
+    def _order_node_indices(self, order_indices: List[int], n_orders: int, pickup_and_delivery: bool) -> List[int]:
+        """Depot plus the nodes of the given orders, in solver layout"""
+        node_indices = [0] + [order_idx + 1 for order_idx in order_indices]
+        if pickup_and_delivery:
+            node_indices += [n_orders + order_idx + 1 for order_idx in order_indices]
+        
+        return node_indices
+    
+    def _prune_arcs(self, manager, routing, vehicles: List[Dict], orders: List[Dict], pickup_and_delivery: bool):
+        """
+        Remove arcs no feasible route can use, keeping the neighbourhoods sparse
+        
+        Two nodes can only be consecutive if some vehicle can carry both
+        temperature types, and a delivery never leads back to its own pickup.
+        """
+        n_orders = len(orders)
+        vehicle_types = {vehicle['vehicle_type'] for vehicle in vehicles}
+        temperature_types = {order['temperature_type'] for order in orders}
+        
+        indices_by_temperature = {temperature: [] for temperature in temperature_types}
+        for order_idx, order in enumerate(orders):
+            for node_index in self._stop_nodes(order_idx, n_orders, pickup_and_delivery):
+                indices_by_temperature[order['temperature_type']].append(manager.NodeToIndex(node_index))
+        
+        unreachable = {
+            temperature: [
+                index
+                for other in temperature_types
+                if not any(
+                    self._is_temperature_compatible(temperature, vehicle_type) and
+                    self._is_temperature_compatible(other, vehicle_type)
+                    for vehicle_type in vehicle_types
+                )
+                for index in indices_by_temperature[other]
+            ]
+            for temperature in temperature_types
+        }
+        
+        for order_idx, order in enumerate(orders):
+            pickup_node, delivery_node = self._order_nodes(order_idx, n_orders)
+            pickup_index = manager.NodeToIndex(pickup_node)
+            blocked = unreachable[order['temperature_type']]
+            
+            if blocked:
+                routing.NextVar(pickup_index).RemoveValues(blocked)
+            if pickup_and_delivery:
+                routing.NextVar(manager.NodeToIndex(delivery_node)).RemoveValues(blocked + [pickup_index])
+    
+    def _slice_matrices(self, distance_matrix, time_matrix, node_indices: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Select the rows/columns of the given nodes, keeping the input units"""
+        if not isinstance(distance_matrix, np.ndarray):
+            distance_matrix = np.asarray(distance_matrix, dtype=np.float64)
+        selector = np.ix_(node_indices, node_indices)
+        
+        return distance_matrix[selector], np.asarray(time_matrix)[selector]
+    
+    def _prepare_matrices(self, distance_matrix, time_matrix, distance_unit: str = "km") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Convert input matrices to the integer units used by the routing model
+        
+        Args:
+            distance_unit: "km" or "m"; never inferred from the matrix type
+        
+        Returns:
+            Tuple of int64 (distance in meters, travel time in minutes) arrays
+        """
+        if distance_unit not in DISTANCE_UNIT_METERS:
+            raise ValueError(f"Unknown distance unit: {distance_unit}")
+        distance_m = (
+            np.asarray(distance_matrix, dtype=np.float64) * DISTANCE_UNIT_METERS[distance_unit]
+        ).astype(np.int64)
+        
+        time_min = np.asarray(time_matrix, dtype=np.float64).astype(np.int64)
+        
+        return distance_m, time_min
+    
     def _parse_time(self, time_str: str) -> int:
         """Convert HH:MM time string to minutes from midnight"""
         try:
@@ -292,3 +1293,33 @@ class VRPSolver:
             return order_temp == 'ambient'
         
         return False
+
+
+class _SearchSnapshot:
+    """Assignment-like view of the variables bound at a solution callback"""
+    
+    def __init__(self, routing):
+        self.routing = routing
+    
+    def Value(self, var) -> int:
+        return var.Value()
+    
+    def ObjectiveValue(self) -> int:
+        return self.routing.CostVar().Value()
+
+
+def _solve_subproblem(payload: Dict) -> Dict:
+    """Process pool entry point: solve one sub-problem with a fresh solver"""
+    solver = VRPSolver(use_transit_matrices=payload['use_transit_matrices'])
+    
+    return solver.solve(
+        payload['vehicles'],
+        payload['orders'],
+        payload['distance_matrix'],
+        payload['time_matrix'],
+        time_limit_seconds=payload['time_limit_seconds'],
+        first_solution_strategy=payload.get('first_solution_strategy'),
+        local_search_metaheuristic=payload.get('local_search_metaheuristic'),
+        paired=payload['paired'],
+        distance_unit=payload['distance_unit'],
+    )
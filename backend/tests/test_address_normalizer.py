@@ -0,0 +1,106 @@
+from services.address_index import AddressIndex
+from utils.address_normalizer import normalize_address, address_parts, decompose_hangul, name_similarity
+
+
+def test_normalize_drops_detail_and_expands_region():
+    assert normalize_address("서울시 강남구 테헤란로152, 3층 (역삼동)") == "서울특별시 강남구 테헤란로 152"
+    assert normalize_address("경기 성남시 분당구 운중동 산 12-3번지 101호") == "경기도 성남시 분당구 운중동 산 12-3"
+
+
+def test_normalize_keeps_side_street_as_one_token():
+    assert normalize_address("부산 중구 중앙대로 12번길 3-1") == "부산광역시 중구 중앙대로12번길 3-1"
+
+
+def test_address_parts_splits_exact_key_and_name():
+    key, name = address_parts("대구광역시 북구 동대구로 550")
+    
+    assert key == ("대구광역시", "북구", "", "550")
+    assert name == "동대구로"
+    assert address_parts("주소 없음") is None
+
+
+def test_address_parts_tolerates_misspelled_suffix():
+    key, name = address_parts(normalize_address("부산 해운대구 센텀중앙료 78, 3층"))
+    
+    assert key == ("부산광역시", "해운대구", "", "78")
+    assert name == "센텀중앙료"
+
+
+def test_name_similarity():
+    def similarity(a, b):
+        return name_similarity(decompose_hangul(a), decompose_hangul(b))
+    
+    assert similarity("테헤란로", "테헤란로") == 1.0
+    assert similarity("태헤란로", "테헤란로") > 0.85
+    assert similarity("동대구로", "서대구로") < 0.85
+    assert similarity("중앙로", "중앙대로") < 0.85
+    assert similarity("", "테헤란로") == 0.0
+
+
+def _index(tmp_path, addresses):
+    index = AddressIndex(str(tmp_path / "addresses.sqlite3"))
+    index.put_many({
+        normalize_address(address): {"address": address, "latitude": 35.0 + i, "longitude": 128.0 + i}
+        for i, address in enumerate(addresses)
+    })
+    return index
+
+
+def test_match_many_exact(tmp_path):
+    index = _index(tmp_path, ["서울특별시 강남구 테헤란로 152"])
+    key = normalize_address("서울 강남구 테헤란로 152 (역삼동)")
+    
+    found = index.match_many([key])
+    
+    assert found[key]["confidence"] == 1.0
+    assert found[key]["latitude"] == 35.0
+    index.close()
+
+
+def test_match_many_fuzzy_within_district(tmp_path):
+    index = _index(tmp_path, [
+        "서울특별시 금천구 가산디지털로 10",
+        "서울특별시 강남구 테헤란로 152",
+        "부산광역시 해운대구 센텀중앙로 78",
+    ])
+    expected = {
+        normalize_address("서울특별시 금천구 가산디지탈로 10"): "서울특별시 금천구 가산디지털로 10",
+        normalize_address("서울 강남구 태헤란로 152"): "서울특별시 강남구 테헤란로 152",
+        normalize_address("부산 해운대구 센텀중앙료 78"): "부산광역시 해운대구 센텀중앙로 78",
+    }
+    
+    found = index.match_many(list(expected))
+    
+    assert {key: result["matched_address"] for key, result in found.items()} == expected
+    assert all(0.85 < result["confidence"] < 1.0 for result in found.values())
+    index.close()
+
+
+def test_match_many_rejects_other_roads_with_same_number(tmp_path):
+    index = _index(tmp_path, ["서울특별시 중구 중앙대로 10"])
+    
+    assert index.match_many(["서울특별시 중구 중앙로 10"]) == {}
+    index.close()
+
+
+def test_match_many_never_crosses_districts(tmp_path):
+    index = _index(tmp_path, [
+        "대구광역시 동구 동대구로 550",
+        "부산광역시 동구 중앙대로 206",
+        "경상북도 포항시 남구 중앙로 100",
+    ])
+    queries = [
+        normalize_address("대구광역시 북구 동대구로 550"),
+        normalize_address("부산광역시 서구 중앙대로 206"),
+        normalize_address("경상북도 포항시 북구 중앙로 100"),
+    ]
+    
+    assert index.match_many(queries, min_confidence=0.0) == {}
+    index.close()
+
+
+def test_match_many_requires_same_number(tmp_path):
+    index = _index(tmp_path, ["서울특별시 강남구 테헤란로 152"])
+    
+    assert index.match_many(["서울특별시 강남구 테헤란로 153"], min_confidence=0.0) == {}
+    index.close()
@@ -0,0 +1,25 @@
+import pytest
+from utils import geohash
+
+
+def test_encode_known_value():
+    # Reference value from geohash.org
+    assert geohash.encode(57.64911, 10.40744, precision=11) == "u4pruydqqvj"
+
+
+def test_decode_center_is_inside_bounds():
+    cell = geohash.encode(37.4979, 127.0276, precision=7)
+    min_lat, min_lon, max_lat, max_lon = geohash.bounds(cell)
+    latitude, longitude = geohash.decode(cell)
+    
+    assert min_lat <= 37.4979 <= max_lat
+    assert min_lon <= 127.0276 <= max_lon
+    assert latitude == pytest.approx((min_lat + max_lat) / 2)
+    assert longitude == pytest.approx((min_lon + max_lon) / 2)
+
+
+def test_prefix_is_parent_cell():
+    fine = geohash.encode(37.4979, 127.0276, precision=8)
+    
+    assert geohash.encode(37.4979, 127.0276, precision=5) == fine[:5]
+    assert geohash.encode(*geohash.decode(fine), precision=8) == fine
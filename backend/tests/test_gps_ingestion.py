@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime, timezone
+from sqlalchemy import create_engine
+from services.gps_ingestion import GPSIngestion, FIX_COLUMNS
+
+
+def _ingestion(engine=None):
+    # The engine is only used on flush
+    return GPSIngestion(queue=asyncio.Queue(), engine=engine or create_engine("sqlite://"), max_retry_rows=2)
+
+
+def _fields(ingestion: GPSIngestion, row: tuple) -> dict:
+    return dict(zip(ingestion.columns, row))
+
+
+def test_to_row_coerces_strings():
+    ingestion = _ingestion()
+    row = _fields(ingestion, ingestion._to_row({
+        "vehicle_id": "V1",
+        "device_id": "D1",
+        "latitude": "37.5",
+        "longitude": 127,
+        "speed_kmh": "42.5",
+        "engine_on": "false",
+        "door_open": "TRUE",
+        "refrigerator_on": "",
+    }))
+    
+    assert row["uvis_device_id"] == "D1"
+    assert row["latitude"] == 37.5
+    assert row["longitude"] == 127.0
+    assert row["speed_kmh"] == 42.5
+    assert row["engine_on"] is False
+    assert row["door_open"] is True
+    assert row["refrigerator_on"] is None
+    assert row["temp_alarm"] is False
+
+
+def test_to_row_rejects_unusable_fixes():
+    ingestion = _ingestion()
+    fix = {"vehicle_id": "V1", "latitude": 37.5, "longitude": 127.0}
+    
+    assert ingestion._to_row({**fix, "latitude": None}) is None
+    assert ingestion._to_row({**fix, "vehicle_id": None}) is None
+    assert ingestion._to_row({**fix, "speed_kmh": "fast"}) is None
+    assert ingestion._to_row({**fix, "engine_on": "maybe"}) is None
+    assert len(ingestion._to_row(fix)) == len(ingestion.columns) >= 3 + len(FIX_COLUMNS)
+
+
+def test_timestamps_are_stored_as_naive_utc():
+    assert GPSIngestion._timestamp("2026-10-17T01:00:00Z") == datetime(2026, 10, 17, 1, 0)
+    assert GPSIngestion._timestamp("2026-10-17T10:00:00+09:00") == datetime(2026, 10, 17, 1, 0)
+    
+    local = datetime(2026, 10, 17, 10, 0)
+    assert GPSIngestion._timestamp(local) == local.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    fallback = GPSIngestion._timestamp("not a time")
+    assert abs((fallback - datetime.now(timezone.utc).replace(tzinfo=None)).total_seconds()) < 5
+
+
+def test_failed_flush_keeps_newest_rows_for_retry():
+    class FailingEngine:
+        class dialect:
+            driver = "asyncpg"
+        
+        def begin(self):
+            raise ConnectionError("database unavailable")
+    
+    ingestion = GPSIngestion(queue=asyncio.Queue(), engine=FailingEngine(), max_retry_rows=2, use_copy=False)
+    fixes = [{"vehicle_id": f"V{idx}", "latitude": 37.5, "longitude": 127.0} for idx in range(3)]
+    
+    assert asyncio.run(ingestion.flush(fixes)) == 0
+    
+    stats = ingestion.stats()
+    assert stats["retrying"] == 2
+    assert stats["failed"] == 1
+    assert [row[0] for row in ingestion._retry] == ["V1", "V2"]
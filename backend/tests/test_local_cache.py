@@ -0,0 +1,35 @@
+import config.redis as redis_config
+from config.redis import LocalCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LocalCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    
+    assert cache.get("a") == (True, 1)
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entry_is_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(redis_config.time, "monotonic", lambda: now[0])
+    cache = LocalCache(max_entries=2)
+    cache.set("a", 1, ttl=10)
+    
+    assert cache.get("a") == (True, 1)
+    now[0] += 10
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_zero_capacity_stores_nothing():
+    cache = LocalCache(max_entries=0)
+    cache.set("a", 1, ttl=60)
+    
+    assert cache.get("a") == (False, None)
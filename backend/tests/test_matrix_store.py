@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from services.distance_matrix import DistanceMatrixEngine
+from services.matrix_store import MatrixStore, MISSING
+
+LOCATIONS = {"A": (37.50, 127.00), "B": (37.60, 127.10), "C": (37.70, 127.20)}
+
+
+def _lookup(store, ids, coordinates=LOCATIONS):
+    points = [coordinates[location_id] for location_id in ids]
+    return store.lookup(ids, ids, points, points)
+
+
+def test_round_trip_survives_reopen(tmp_path):
+    store = MatrixStore(str(tmp_path), initial_capacity=2)
+    _lookup(store, ["A", "B", "C"])
+    store.update(["A", "B"], ["B", "C"], [1.5, 2.25], [3.0, 4.5])
+    
+    reopened = MatrixStore(str(tmp_path))
+    distance, duration = _lookup(reopened, ["A", "B", "C"])
+    
+    assert reopened.capacity >= 3
+    assert distance[0, 1] == 1500
+    assert distance[1, 2] == 2250
+    assert duration[1, 2] == 4.5
+    assert distance[1, 0] == MISSING
+    assert np.all(np.diag(distance) == 0)
+
+
+def test_solver_matrices_estimate_missing_pairs(tmp_path):
+    store = MatrixStore(str(tmp_path))
+    _lookup(store, ["A", "B"])
+    store.update(["A"], ["B"], [20.0], [30.4])
+    
+    distance, duration = store.solver_matrices(["A", "B"])
+    estimate = DistanceMatrixEngine().build([LOCATIONS["A"], LOCATIONS["B"]])
+    
+    assert distance.dtype == np.int32
+    assert distance.tolist() == [[0, 20000], [estimate["distance_matrix"][1, 0], 0]]
+    assert duration.tolist() == [[0, 30], [estimate["time_matrix"][1, 0], 0]]
+    assert distance[1, 0] > 0
+
+
+def test_solver_matrices_reject_unknown_locations(tmp_path):
+    store = MatrixStore(str(tmp_path))
+    store.update(["A"], ["B"], [1.0], [2.4])
+    
+    with pytest.raises(ValueError):
+        store.solver_matrices(["A", "B"])
+
+
+def test_stores_sharing_a_directory_see_each_other(tmp_path):
+    first = MatrixStore(str(tmp_path), initial_capacity=2)
+    second = MatrixStore(str(tmp_path))
+    first.register(["A", "B"])
+    
+    # The second store must not hand out A's or B's rows again, and its grow
+    # must keep the first store's pairs
+    second.update(["C"], ["D"], [3.0], [6.0])
+    first.update(["A"], ["B"], [1.0], [2.0])
+    
+    assert second.location_ids == first.location_ids == ["A", "B", "C", "D"]
+    distance, _ = MatrixStore(str(tmp_path)).lookup(["A", "C"], ["B", "D"])
+    assert distance.tolist() == [[1000, MISSING], [MISSING, 3000]]
+
+
+def test_moved_location_is_invalidated(tmp_path):
+    store = MatrixStore(str(tmp_path))
+    _lookup(store, ["A", "B", "C"])
+    store.update(["A", "B"], ["B", "C"], [1.0, 2.0], [1.0, 2.0])
+    
+    moved = {**LOCATIONS, "B": (37.61, 127.10)}
+    distance, _ = _lookup(MatrixStore(str(tmp_path)), ["A", "B", "C"], moved)
+    
+    assert distance[0, 1] == MISSING
+    assert distance[1, 2] == MISSING
+    assert distance[1, 1] == 0
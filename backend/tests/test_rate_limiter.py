@@ -0,0 +1,62 @@
+import asyncio
+import time
+from utils.rate_limiter import AdaptiveRateLimiter, is_throttled
+
+
+def test_is_throttled():
+    assert is_throttled(429)
+    assert is_throttled(503)
+    assert not is_throttled(200)
+    assert not is_throttled(None)
+
+
+def test_requests_are_paced_after_burst():
+    limiter = AdaptiveRateLimiter(rate_per_second=20, max_concurrency=10, burst=5)
+    
+    async def run():
+        async def request():
+            async with limiter:
+                pass
+        
+        started = time.monotonic()
+        await asyncio.gather(*[request() for _ in range(15)])
+        return time.monotonic() - started
+    
+    # 5 immediate tokens, then 10 more at 20/s
+    assert asyncio.run(run()) >= 0.45
+
+
+def test_concurrency_cap():
+    limiter = AdaptiveRateLimiter(rate_per_second=1000, max_concurrency=2)
+    in_flight = 0
+    peak = 0
+    
+    async def request():
+        nonlocal in_flight, peak
+        async with limiter:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+    
+    async def run():
+        await asyncio.gather(*[request() for _ in range(8)])
+    
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_throttling_halves_rate_and_success_recovers():
+    limiter = AdaptiveRateLimiter(rate_per_second=10, max_concurrency=1, min_rate_per_second=2)
+    
+    limiter.record(429)
+    assert limiter.rate == 5
+    assert limiter.blocked_until > time.monotonic()
+    
+    limiter.record(None)
+    limiter.record(None)
+    assert limiter.rate == 2
+    
+    limiter.record(200)
+    assert limiter.rate == 2.5
+    assert limiter.backoff_seconds == 0.0
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from services import road_network
+from services.road_network import RoadNetwork
+
+
+def _grid_network(size: int = 8, seed: int = 0) -> RoadNetwork:
+    rng = np.random.default_rng(seed)
+    lat, lon = np.meshgrid(37.5 + np.arange(size) * 0.005, 127.0 + np.arange(size) * 0.005, indexing="ij")
+    node = np.arange(size * size).reshape(size, size)
+    
+    tails, heads = [], []
+    for a, b in [(node[:, :-1], node[:, 1:]), (node[:-1, :], node[1:, :])]:
+        tails += [a.ravel(), b.ravel()]
+        heads += [b.ravel(), a.ravel()]
+    tails, heads = np.concatenate(tails), np.concatenate(heads)
+    
+    length_m = rng.uniform(300, 700, len(tails))
+    # Distinct speeds avoid ties between equally fast paths of different length
+    time_min = length_m / rng.uniform(300, 1000, len(tails))
+    
+    return RoadNetwork.from_arcs(lat.ravel(), lon.ravel(), tails, heads, length_m, time_min)
+
+
+def test_scipy_and_pure_python_searches_agree(monkeypatch):
+    pytest.importorskip("scipy")
+    network = _grid_network()
+    origins = [(37.5, 127.0), (37.52, 127.03), (37.535, 127.01)]
+    destinations = [(37.5, 127.035), (37.51, 127.0), (37.53, 127.02), (37.5, 127.0)]
+    
+    length_scipy, time_scipy = network.matrix(origins, destinations, margin_km=None)
+    monkeypatch.setattr(road_network, "csgraph_dijkstra", None)
+    length_python, time_python = network.matrix(origins, destinations, margin_km=None)
+    
+    np.testing.assert_allclose(time_scipy, time_python, rtol=1e-5)
+    np.testing.assert_allclose(length_scipy, length_python, rtol=1e-5)
+    assert time_scipy[0, 3] == 0
+
+
+def test_unreachable_pairs_are_infinite(monkeypatch):
+    monkeypatch.setattr(road_network, "csgraph_dijkstra", None)
+    network = RoadNetwork.from_arcs(
+        [37.5, 37.51, 37.52], [127.0, 127.0, 127.0], [0], [1], [1000.0], [2.0]
+    )
+    
+    length, time = network.matrix([(37.5, 127.0)], [(37.51, 127.0), (37.52, 127.0)], margin_km=None)
+    
+    assert length[0, 0] == pytest.approx(1000.0)
+    assert time[0, 0] == pytest.approx(2.0)
+    assert np.isinf(time[0, 1])
+
+
+OSM_EXTRACT = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="37.500" lon="127.000"/>
+  <node id="2" lat="37.505" lon="127.000"/>
+  <node id="3" lat="37.510" lon="127.000"/>
+  <way id="10">
+    <nd ref="1"/><nd ref="2"/><nd ref="3"/>
+    <tag k="highway" v="primary"/>
+  </way>
+</osm>
+"""
+
+
+def test_osm_extract_is_converted_once(tmp_path, monkeypatch):
+    extract = tmp_path / "seoul.osm"
+    extract.write_text(OSM_EXTRACT, encoding="utf-8")
+    monkeypatch.setattr(road_network.settings, "ROAD_NETWORK_PATH", str(extract))
+    monkeypatch.setattr(road_network, "_road_network", None)
+    
+    network = road_network.get_road_network()
+    
+    assert network.n_nodes == 2
+    assert (tmp_path / "seoul.npz").exists()
+    
+    def parse_again(path):
+        raise AssertionError("the converted graph should be loaded")
+    
+    monkeypatch.setattr(road_network, "_road_network", None)
+    monkeypatch.setattr(RoadNetwork, "from_osm_xml", parse_again)
+    reloaded = road_network.get_road_network()
+    
+    np.testing.assert_array_equal(reloaded.node_lat, network.node_lat)
@@ -0,0 +1,43 @@
+from services.route_memory import RouteMemory
+
+
+def _order(order_id: str, pickup: str, delivery: str, temperature_type: str = "frozen", pallets: int = 2):
+    return {
+        "order_id": order_id,
+        "pickup_client_id": pickup,
+        "delivery_client_id": delivery,
+        "temperature_type": temperature_type,
+        "required_pallets": pallets,
+    }
+
+
+def test_build_initial_routes_follows_remembered_sequences():
+    memory = {"routes": [
+        {"vehicle_id": "V1", "sequence": ["A>B", "C>D", "A>B"]},
+        {"vehicle_id": "V2", "sequence": ["E>F", "G>H"]},
+    ]}
+    vehicles = [
+        {"vehicle_id": "V1", "vehicle_type": "frozen", "max_pallets": 6},
+        {"vehicle_id": "V2", "vehicle_type": "chilled", "max_pallets": 6},
+        {"vehicle_id": "V3", "vehicle_type": "frozen", "max_pallets": 6},
+    ]
+    orders = [
+        _order("O0", "C", "D"),
+        _order("O1", "A", "B"),
+        _order("O2", "E", "F", temperature_type="frozen"),
+        _order("O3", "G", "H", temperature_type="chilled"),
+        _order("O4", "X", "Y"),
+    ]
+    
+    initial_routes = RouteMemory().build_initial_routes(memory, vehicles, orders)
+    
+    # Each client pair claims one order; frozen cargo stays off the chilled truck
+    assert initial_routes == [[1, 0], [3], []]
+
+
+def test_build_initial_routes_respects_pallet_limit():
+    memory = {"routes": [{"vehicle_id": "V1", "sequence": ["A>B", "C>D", "E>F"]}]}
+    vehicles = [{"vehicle_id": "V1", "vehicle_type": "frozen", "max_pallets": 5}]
+    orders = [_order("O0", "A", "B"), _order("O1", "C", "D", pallets=4), _order("O2", "E", "F")]
+    
+    assert RouteMemory().build_initial_routes(memory, vehicles, orders) == [[0, 2]]
@@ -0,0 +1,77 @@
+import asyncio
+import numpy as np
+import pytest
+import services.routing as routing
+from config.serializers import get_serializer
+from services.routing import RoutingService, pack_path, unpack_path
+from services.travel_time_model import TravelTimeModel
+
+A, B, C = (37.50, 127.00), (37.60, 127.10), (37.70, 127.20)
+
+
+class _EmptyCache:
+    serializer = routing.cache.serializer
+    
+    async def get_many_json(self, keys):
+        return [None] * len(keys)
+    
+    async def set_many_json(self, mapping, ttl=None):
+        return True
+
+
+def _service(monkeypatch, requests):
+    monkeypatch.setattr(routing, "cache", _EmptyCache())
+    service = RoutingService(travel_time_model=TravelTimeModel(), backend="naver")
+    
+    async def get_route(start_lat, start_lon, end_lat, end_lon, option="trafast", use_cache=True):
+        requests.append(((start_lat, start_lon), (end_lat, end_lon)))
+        distance = abs(end_lat - start_lat) * 100 + abs(end_lon - start_lon) * 10
+        return {"status": "success", "distance_km": distance, "duration_minutes": distance * 2}
+    
+    service.get_route = get_route
+    return service
+
+
+def test_coincident_locations_are_requested_once(monkeypatch):
+    requests = []
+    service = _service(monkeypatch, requests)
+    
+    result = asyncio.run(service.get_distance_matrix([A, B, A, C], [A, B, A, C]))
+    
+    # 3 distinct locations, 6 ordered pairs between them
+    assert result["n_requests"] == len(requests) == 6
+    assert len(set(requests)) == 6
+    matrix = result["distance_matrix"]
+    assert matrix[0] == matrix[2]
+    assert matrix[0][2] == matrix[2][0] == 0
+
+
+def test_assume_symmetric_halves_the_requests(monkeypatch):
+    requests = []
+    service = _service(monkeypatch, requests)
+    
+    result = asyncio.run(service.get_distance_matrix([A, B, C], [A, B, C], assume_symmetric=True))
+    
+    assert result["n_requests"] == len(requests) == 3
+    matrix = result["distance_matrix"]
+    assert all(matrix[i][j] == matrix[j][i] for i in range(3) for j in range(3))
+
+
+def test_packed_path_round_trips_to_microdegrees():
+    path = [[127.0012345, 37.5012345], [127.1, 37.6], [126.9999994, 37.4999996]]
+    
+    packed = pack_path(path)
+    
+    assert len(packed) == 8 * len(path)
+    assert np.allclose(unpack_path(packed), path, rtol=0, atol=1e-6)
+    assert unpack_path(pack_path([])) == []
+
+
+def test_packed_path_survives_msgpack():
+    pytest.importorskip("msgpack")
+    serializer = get_serializer("msgpack")
+    path = [[127.0012345, 37.5012345], [127.1, 37.6]]
+    
+    entry = serializer.loads(serializer.dumps({"path": pack_path(path)}))
+    
+    assert unpack_path(entry["path"]) == unpack_path(pack_path(path))
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+    
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": 1}
+    
+    async def run():
+        return await asyncio.gather(*[flight.do("key", fetch) for _ in range(5)])
+    
+    results = asyncio.run(run())
+    
+    assert calls == 1
+    assert flight.shared == 4
+    assert all(result is results[0] for result in results)
+
+
+def test_sequential_calls_run_again():
+    flight = SingleFlight()
+    calls = 0
+    
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return calls
+    
+    async def run():
+        return await flight.do("key", fetch), await flight.do("key", fetch)
+    
+    assert asyncio.run(run()) == (1, 2)
+
+
+def test_exception_reaches_every_waiter():
+    flight = SingleFlight()
+    
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream error")
+    
+    async def run():
+        return await asyncio.gather(*[flight.do("key", fail) for _ in range(3)], return_exceptions=True)
+    
+    results = asyncio.run(run())
+    
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight()
+    
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "done"
+    
+    async def run():
+        first = asyncio.create_task(flight.do("key", fetch))
+        second = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+    
+    assert asyncio.run(run()) == "done"
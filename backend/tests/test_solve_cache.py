@@ -0,0 +1,46 @@
+import numpy as np
+from services.solve_cache import SolveCache
+
+VEHICLES = [{"vehicle_id": "V1", "vehicle_type": "frozen", "max_pallets": 6}]
+ORDERS = [
+    {
+        "order_id": f"O{idx}",
+        "pickup_client_id": f"P{idx}",
+        "delivery_client_id": f"D{idx}",
+        "temperature_type": "frozen",
+        "required_pallets": 2,
+        "weight_kg": 100.0,
+    }
+    for idx in range(2)
+]
+DISTANCE = [[0.0, 1.5, 2.25], [1.5, 0.0, 3.0], [2.25, 3.0, 0.0]]
+TIME = [[0.0, 3.0, 4.0], [3.0, 0.0, 5.0], [4.0, 5.0, 0.0]]
+
+
+def test_fingerprint_is_stable():
+    cache = SolveCache()
+    fingerprint = cache.fingerprint(VEHICLES, ORDERS, DISTANCE, TIME, time_limit_seconds=5)
+    
+    noisy = (np.asarray(DISTANCE) + 1e-7).tolist()
+    reordered = [dict(reversed(list(order.items())), notes="call ahead") for order in ORDERS]
+    in_meters = (np.asarray(DISTANCE) * 1000).astype(np.int32)
+    
+    assert cache.fingerprint(VEHICLES, ORDERS, noisy, TIME, time_limit_seconds=5) == fingerprint
+    assert cache.fingerprint(VEHICLES, reordered, DISTANCE, TIME, time_limit_seconds=5) == fingerprint
+    assert cache.fingerprint(
+        VEHICLES, ORDERS, in_meters, TIME, time_limit_seconds=5, distance_unit="m"
+    ) == fingerprint
+
+
+def test_fingerprint_changes_with_the_problem():
+    cache = SolveCache()
+    fingerprint = cache.fingerprint(VEHICLES, ORDERS, DISTANCE, TIME, time_limit_seconds=5)
+    
+    heavier = [dict(ORDERS[0], required_pallets=3), ORDERS[1]]
+    longer = [row[:] for row in DISTANCE]
+    longer[1][2] = 3.5
+    
+    assert cache.fingerprint(VEHICLES, heavier, DISTANCE, TIME, time_limit_seconds=5) != fingerprint
+    assert cache.fingerprint(VEHICLES, ORDERS, longer, TIME, time_limit_seconds=5) != fingerprint
+    assert cache.fingerprint(VEHICLES, ORDERS, DISTANCE, TIME, time_limit_seconds=10) != fingerprint
+    assert cache.fingerprint(VEHICLES[:0], ORDERS, DISTANCE, TIME, time_limit_seconds=5) != fingerprint
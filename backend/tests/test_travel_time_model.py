@@ -0,0 +1,67 @@
+import numpy as np
+from services.travel_time_model import MAX_SPEED_KMH, MIN_MOVING_SPEED_KMH, TravelTimeModel
+
+
+def _samples(n_samples: int = 2000):
+    rng = np.random.default_rng(3)
+    latitudes = 37.4 + rng.random(n_samples) * 0.3
+    longitudes = 126.9 + rng.random(n_samples) * 0.3
+    hours = rng.integers(0, 24, n_samples)
+    speeds = rng.uniform(0, 140, n_samples)
+    return latitudes, longitudes, hours, speeds
+
+
+def _aggregate(model: TravelTimeModel, latitudes, longitudes, hours, speeds):
+    """Group moving samples per (region, hour) like load_from_db does in SQL"""
+    moving = (speeds >= MIN_MOVING_SPEED_KMH) & (speeds <= MAX_SPEED_KMH)
+    cells = model._cells(latitudes[moving], longitudes[moving])
+    groups = {}
+    for (row, col), hour, speed in zip(cells, hours[moving], speeds[moving]):
+        count, pace_sum = groups.get((row, col, hour), (0, 0.0))
+        groups[(row, col, hour)] = (count + 1, pace_sum + 1 / speed)
+    
+    return (
+        [(row, col) for row, col, _ in groups],
+        [hour for _, _, hour in groups],
+        [count for count, _ in groups.values()],
+        [pace_sum for _, pace_sum in groups.values()],
+    )
+
+
+def test_fit_matches_fit_aggregated():
+    samples = _samples()
+    per_sample = TravelTimeModel().fit(*samples)
+    aggregated = TravelTimeModel()
+    aggregated.fit_aggregated(*_aggregate(aggregated, *samples))
+    
+    assert per_sample.n_samples == aggregated.n_samples
+    assert np.allclose(per_sample.hourly_speed, aggregated.hourly_speed)
+    assert per_sample.region_index == aggregated.region_index
+    assert np.allclose(per_sample.region_speed, aggregated.region_speed)
+
+
+def test_slow_hours_take_longer():
+    hours = np.repeat([3, 8], 500)
+    speeds = np.where(hours == 3, 60.0, 20.0)
+    model = TravelTimeModel().fit(np.full(1000, 37.5), np.full(1000, 127.0), hours, speeds)
+    
+    night, rush = (model.duration_matrix([(37.5, 127.0), (37.52, 127.02)], departure=hour) for hour in (3, 8))
+    
+    assert rush[0, 1] > 2.5 * night[0, 1]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    model = TravelTimeModel(region_cell_deg=0.1, min_samples=5).fit(*_samples())
+    path = tmp_path / "model.npz"
+    
+    model.save(str(path))
+    loaded = TravelTimeModel.load_file(str(path))
+    
+    assert loaded.region_cell_deg == 0.1
+    assert loaded.min_samples == 5
+    assert loaded.n_samples == model.n_samples
+    assert loaded.region_index == model.region_index
+    assert np.array_equal(loaded.region_speed, model.region_speed)
+    points = [(37.45, 126.95), (37.65, 127.15)]
+    assert np.array_equal(loaded.duration_matrix(points, departure=9), model.duration_matrix(points, departure=9))
+    assert loaded.build(points, departure=9)["distance_unit"] == "m"
@@ -0,0 +1,50 @@
+import asyncio
+from services.uvis_poller import UVISPoller
+
+
+def _poller(queue_size: int = 10) -> UVISPoller:
+    return UVISPoller(
+        uvis_service=object(), queue=asyncio.Queue(maxsize=queue_size),
+        moving_interval=10, idle_interval=30, parked_interval=300, jitter=0
+    )
+
+
+def _fix(timestamp: str, device_id: str = "D1", **fields):
+    return {"status": "success", "device_id": device_id, "timestamp": timestamp, **fields}
+
+
+def test_next_interval_follows_vehicle_state():
+    poller = _poller()
+    
+    assert poller.next_interval(_fix("t", speed_kmh=42.0, engine_on=True)) == 10
+    assert poller.next_interval(_fix("t", speed_kmh=0.0, engine_on=True)) == 30
+    assert poller.next_interval(_fix("t", speed_kmh=None)) == 30
+    assert poller.next_interval(_fix("t", speed_kmh=0.0, engine_on=False)) == 300
+    assert poller.next_interval({"status": "error"}) == 30
+
+
+def test_publish_skips_repeated_fixes():
+    poller = _poller()
+    
+    poller._publish("V1", _fix("2026-01-01T09:00:00"))
+    poller._publish("V1", _fix("2026-01-01T09:00:00"))
+    poller._publish("V2", _fix("2026-01-01T09:00:00", device_id="D2"))
+    poller._publish("V1", _fix("2026-01-01T09:00:10"))
+    
+    assert poller.published == 3
+    events = [poller.queue.get_nowait() for _ in range(3)]
+    assert [(event["vehicle_id"], event["timestamp"]) for event in events] == [
+        ("V1", "2026-01-01T09:00:00"), ("V2", "2026-01-01T09:00:00"), ("V1", "2026-01-01T09:00:10"),
+    ]
+
+
+def test_publish_drops_oldest_when_queue_is_full():
+    poller = _poller(queue_size=2)
+    
+    for second in range(3):
+        poller._publish("V1", _fix(f"2026-01-01T09:00:0{second}"))
+    
+    assert poller.dropped == 1
+    assert [poller.queue.get_nowait()["timestamp"] for _ in range(2)] == [
+        "2026-01-01T09:00:01", "2026-01-01T09:00:02",
+    ]
@@ -0,0 +1,204 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+from services.distance_matrix import DistanceMatrixEngine, haversine_matrix
+from services.vrp_solver import VRPSolver, settings
+
+DEPOT = (37.55, 127.0)
+
+
+def _orders(n_orders: int):
+    rng = np.random.default_rng(1)
+    return [
+        {
+            "order_id": f"O{idx}",
+            "pickup_client_id": f"P{idx}",
+            "delivery_client_id": f"D{idx}",
+            "pickup_latitude": 37.5 + rng.random() * 0.1,
+            "pickup_longitude": 127.0 + rng.random() * 0.1,
+            "delivery_latitude": 37.5 + rng.random() * 0.1,
+            "delivery_longitude": 127.0 + rng.random() * 0.1,
+            "temperature_type": "frozen" if idx % 2 else "chilled",
+            "required_pallets": 2,
+            "weight_kg": 100.0,
+        }
+        for idx in range(n_orders)
+    ]
+
+
+def _matrices(solver: VRPSolver, orders, paired: bool):
+    locations = solver.node_locations(orders, DEPOT, pickup_and_delivery=paired)
+    distance_km = haversine_matrix(locations, locations) * 1.3
+    return distance_km.tolist(), (distance_km / 40 * 60).tolist()
+
+
+VEHICLES = [
+    {"vehicle_id": "V1", "vehicle_type": "frozen", "max_pallets": 6},
+    {"vehicle_id": "V2", "vehicle_type": "frozen", "max_pallets": 6},
+]
+
+
+def test_distance_unit_is_explicit():
+    solver = VRPSolver()
+    orders = _orders(4)
+    matrices = DistanceMatrixEngine().build(solver.node_locations(orders, DEPOT))
+    distance_km = (matrices["distance_matrix"] / 1000).tolist()
+    
+    in_meters, _ = solver._prepare_matrices(matrices["distance_matrix"], matrices["time_matrix"], "m")
+    in_km, _ = solver._prepare_matrices(distance_km, matrices["time_matrix"], "km")
+    assert np.array_equal(in_meters, matrices["distance_matrix"])
+    assert np.array_equal(in_km, in_meters)
+    
+    result = solver.solve(
+        VEHICLES, orders, matrices["distance_matrix"], matrices["time_matrix"],
+        time_limit_seconds=1, distance_unit=matrices["distance_unit"]
+    )
+    assert result["summary"]["total_distance_km"] < 100
+    with pytest.raises(ValueError):
+        solver.solve(VEHICLES, orders, distance_km, matrices["time_matrix"], distance_unit="mi")
+
+
+def test_transit_matrices_match_callbacks():
+    orders = _orders(6)
+    distance_matrix, time_matrix = _matrices(VRPSolver(), orders, paired=False)
+    
+    objectives = [
+        VRPSolver(use_transit_matrices=use_transit_matrices).solve(
+            VEHICLES, orders, distance_matrix, time_matrix, time_limit_seconds=5,
+            local_search_metaheuristic="GREEDY_DESCENT"
+        )["objective_value"]
+        for use_transit_matrices in (True, False)
+    ]
+    
+    assert objectives[0] == objectives[1]
+
+
+def test_resolve_inserts_new_and_drops_cancelled_orders():
+    solver = VRPSolver()
+    orders = _orders(6)
+    previous = solver.solve(
+        VEHICLES, orders[:5], *_matrices(solver, orders[:5], paired=False), time_limit_seconds=1
+    )
+    orders[1]["status"] = "cancelled"
+    
+    result = solver.resolve(
+        previous, VEHICLES, orders, *_matrices(solver, orders, paired=False), time_limit_seconds=1
+    )
+    
+    assert result["redispatch"]["inserted_orders"] == ["O5"]
+    assert result["redispatch"]["removed_orders"] == ["O1"]
+    assert result["redispatch"]["kept_orders"] == 4
+    assigned = {stop["order_id"] for route in result["routes"] for stop in route["stops"]}
+    assert assigned == {"O0", "O2", "O3", "O4", "O5"}
+
+
+def test_decomposed_keeps_orders_in_their_zone():
+    solver = VRPSolver()
+    orders = _orders(6)
+    vehicles = [
+        {"vehicle_id": "F1", "vehicle_type": "frozen", "max_pallets": 6},
+        {"vehicle_id": "C1", "vehicle_type": "chilled", "max_pallets": 6},
+    ]
+    
+    result = solver.solve_decomposed(
+        vehicles, orders, *_matrices(solver, orders, paired=False), time_limit_seconds=1, max_workers=2
+    )
+    
+    assert result["status"] == "success"
+    assert {sub["label"]: sub["orders"] for sub in result["subproblems"]} == {"frozen": 3, "chilled": 3}
+    temperatures = {order["order_id"]: order["temperature_type"] for order in orders}
+    for route in result["routes"]:
+        zone = "frozen" if route["vehicle_id"] == "F1" else "chilled"
+        assert {temperatures[stop["order_id"]] for stop in route["stops"]} == {zone}
+    assert result["summary"]["orders_assigned"] == 6
+
+
+def test_clustered_reports_incompatible_orders():
+    solver = VRPSolver()
+    orders = _orders(4)
+    for order in orders[:2]:
+        order["temperature_type"] = "ambient"
+    
+    result = solver.solve_clustered(
+        [{"vehicle_id": "V1", "vehicle_type": "frozen", "max_pallets": 10}],
+        orders, depot_location=DEPOT, time_limit_seconds=1
+    )
+    
+    assert result["status"] == "partial"
+    assert result["unassigned_orders"] == ["O0", "O1"]
+    assert result["summary"]["orders_assigned"] == 2
+
+
+def test_clustered_empty_orders():
+    result = VRPSolver().solve_clustered(VEHICLES, [])
+    
+    assert result["status"] == "success"
+    assert result["routes"] == []
+
+
+def test_portfolio_reports_best_run_as_winner():
+    solver = VRPSolver()
+    orders = _orders(6)
+    configurations = [("PATH_CHEAPEST_ARC", "GREEDY_DESCENT"), ("SAVINGS", "GUIDED_LOCAL_SEARCH")]
+    
+    result = solver.solve_portfolio(
+        VEHICLES, orders, *_matrices(solver, orders, paired=False),
+        configurations=configurations, time_limit_seconds=1, max_workers=2
+    )
+    
+    runs = result["portfolio"]["runs"]
+    assert [(run["first_solution_strategy"], run["local_search_metaheuristic"]) for run in runs] == configurations
+    best = min(runs, key=lambda run: run["objective_value"])
+    assert result["objective_value"] == best["objective_value"]
+    assert result["portfolio"]["winner"] == {
+        "first_solution_strategy": best["first_solution_strategy"],
+        "local_search_metaheuristic": best["local_search_metaheuristic"],
+    }
+
+
+def test_stream_close_stops_search(monkeypatch):
+    monkeypatch.setattr(settings, "ORTOOLS_SOLUTION_LIMIT", 1_000_000)
+    solver = VRPSolver()
+    orders = _orders(20)
+    vehicles = [{"vehicle_id": "V1", "vehicle_type": "frozen", "max_pallets": 40}]
+    
+    async def first_update():
+        started = time.monotonic()
+        stream = solver.solve_stream(
+            vehicles, orders, *_matrices(solver, orders, paired=False), time_limit_seconds=60
+        )
+        update = await stream.__anext__()
+        await stream.aclose()
+        return update, time.monotonic() - started
+    
+    update, elapsed = asyncio.run(first_update())
+    
+    assert update["event"] == "improvement"
+    assert elapsed < 10
+
+
+def test_pickup_precedes_delivery_on_same_vehicle():
+    solver = VRPSolver()
+    orders = _orders(6)
+    distance_matrix, time_matrix = _matrices(solver, orders, paired=True)
+    
+    result = solver.solve(VEHICLES, orders, distance_matrix, time_matrix, time_limit_seconds=2, paired=True)
+    
+    assert result["status"] == "success"
+    visited = set()
+    for route in result["routes"]:
+        stops = [(stop["order_id"], stop["stop_type"]) for stop in route["stops"]]
+        for order_id in {order_id for order_id, _ in stops}:
+            assert stops.index((order_id, "pickup")) < stops.index((order_id, "delivery"))
+            visited.add(order_id)
+    assert visited == {order["order_id"] for order in orders}
+
+
+def test_paired_flag_must_match_matrix_layout():
+    solver = VRPSolver()
+    orders = _orders(3)
+    distance_matrix, time_matrix = _matrices(solver, orders, paired=False)
+    
+    with pytest.raises(ValueError):
+        solver.solve(VEHICLES, orders, distance_matrix, time_matrix, paired=True)
@@ -0,0 +1,166 @@
+import re
+import unicodedata
+from typing import Optional, Tuple
+
+# Abbreviated and former province/city names -> official name
+REGION_ALIASES = {
+    "서울": "서울특별시",
+    "서울시": "서울특별시",
+    "부산": "부산광역시",
+    "부산시": "부산광역시",
+    "대구": "대구광역시",
+    "대구시": "대구광역시",
+    "인천": "인천광역시",
+    "인천시": "인천광역시",
+    "광주": "광주광역시",
+    "광주시": "광주광역시",
+    "대전": "대전광역시",
+    "대전시": "대전광역시",
+    "울산": "울산광역시",
+    "울산시": "울산광역시",
+    "세종": "세종특별자치시",
+    "세종시": "세종특별자치시",
+    "경기": "경기도",
+    "강원": "강원특별자치도",
+    "강원도": "강원특별자치도",
+    "충북": "충청북도",
+    "충남": "충청남도",
+    "전북": "전북특별자치도",
+    "전라북도": "전북특별자치도",
+    "전남": "전라남도",
+    "경북": "경상북도",
+    "경남": "경상남도",
+    "제주": "제주특별자치도",
+    "제주도": "제주특별자치도",
+}
+
+_BRACKETS = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+_SEPARATORS = re.compile(r"[,·/]")
+# "중앙로 12번길" -> "중앙로12번길" so the side-street name stays one token
+_SIDE_STREET = re.compile(r"(로|길)\s+(\d+)\s*(번길|길)")
+# Road address: road name + building number ("테헤란로 152", "중앙로12번길 3-1"),
+# but not a "종로1가"-style dong name
+_ROAD = re.compile(r"(?<!\S)([가-힣][가-힣0-9.]*(?:로|길))\s*(지하\s*)?(\d+(?:-\d+)?)(?![\d-]|가)")
+# Jibun address: dong/ri + lot number ("역삼동 737", "운중동 산 12-3번지")
+_JIBUN = re.compile(r"(?<!\S)([가-힣][가-힣0-9.]*(?:동|리|가))\s*(산\s*)?(\d+(?:-\d+)?)(?:\s*번지)?")
+_NUMBERS = re.compile(r"\d+(?:-\d+)?")
+# 시/도 and 시/군/구 tokens ("서울특별시", "성남시", "분당구", "양평군")
+_DISTRICT = re.compile(r"[가-힣]+(?:시|도|군|구)$")
+# Any name + number, for street names with a misspelled suffix ("센텀중앙료 78")
+_STREET_FALLBACK = re.compile(r"(?<!\S)([가-힣][가-힣0-9.]*)\s*(지하\s*|산\s*)?(\d+(?:-\d+)?)(?![\d-])")
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+
+
+def normalize_address(address: str) -> str:
+    """
+    Canonical form of a Korean address used for cache and index keys
+    
+    Unifies width/spacing and province abbreviations, and drops everything
+    after the building or lot number (floor, unit, building name and other
+    상세주소 detail), which does not change the coordinates.
+    
+    Args:
+        address: Free-form road (도로명) or lot (지번) address
+    
+    Returns:
+        Normalized address, e.g. "서울시 강남구 테헤란로152, 3층 (역삼동)"
+        -> "서울특별시 강남구 테헤란로 152"
+    """
+    text = unicodedata.normalize("NFKC", address).lower()
+    text = _BRACKETS.sub(" ", text)
+    text = _SEPARATORS.sub(" ", text)
+    text = _SIDE_STREET.sub(r"\1\2\3", text)
+    
+    tokens = text.split()
+    if tokens and tokens[0] in REGION_ALIASES:
+        tokens[0] = REGION_ALIASES[tokens[0]]
+    text = " ".join(tokens)
+    
+    road = _ROAD.search(text)
+    if road:
+        basement = "지하 " if road.group(2) else ""
+        return f"{text[:road.start()]}{road.group(1)} {basement}{road.group(3)}"
+    
+    jibun = _JIBUN.search(text)
+    if jibun:
+        mountain = "산 " if jibun.group(2) else ""
+        return f"{text[:jibun.start()]}{jibun.group(1)} {mountain}{jibun.group(3)}"
+    
+    return text
+
+
+def address_numbers(normalized: str) -> Tuple[str, ...]:
+    """Building/lot numbers of a normalized address; they must match exactly"""
+    return tuple(_NUMBERS.findall(normalized))
+
+
+def address_parts(normalized: str) -> Optional[Tuple[Tuple[str, ...], str]]:
+    """
+    Split a normalized address into its exact part and its street name
+    
+    Returns:
+        (key, name), or None without a road/lot number. key holds the 시/도
+        and 시/군/구 tokens, the 지하/산 marker and the numbers, which must
+        match exactly; name is the road or dong/ri name, e.g.
+        "대구광역시 북구 동대구로 550" -> (("대구광역시", "북구", "", "550"), "동대구로").
+        A street whose 로/길/동 suffix is misspelled is split on the first
+        name followed by a number, keyed by that number only.
+    """
+    street = _ROAD.search(normalized) or _JIBUN.search(normalized)
+    if street:
+        numbers = address_numbers(normalized[street.start():])
+    else:
+        street = next(
+            (match for match in _STREET_FALLBACK.finditer(normalized) if not _DISTRICT.match(match.group(1))),
+            None
+        )
+        if not street:
+            return None
+        numbers = (street.group(3),)
+    
+    districts = tuple(token for token in normalized[:street.start()].split() if _DISTRICT.match(token))
+    marker = (street.group(2) or "").strip()
+    
+    return (*districts, marker, *numbers), street.group(1)
+
+
+def decompose_hangul(text: str) -> str:
+    """
+    Split Hangul syllables into their jamo ("태" -> "ㅌㅐ" as conjoining jamo)
+    
+    A typical typo changes one jamo of one syllable (태/테, 탈/털, 료/로),
+    so names are compared at this level. Other characters are kept.
+    """
+    jamo = []
+    for char in text:
+        code = ord(char)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            initial, rest = divmod(code - _HANGUL_BASE, 588)
+            medial, final = divmod(rest, 28)
+            jamo.append(chr(0x1100 + initial) + chr(0x1161 + medial) + (chr(0x11A7 + final) if final else ""))
+        else:
+            jamo.append(char)
+    
+    return "".join(jamo)
+
+
+def name_similarity(a: str, b: str) -> float:
+    """
+    1 - edit distance / longer length of two decomposed names (0.0 - 1.0)
+    
+    One wrong jamo in a 4-syllable road name ("태헤란로") scores about 0.89,
+    while different roads ("동대구로"/"서대구로", "중앙로"/"중앙대로") stay at 0.8 or below.
+    """
+    if not a or not b:
+        return 0.0
+    
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    
+    return 1 - previous[-1] / max(len(a), len(b))
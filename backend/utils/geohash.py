@@ -0,0 +1,72 @@
+from typing import Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {char: value for value, char in enumerate(BASE32)}
+
+
+def encode(latitude: float, longitude: float, precision: int = 7) -> str:
+    """
+    Geohash of a point
+    
+    Cell size by precision: 6 ~ 1.2 x 0.6 km, 7 ~ 150 x 150 m,
+    8 ~ 38 x 19 m.
+    
+    Args:
+        latitude: Latitude coordinate
+        longitude: Longitude coordinate
+        precision: Number of characters
+    
+    Returns:
+        Geohash string
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    value = 0
+    bits = 0
+    even = True  # Bits alternate longitude, latitude
+    
+    while len(chars) < precision:
+        coordinate, interval = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        if coordinate >= mid:
+            value = (value << 1) | 1
+            interval[0] = mid
+        else:
+            value <<= 1
+            interval[1] = mid
+        even = not even
+        
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            value = 0
+            bits = 0
+    
+    return "".join(chars)
+
+
+def bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """Cell bounds (min_lat, min_lon, max_lat, max_lon) of a geohash"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            mid = (interval[0] + interval[1]) / 2
+            if (value >> shift) & 1:
+                interval[0] = mid
+            else:
+                interval[1] = mid
+            even = not even
+    
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def decode(geohash: str) -> Tuple[float, float]:
+    """Center (latitude, longitude) of a geohash cell"""
+    min_lat, min_lon, max_lat, max_lon = bounds(geohash)
+    return (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Optional
+
+THROTTLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def is_throttled(status_code: Optional[int]) -> bool:
+    """Check whether an HTTP status asks the client to slow down and retry"""
+    return status_code in THROTTLE_STATUS_CODES
+
+
+class AdaptiveRateLimiter:
+    """
+    Token-bucket rate limiter with a cap on requests in flight
+    
+    Use as `async with limiter:` around each API request and report the
+    outcome with record(). Throttled responses (429/5xx) or transport errors
+    halve the request rate and pause new requests with an exponential
+    backoff; successful responses raise the rate back toward the configured
+    maximum step by step.
+    """
+    
+    def __init__(
+        self,
+        rate_per_second: float,
+        max_concurrency: int,
+        min_rate_per_second: float = 1.0,
+        burst: Optional[float] = None,
+        initial_backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 30.0
+    ):
+        self.max_rate = rate_per_second
+        self.rate = rate_per_second
+        self.min_rate = min(min_rate_per_second, rate_per_second)
+        self.burst = burst or max(1.0, rate_per_second)
+        self.initial_backoff_seconds = initial_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.backoff_seconds = 0.0
+        self.blocked_until = 0.0
+        
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+    
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        try:
+            await self._take_token()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+    
+    def record(self, status_code: Optional[int]):
+        """
+        Adapt the rate to a response
+        
+        Args:
+            status_code: HTTP status of the response, or None for a timeout
+                or connection error
+        """
+        now = time.monotonic()
+        self._refill(now)
+        
+        if status_code is None or is_throttled(status_code):
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.backoff_seconds = min(
+                self.max_backoff_seconds,
+                self.backoff_seconds * 2 or self.initial_backoff_seconds
+            )
+            self.blocked_until = max(self.blocked_until, now + self.backoff_seconds)
+            self.tokens = 0.0
+        else:
+            self.backoff_seconds = 0.0
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+    
+    async def _take_token(self):
+        """Wait until the bucket holds a token and the backoff pause is over"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key
+    
+    The first caller for a key runs the function; callers that arrive while
+    it is in flight await the same result (or exception) instead of issuing
+    their own request.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.shared = 0
+    
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func once for all concurrent callers of key
+        
+        Args:
+            key: Coalescing key (usually the cache key)
+            func: Zero-argument coroutine function performing the call
+        
+        Returns:
+            Result of func
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            # Shield so one cancelled waiter does not cancel the shared call
+            return await asyncio.shield(future)
+        
+        future = asyncio.ensure_future(func())
+        self._calls[key] = future
+        future.add_done_callback(lambda _: self._forget(key, future))
+        
+        return await asyncio.shield(future)
+    
+    def _forget(self, key: str, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Mark the exception as retrieved when no waiter is left to do it
+        if not future.cancelled():
+            future.exception()